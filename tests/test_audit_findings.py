@@ -0,0 +1,52 @@
+"""Tests for iter_findings, the streaming audit behind --format jsonl/sarif."""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+import audit_xcompose_design  # noqa: E402
+from audit_xcompose_design import DesignAuditor, audit_summary, iter_findings  # noqa: E402
+from xcompose_lib import XComposeParser  # noqa: E402
+
+XCOMPOSE = Path(__file__).resolve().parent.parent / 'XCompose'
+
+
+class TestIterFindings(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        parser = XComposeParser(str(XCOMPOSE))
+        parser.parse()
+        cls.sequences = parser.sequences
+
+    def test_summary_matches_audit_summary(self):
+        counts = {}
+        findings = list(iter_findings(self.sequences, 'XCompose', summary=counts))
+        self.assertEqual(counts, audit_summary(self.sequences))
+        rules = [finding.rule for finding in findings]
+        self.assertEqual(rules.count('incomplete_family'), counts['incomplete families'])
+        self.assertEqual(rules.count('typo_neighbor'), counts['typo neighbors'])
+
+    def test_summary_is_filled_only_at_the_end(self):
+        counts = {}
+        findings = iter_findings(self.sequences, 'XCompose', summary=counts)
+        next(findings)
+        self.assertEqual(counts, {})
+
+    def test_each_audit_runs_once(self):
+        with mock.patch.object(DesignAuditor, 'audit_symmetry', autospec=True,
+                               side_effect=DesignAuditor.audit_symmetry) as symmetry, \
+                mock.patch.object(audit_xcompose_design, 'audit_usage_patterns',
+                                  wraps=audit_xcompose_design.audit_usage_patterns) as usage:
+            list(iter_findings(self.sequences, 'XCompose', summary={}))
+        self.assertEqual(symmetry.call_count, 1)
+        self.assertEqual(usage.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for the chunked corpus count behind --corpus."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+import audit_xcompose_design  # noqa: E402
+from audit_xcompose_design import count_corpus  # noqa: E402
+
+OUTPUTS = ['→', '≠', '→→', 'α']
+
+
+class TestCountCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'notes.txt')
+
+    def write(self, text):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def count(self, chunk_bytes):
+        return count_corpus([self.path], OUTPUTS, jobs=1, chunk_bytes=chunk_bytes)
+
+    def test_chunks_match_whole_file(self):
+        self.write(''.join(f'line {i}: a → b ≠ c →→ α\n' for i in range(200)) + 'no newline →')
+        whole = self.count(2**20)
+        self.assertEqual(whole['counts'], {'→': 201, '≠': 200, '→→': 200, 'α': 200})
+        for chunk_bytes in (1, 7, 13, 64, 1000):
+            with self.subTest(chunk_bytes=chunk_bytes):
+                chunked = self.count(chunk_bytes)
+                self.assertEqual(chunked['counts'], whole['counts'])
+                self.assertEqual(chunked['bytes'], whole['bytes'])
+
+    def test_long_line_overrun_is_bounded(self):
+        self.write('≠' * 400 + '\n' + 'α\n')
+        with mock.patch.object(audit_xcompose_design, 'CORPUS_LINE_OVERRUN', 30):
+            chunked = self.count(100)
+        # Every chunk reads at most the overrun past its edge, and no byte
+        # is scanned twice
+        self.assertEqual(chunked['bytes'], os.path.getsize(self.path))
+        self.assertEqual(chunked['counts']['α'], 1)
+        self.assertGreaterEqual(chunked['counts']['≠'], 400 - 12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for IncludeResolver: include expansion, overrides and cycles."""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from xcompose_lib import IncludeResolver, expand_include_path  # noqa: E402
+
+
+class TestIncludeResolver(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(os.path.realpath(tmp.name))
+        self.locale = self.write('locale/Compose', '<Multi_key> <a> <a> : "å"\n<Multi_key> <o> <o> : "°"\n')
+
+    def write(self, name, text):
+        path = self.dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+
+    def resolve(self, root):
+        resolver = IncludeResolver(locale_compose=self.locale, home=str(self.dir),
+                                   locale_dir=str(self.dir / 'locale'))
+        return resolver.resolve(root)
+
+    def symbols(self, table):
+        return {' '.join(keys): entry.sequence.symbol for keys, entry in table.entries.items()}
+
+    def test_later_definition_overrides_include(self):
+        root = self.write('.XCompose', 'include "%L"\n<Multi_key> <o> <o> : "∘"\n')
+        table = self.resolve(root)
+        self.assertEqual(table.layers, [root, self.locale])
+        self.assertEqual(self.symbols(table), {'a a': 'å', 'o o': '∘'})
+        entry = table.entries[('o', 'o')]
+        self.assertEqual(entry.source, root)
+        self.assertEqual([(source, seq.symbol) for source, seq in entry.overridden], [(self.locale, '°')])
+        self.assertEqual(table.problems, [])
+
+    def test_include_order_matters(self):
+        root = self.write('.XCompose', '<Multi_key> <o> <o> : "∘"\ninclude "%L"\n')
+        self.assertEqual(self.symbols(self.resolve(root))['o o'], '°')
+
+    def test_home_and_relative_paths(self):
+        self.write('extra/more', '<Multi_key> <m> <m> : "µ"\n')
+        self.write('extra/main', 'include "more"\n')
+        root = self.write('.XCompose', 'include "%H/extra/main"\n')
+        self.assertEqual(self.symbols(self.resolve(root)), {'m m': 'µ'})
+
+    def test_cycle_is_reported_once_and_terminates(self):
+        first = self.write('a', 'include "b"\n<Multi_key> <a> <b> : "1"\n')
+        second = self.write('b', 'include "a"\n<Multi_key> <b> <a> : "2"\n')
+        table = self.resolve(first)
+        self.assertEqual(table.problems, [f'Include cycle: {first} -> {second} -> {first}'])
+        self.assertEqual(self.symbols(table), {'a b': '1', 'b a': '2'})
+        self.assertEqual(table.layers, [first, second])
+
+    def test_self_include(self):
+        root = self.write('.XCompose', 'include "%H/.XCompose"\n<Multi_key> <x> : "×"\n')
+        table = self.resolve(root)
+        self.assertEqual(table.problems, [f'Include cycle: {root} -> {root}'])
+        self.assertEqual(self.symbols(table), {'x': '×'})
+
+    def test_diamond_is_not_a_cycle(self):
+        self.write('shared', '<Multi_key> <s> : "§"\n')
+        self.write('left', 'include "shared"\n')
+        self.write('right', 'include "shared"\n')
+        root = self.write('.XCompose', 'include "left"\ninclude "right"\n')
+        table = self.resolve(root)
+        self.assertEqual(table.problems, [])
+        self.assertEqual(self.symbols(table), {'s': '§'})
+
+    def test_missing_include(self):
+        root = self.write('.XCompose', 'include "%H/nowhere"\n<Multi_key> <x> : "×"\n')
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            table = self.resolve(root)
+        self.assertIn('nowhere', stderr.getvalue())
+        self.assertEqual(table.problems, [f'Cannot read included file: {self.dir}/nowhere'])
+        self.assertEqual(self.symbols(table), {'x': '×'})
+
+
+class TestExpandIncludePath(unittest.TestCase):
+
+    def test_substitutions(self):
+        self.assertEqual(expand_include_path('%L', locale_compose='/l/Compose'), '/l/Compose')
+        self.assertEqual(expand_include_path('%H/.XCompose', home='/home/u'), '/home/u/.XCompose')
+        self.assertEqual(expand_include_path('%S/en_US.UTF-8/Compose', locale_dir='/x'),
+                         '/x/en_US.UTF-8/Compose')
+        self.assertEqual(expand_include_path('/a/100%%'), '/a/100%')
+
+    def test_unknown_locale(self):
+        self.assertIsNone(expand_include_path('%L', locale_compose=None))
+
+    def test_relative_to_including_file(self):
+        self.assertEqual(expand_include_path('more', Path('/etc/compose/main')), '/etc/compose/more')
+
+
+if __name__ == '__main__':
+    unittest.main()
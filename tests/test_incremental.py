@@ -0,0 +1,151 @@
+"""Tests for XComposeParser.update(), the incremental re-parse."""
+
+import os
+import random
+import sys
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from xcompose_lib import XComposeParser  # noqa: E402
+
+BUFFER = """\
+# GREEK LETTERS — Lowercase and uppercase
+## LOWERCASE
+<Multi_key> <g> <a> : "α" U03B1  # [MNEMONIC] alpha
+<Multi_key> <g> <b> : "β" U03B2  # [MNEMONIC] beta
+## UPPERCASE
+<Multi_key> <g> <A> : "Α" U0391  # [MNEMONIC] Alpha
+
+# ARROWS — Directions
+<Multi_key> <minus> <greater> : "→" U2192  # [ICONIC] right
+include "%L"
+<Multi_key> <less> <minus> : "←" U2190  # [ICONIC] left
+""".splitlines(keepends=True)
+
+# Lines the randomized test draws from: headers change the state that
+# flows into every later line
+POOL = [
+    '# GREEK LETTERS — Lowercase\n',
+    '# ARROWS — Directions\n',
+    '# MATH OPERATORS — Sets\n',
+    '## LOWERCASE\n',
+    '## DOUBLE\n',
+    '################################\n',
+    '# plain comment\n',
+    '\n',
+    'include "%H/.XCompose.local"\n',
+    '<Multi_key> <g> <a> : "α" U03B1  # [MNEMONIC] alpha\n',
+    '<Multi_key> <g> <b> : "β"  # [MNEMONIC] beta\n',
+    '<Multi_key> <g> <b> : "ϐ"  # [MNEMONIC] curly beta\n',
+    '<Multi_key> <minus> <greater> : "→" U2192  # [ICONIC] right\n',
+    '<Multi_key> <equal> <greater> : "⇒"  # [ICONIC] implies\n',
+    '<Multi_key> <i> <n> : "∈"\n',
+    '<Multi_key> <bad\n',
+]
+
+
+def snapshot(parser):
+    """Everything update() must keep identical to a fresh parse."""
+    sequences = [(seq.line_num, seq.keys, seq.symbol, seq.codepoint, seq.comment, seq.tag,
+                  seq.category, seq.subcategory) for seq in parser.sequences]
+    categories = {name: [seq.line_num for seq in seqs] for name, seqs in parser.categories.items() if seqs}
+    return sequences, categories, sorted(parser.includes)
+
+
+def fresh(lines):
+    parser = XComposeParser('<buffer>')
+    parser.parse_lines(list(lines))
+    return parser
+
+
+class TestUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.parser = fresh(BUFFER)
+        self.lines = list(BUFFER)
+
+    def update(self):
+        delta = self.parser.update(list(self.lines))
+        self.assertEqual(snapshot(self.parser), snapshot(fresh(self.lines)))
+        return delta
+
+    def test_unchanged_buffer(self):
+        delta = self.update()
+        self.assertTrue(delta.is_empty)
+        self.assertEqual(delta.reparsed_lines, 0)
+
+    def test_insert(self):
+        self.lines.insert(4, '<Multi_key> <g> <g> : "γ" U03B3  # [MNEMONIC] gamma\n')
+        delta = self.update()
+        self.assertEqual([seq.symbol for seq in delta.added], ['γ'])
+        self.assertEqual(delta.added[0].line_num, 5)
+        self.assertEqual(delta.added[0].subcategory, 'LOWERCASE')
+        self.assertEqual((delta.removed, delta.changed), ([], []))
+        self.assertEqual(delta.reparsed_lines, 1)
+        # Later sequences only moved
+        self.assertEqual(self.parser.sequences[-1].line_num, len(self.lines))
+
+    def test_delete(self):
+        del self.lines[3]
+        delta = self.update()
+        self.assertEqual([seq.symbol for seq in delta.removed], ['β'])
+        self.assertEqual((delta.added, delta.changed), ([], []))
+        self.assertEqual(delta.reparsed_lines, 0)
+
+    def test_change_output(self):
+        self.lines[2] = '<Multi_key> <g> <a> : "ɑ"  # [MNEMONIC] latin alpha\n'
+        delta = self.update()
+        self.assertEqual([(old.symbol, new.symbol) for old, new in delta.changed], [('α', 'ɑ')])
+        self.assertEqual((delta.added, delta.removed), ([], []))
+
+    def test_change_keys(self):
+        self.lines[2] = '<Multi_key> <g> <x> : "α" U03B1  # [MNEMONIC] alpha\n'
+        delta = self.update()
+        self.assertEqual([seq.keys for seq in delta.removed], [('g', 'a')])
+        self.assertEqual([seq.keys for seq in delta.added], [('g', 'x')])
+
+    def test_header_edit_recategorizes_following_lines(self):
+        self.lines[0] = '# GREEK ALPHABET — Lowercase and uppercase\n'
+        delta = self.update()
+        self.assertEqual(len(delta.changed), 3)
+        self.assertTrue(all(new.category == 'GREEK ALPHABET' for _, new in delta.changed))
+        # Parsing stops once the state agrees with the old parse again
+        self.assertLess(delta.reparsed_lines, len(self.lines))
+        self.assertEqual(self.parser.sequences[-1].category, 'ARROWS')
+
+    def test_deleting_subsection_header(self):
+        del self.lines[4]  # ## UPPERCASE
+        delta = self.update()
+        self.assertEqual([(old.subcategory, new.subcategory) for old, new in delta.changed],
+                         [('UPPERCASE', 'LOWERCASE')])
+
+    def test_include_lines_shift(self):
+        self.lines.insert(0, '\n')
+        self.update()
+        self.assertEqual(self.parser.includes, [(11, '%L')])
+
+    def test_randomized_edits_match_fresh_parse(self):
+        rng = random.Random(7)
+        for _ in range(300):
+            for _ in range(rng.randint(1, 3)):
+                action = rng.random()
+                if action < 0.4 or not self.lines:
+                    self.lines.insert(rng.randint(0, len(self.lines)), rng.choice(POOL))
+                elif action < 0.7:
+                    del self.lines[rng.randrange(len(self.lines))]
+                else:
+                    self.lines[rng.randrange(len(self.lines))] = rng.choice(POOL)
+            before = {seq.line_num: seq for seq in self.parser.sequences}
+            delta = self.update()
+            # Every sequence the delta reports is in the right parse
+            for seq in delta.added:
+                self.assertIn(seq, self.parser.sequences)
+            for seq in delta.removed:
+                self.assertIs(before.get(seq.line_num), seq)
+
+
+if __name__ == '__main__':
+    unittest.main()
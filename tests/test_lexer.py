@@ -0,0 +1,175 @@
+"""Tests for lex_compose_line(), the Compose(5) grammar lexer."""
+
+import os
+import sys
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from xcompose_lib import ComposeInclude, ComposeProduction, ComposeSyntaxError, lex_compose_line  # noqa: E402
+
+
+class TestProductions(unittest.TestCase):
+
+    def test_multi_key_production(self):
+        item = lex_compose_line('<Multi_key> <minus> <greater> : "→" U2192  # [ICONIC] Arrow')
+        self.assertIs(item.__class__, ComposeProduction)
+        self.assertEqual(item.keys, ('Multi_key', 'minus', 'greater'))
+        self.assertEqual(item.string, '→')
+        self.assertEqual(item.keysym, 'U2192')
+        self.assertEqual(item.comment, '[ICONIC] Arrow')
+        self.assertIsNone(item.modifiers)
+        self.assertEqual(item.sequence_string, '<Multi_key> <minus> <greater>')
+
+    def test_dead_key_production(self):
+        item = lex_compose_line('<dead_acute> <a> : "á" aacute # LATIN SMALL LETTER A WITH ACUTE')
+        self.assertEqual(item.keys, ('dead_acute', 'a'))
+        self.assertEqual(item.output, 'á')
+        self.assertEqual(item.codepoint, '00E1')
+
+    def test_keys_without_whitespace(self):
+        item = lex_compose_line('<dead_grave><dead_grave> : "`" grave')
+        self.assertEqual(item.keys, ('dead_grave', 'dead_grave'))
+
+    def test_tabs_and_no_comment(self):
+        item = lex_compose_line('<a>\t<b>\t:\t"x"')
+        self.assertEqual(item.keys, ('a', 'b'))
+        self.assertEqual(item.string, 'x')
+        self.assertIsNone(item.keysym)
+        self.assertIsNone(item.comment)
+
+    def test_keysym_only_output(self):
+        item = lex_compose_line('<Multi_key> <a> <apostrophe> : aacute')
+        self.assertIsNone(item.string)
+        self.assertEqual(item.keysym, 'aacute')
+        self.assertEqual(item.output, 'á')
+
+    def test_keysym_without_character(self):
+        item = lex_compose_line('<dead_acute> <space> : dead_acute')
+        self.assertIsNone(item.codepoint)
+        self.assertEqual(item.output, 'dead_acute')
+
+    def test_hash_inside_string(self):
+        item = lex_compose_line('<Multi_key> <plus> <plus> : "#" numbersign # hash')
+        self.assertEqual(item.string, '#')
+        self.assertEqual(item.keysym, 'numbersign')
+        self.assertEqual(item.comment, 'hash')
+
+    def test_blank_and_comment_lines(self):
+        self.assertIsNone(lex_compose_line(''))
+        self.assertIsNone(lex_compose_line('   \t'))
+        self.assertIsNone(lex_compose_line('# <a> : "x"'))
+
+
+class TestModifiers(unittest.TestCase):
+
+    def test_modifier_prefixes(self):
+        item = lex_compose_line('!Ctrl <a> ~Shift <b> : "x"')
+        self.assertEqual(item.keys, ('a', 'b'))
+        self.assertEqual(item.modifiers, ('!Ctrl', '~Shift'))
+        self.assertEqual(item.sequence_string, '!Ctrl <a> ~Shift <b>')
+
+    def test_none_modifier(self):
+        item = lex_compose_line('None <a> <b> : "x"')
+        self.assertEqual(item.modifiers, ('None', ''))
+
+    def test_bare_bang_and_tilde(self):
+        item = lex_compose_line('! Ctrl <a> : "x"')
+        self.assertEqual(item.modifiers, ('! Ctrl',))
+        item = lex_compose_line('~ Alt <a> : "x"')
+        self.assertEqual(item.modifiers, ('~ Alt',))
+
+    def test_unknown_modifier(self):
+        with self.assertRaises(ComposeSyntaxError) as caught:
+            lex_compose_line('Hyper <a> : "x"')
+        self.assertIn('Unknown modifier', caught.exception.message)
+
+    def test_tilde_needs_a_modifier(self):
+        with self.assertRaises(ComposeSyntaxError):
+            lex_compose_line('~ <a> : "x"')
+
+    def test_modifier_without_keysym(self):
+        with self.assertRaises(ComposeSyntaxError):
+            lex_compose_line('<a> Ctrl : "x"')
+
+
+class TestEscapes(unittest.TestCase):
+
+    def test_escaped_quote_and_backslash(self):
+        self.assertEqual(lex_compose_line(r'<a> : "\""').string, '"')
+        self.assertEqual(lex_compose_line(r'<a> : "\\"').string, '\\')
+        self.assertEqual(lex_compose_line(r'<a> : "a\"b" # c').comment, 'c')
+
+    def test_octal_and_hex_escapes(self):
+        self.assertEqual(lex_compose_line(r'<a> : "\101\x42"').string, 'AB')
+        # Numeric escapes are UTF-8 bytes
+        self.assertEqual(lex_compose_line(r'<a> : "\303\251"').string, 'é')
+        self.assertEqual(lex_compose_line(r'<a> : "\xc3\xa9"').string, 'é')
+
+    def test_named_escapes(self):
+        self.assertEqual(lex_compose_line(r'<a> : "\n\t"').string, '\n\t')
+
+    def test_unterminated_string(self):
+        with self.assertRaises(ComposeSyntaxError) as caught:
+            lex_compose_line('<a> : "x')
+        self.assertIn('Unterminated', caught.exception.message)
+        with self.assertRaises(ComposeSyntaxError):
+            lex_compose_line('<a> : "x\\"')
+
+
+class TestIncludes(unittest.TestCase):
+
+    def test_include(self):
+        item = lex_compose_line('include "%L"')
+        self.assertIs(item.__class__, ComposeInclude)
+        self.assertEqual(item.path, '%L')
+
+    def test_include_with_comment(self):
+        self.assertEqual(lex_compose_line('include "/usr/share/X11/locale/en_US.UTF-8/Compose" # base').path,
+                         '/usr/share/X11/locale/en_US.UTF-8/Compose')
+
+    def test_include_without_quotes(self):
+        with self.assertRaises(ComposeSyntaxError):
+            lex_compose_line('include %L')
+
+    def test_include_trailing_text(self):
+        with self.assertRaises(ComposeSyntaxError):
+            lex_compose_line('include "%L" extra')
+
+
+class TestSyntaxErrors(unittest.TestCase):
+
+    def assertSyntaxError(self, line, message):
+        with self.assertRaises(ComposeSyntaxError) as caught:
+            lex_compose_line(line)
+        self.assertIn(message, caught.exception.message)
+
+    def test_missing_colon(self):
+        self.assertSyntaxError('<a> <b> "x"', 'Missing colon')
+        self.assertSyntaxError('<a> # : "x"', 'Missing colon')
+
+    def test_empty_keysym(self):
+        self.assertSyntaxError('<> : "x"', 'Empty keysym')
+        self.assertSyntaxError('<a> <> : "x"', 'Empty keysym')
+
+    def test_malformed_keysyms(self):
+        self.assertSyntaxError('<a b> : "x"', 'Invalid keysym name')
+        self.assertSyntaxError('<a-b> : "x"', 'Invalid keysym name')
+        self.assertSyntaxError('<a>> : "x"', 'Unexpected character')
+        self.assertSyntaxError('<a> <b : "x"', 'Unterminated keysym')
+
+    def test_missing_output(self):
+        self.assertSyntaxError('<a> : ', 'Missing output')
+        self.assertSyntaxError('<a> : # comment', 'Missing output')
+
+    def test_extra_output_tokens(self):
+        self.assertSyntaxError('<a> : "x" y z', 'Unexpected text after output')
+
+    def test_invalid_output_keysym(self):
+        self.assertSyntaxError('<a> : "x" ø', 'Invalid output keysym')
+
+
+if __name__ == '__main__':
+    unittest.main()
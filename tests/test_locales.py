@@ -0,0 +1,129 @@
+"""Tests for the include-resolved locale inventory and conflict matrix
+(--list-locales, --all-locales)."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from check_system_defaults import (build_locale_inventory, build_locale_matrix,  # noqa: E402
+                                   resolve_locale_table)
+from xcompose_lib import ParseCache  # noqa: E402
+
+EN_US = '''\
+<Multi_key> <a> <b> : "x"
+<Multi_key> <a> <c> : "y"
+<dead_acute> <a> : "á"
+'''
+
+
+class LocaleDirTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.locale_dir = os.path.join(self.tmp.name, 'locale')
+        self.write('en_US.UTF-8', EN_US)
+        self.write('ja_JP.UTF-8', 'include "%S/en_US.UTF-8/Compose"\n')
+        self.write('fi_FI.UTF-8', 'include "%S/en_US.UTF-8/Compose"\n'
+                                  '<Multi_key> <a> <c> : "z"\n'
+                                  '<Multi_key> <o> <o> : "°"\n')
+        self.write('C', '# No sequences\n')
+
+    def write(self, locale, text):
+        directory = os.path.join(self.locale_dir, locale)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, 'Compose')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def compose(self, locale):
+        return os.path.join(self.locale_dir, locale, 'Compose')
+
+    def inventory(self, cache=None):
+        return {item['locale']: item
+                for item in build_locale_inventory(self.locale_dir, jobs=1, cache=cache)}
+
+
+class TestResolveLocaleTable(LocaleDirTestCase):
+
+    def test_include_is_followed(self):
+        table, files, problems = resolve_locale_table(self.compose('ja_JP.UTF-8'), self.locale_dir)
+        self.assertEqual(table, {('a', 'b'): 'x', ('a', 'c'): 'y'})
+        self.assertEqual(files, [os.path.realpath(self.compose(locale))
+                                 for locale in ('ja_JP.UTF-8', 'en_US.UTF-8')])
+        self.assertEqual(problems, [])
+
+    def test_later_definition_wins(self):
+        table, _, _ = resolve_locale_table(self.compose('fi_FI.UTF-8'), self.locale_dir)
+        self.assertEqual(table, {('a', 'b'): 'x', ('a', 'c'): 'z', ('o', 'o'): '°'})
+
+    def test_missing_include_is_a_problem(self):
+        self.write('ko_KR.UTF-8', 'include "%S/nowhere/Compose"\n')
+        _, _, problems = resolve_locale_table(self.compose('ko_KR.UTF-8'), self.locale_dir)
+        self.assertEqual(len(problems), 1)
+
+
+class TestLocaleInventory(LocaleDirTestCase):
+
+    def test_counts_follow_includes(self):
+        inventory = self.inventory()
+        self.assertEqual({name: item['sequences'] for name, item in inventory.items()},
+                         {'C': 0, 'en_US.UTF-8': 2, 'fi_FI.UTF-8': 3, 'ja_JP.UTF-8': 2})
+
+    def test_same_as_names_the_defining_locale(self):
+        inventory = self.inventory()
+        self.assertEqual(inventory['ja_JP.UTF-8']['hash'], inventory['en_US.UTF-8']['hash'])
+        self.assertEqual(inventory['ja_JP.UTF-8']['same_as'], 'en_US.UTF-8')
+        self.assertIsNone(inventory['en_US.UTF-8']['same_as'])
+        self.assertIsNone(inventory['fi_FI.UTF-8']['same_as'])
+
+    def test_unreadable_include_is_an_error(self):
+        self.write('ko_KR.UTF-8', 'include "%S/nowhere/Compose"\n')
+        item = self.inventory()['ko_KR.UTF-8']
+        self.assertIsNone(item['sequences'])
+        self.assertIn('nowhere', item['error'])
+
+    def test_cache_notices_a_changed_include(self):
+        cache = ParseCache(cache_dir=Path(self.tmp.name) / 'cache')
+        self.assertEqual(self.inventory(cache)['ja_JP.UTF-8']['sequences'], 2)
+        en_us = self.compose('en_US.UTF-8')
+        self.write('en_US.UTF-8', EN_US + '<Multi_key> <e> <e> : "ə"\n')
+        os.utime(en_us, ns=(0, os.stat(en_us).st_mtime_ns + 10**9))
+        self.assertEqual(self.inventory(cache)['ja_JP.UTF-8']['sequences'], 3)
+
+
+class TestLocaleMatrix(LocaleDirTestCase):
+
+    def statuses(self):
+        custom = os.path.join(self.tmp.name, 'XCompose')
+        with open(custom, 'w', encoding='utf-8') as f:
+            f.write('<Multi_key> <a> <b> : "x"\n'
+                    '<Multi_key> <a> <c> : "y"\n'
+                    '<Multi_key> <o> : "o"\n'
+                    '<Multi_key> <q> <q> : "Q"\n')
+        ours, _, per_locale = build_locale_matrix(custom, jobs=1, locale_dir=self.locale_dir)
+        statuses = {}
+        for locale, (found, error) in per_locale.items():
+            self.assertIsNone(error)
+            statuses[locale] = {' '.join(ours[i][0]): status for i, (status, _) in found.items()}
+        return statuses
+
+    def test_included_locale_matches_its_include(self):
+        statuses = self.statuses()
+        self.assertEqual(statuses['en_US.UTF-8'], {'a b': 'redundant', 'a c': 'redundant'})
+        self.assertEqual(statuses['ja_JP.UTF-8'], statuses['en_US.UTF-8'])
+        self.assertEqual(statuses['C'], {})
+
+    def test_locale_definitions_override_the_include(self):
+        self.assertEqual(self.statuses()['fi_FI.UTF-8'],
+                         {'a b': 'redundant', 'a c': 'override', 'o': 'shadowed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
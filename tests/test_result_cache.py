@@ -0,0 +1,101 @@
+"""Tests for ResultCache: replaying a run's stdout, stderr and exit code."""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+import xcompose_lib  # noqa: E402
+from xcompose_lib import ResultCache  # noqa: E402
+
+
+class TtyStream(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.input = Path(self.tmp.name) / 'XCompose'
+        self.input.write_text('<Multi_key> <a> <b> : "x"\n', encoding='utf-8')
+        self.cache = ResultCache('tool', __file__, cache_dir=Path(self.tmp.name) / 'cache')
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        print('report')
+        print('Warning: something', file=sys.stderr)
+        print('summary')
+        return 4, []
+
+    def run_tool(self, stdout=None, stderr=None):
+        stdout = stdout if stdout is not None else io.StringIO()
+        stderr = stderr if stderr is not None else io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = self.cache.run({'option': 1}, [str(self.input)], self.compute)
+        return exit_code, stdout.getvalue(), stderr.getvalue()
+
+    def test_hit_replays_stdout_stderr_and_exit_code(self):
+        first = self.run_tool()
+        second = self.run_tool()
+        self.assertEqual(first, (4, 'report\nsummary\n', 'Warning: something\n'))
+        self.assertEqual(second, first)
+        self.assertEqual(self.calls, 1)
+
+    def test_replay_keeps_interleaving(self):
+        self.run_tool()
+        merged = io.StringIO()
+        self.run_tool(merged, merged)
+        self.assertEqual(merged.getvalue(), 'report\nWarning: something\nsummary\n')
+
+    def test_input_change_is_a_miss(self):
+        self.run_tool()
+        self.input.write_text('<Multi_key> <a> <c> : "y"\n', encoding='utf-8')
+        self.run_tool()
+        self.assertEqual(self.calls, 2)
+
+    def test_tool_change_is_a_miss(self):
+        tool = Path(self.tmp.name) / 'tool.py'
+        tool.write_text('VERSION = 1\n', encoding='utf-8')
+        self.cache.tool_file = str(tool)
+        self.run_tool()
+        tool.write_text('VERSION = 2\n', encoding='utf-8')
+        self.run_tool()
+        self.assertEqual(self.calls, 2)
+
+    def test_data_table_change_is_a_miss(self):
+        data = Path(self.tmp.name) / 'data'
+        data.mkdir()
+        (data / 'blocks.tsv').write_text('0370\t03FF\tGreek\n', encoding='utf-8')
+        with mock.patch.object(xcompose_lib, 'DATA_DIR', data):
+            self.run_tool()
+            self.run_tool()
+            self.assertEqual(self.calls, 1)
+            (data / 'blocks.tsv').write_text('0370\t03FF\tGreek and Coptic\n', encoding='utf-8')
+            self.run_tool()
+        self.assertEqual(self.calls, 2)
+
+    def test_isatty_reports_the_real_stream(self):
+        seen = []
+
+        def compute():
+            seen.append((sys.stdout.isatty(), sys.stderr.isatty()))
+            return 0, []
+
+        with contextlib.redirect_stdout(TtyStream()), contextlib.redirect_stderr(io.StringIO()):
+            self.cache.run({}, [str(self.input)], compute)
+        self.assertEqual(seen, [(True, False)])
+
+
+if __name__ == '__main__':
+    unittest.main()
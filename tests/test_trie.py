@@ -0,0 +1,172 @@
+"""Tests for ComposeTrie: shadowing, prefix queries, conflicts and removal."""
+
+import os
+import random
+import sys
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from xcompose_lib import ComposeTrie  # noqa: E402
+
+
+def build(*sequences):
+    trie = ComposeTrie()
+    for keys in sequences:
+        trie.insert(keys.split(), keys)
+    return trie
+
+
+def brute_force_shadowing(sequences):
+    return sorted((short, long) for short in sequences for long in sequences
+                  if len(short.split()) < len(long.split())
+                  and long.split()[:len(short.split())] == short.split())
+
+
+class TestShadowing(unittest.TestCase):
+
+    def test_prefix_shadows_longer_sequence(self):
+        trie = build('a b', 'a b c', 'a b c d', 'a x')
+        found = sorted((short, long) for _, short, _, long in trie.find_shadowing())
+        self.assertEqual(found, [('a b', 'a b c'), ('a b', 'a b c d'), ('a b c', 'a b c d')])
+
+    def test_shared_prefix_is_not_shadowing(self):
+        # <a> <b> and <a> <c> share a node, but neither is a complete prefix
+        trie = build('a b', 'a c', 'a c d e')
+        found = [(short, long) for _, short, _, long in trie.find_shadowing()]
+        self.assertEqual(found, [('a c', 'a c d e')])
+
+    def test_keys_are_whole_keysyms(self):
+        # <a> <b> is not a prefix of <a> <bb>
+        trie = build('a b', 'a bb')
+        self.assertEqual(list(trie.find_shadowing()), [])
+
+    def test_duplicates_each_shadow(self):
+        trie = ComposeTrie()
+        trie.insert(('a',), 1)
+        trie.insert(('a',), 2)
+        trie.insert(('a', 'b'), 3)
+        found = sorted((short, long) for _, short, _, long in trie.find_shadowing())
+        self.assertEqual(found, [(1, 3), (2, 3)])
+
+    def test_matches_pairwise_check(self):
+        rng = random.Random(5)
+        sequences = list({' '.join(rng.choice('abc') for _ in range(rng.randint(1, 4)))
+                          for _ in range(60)})
+        trie = build(*sequences)
+        found = sorted((short, long) for _, short, _, long in trie.find_shadowing())
+        self.assertEqual(found, brute_force_shadowing(sequences))
+
+
+class TestQueries(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = build('Multi_key a b', 'Multi_key a c', 'Multi_key a c d', 'Multi_key x')
+
+    def test_contains_and_get(self):
+        self.assertIn(('Multi_key', 'a', 'b'), self.trie)
+        self.assertNotIn(('Multi_key', 'a'), self.trie)  # Only an inner node
+        self.assertEqual(self.trie.get(('Multi_key', 'x')), ['Multi_key x'])
+        self.assertEqual(self.trie.get(('Multi_key', 'zz')), [])
+
+    def test_prefix_counts(self):
+        self.assertEqual(len(self.trie), 4)
+        self.assertTrue(self.trie.has_prefix(('Multi_key', 'a')))
+        self.assertFalse(self.trie.has_prefix(('Multi_key', 'b')))
+        self.assertEqual(self.trie.count_with_prefix(('Multi_key', 'a')), 3)
+        self.assertEqual(self.trie.count_with_prefix(()), 4)
+
+    def test_with_prefix(self):
+        found = sorted(value for _, value in self.trie.with_prefix(('Multi_key', 'a', 'c')))
+        self.assertEqual(found, ['Multi_key a c', 'Multi_key a c d'])
+
+    def test_children_and_branching(self):
+        self.assertEqual(self.trie.children(('Multi_key',)), ['a', 'x'])
+        self.assertEqual(self.trie.children(('Multi_key', 'a', 'b')), [])
+        factors = self.trie.branching_factors()
+        self.assertEqual(factors[('Multi_key',)], 2)
+        self.assertEqual(factors[('Multi_key', 'a')], 2)
+        self.assertNotIn(('Multi_key', 'x'), factors)
+
+
+class TestConflicts(unittest.TestCase):
+
+    def setUp(self):
+        self.trie = build('a b', 'a c d', 'e')
+
+    def conflicts(self, keys):
+        return sorted(value for _, value in self.trie.conflicts(keys.split()))
+
+    def test_free_slot(self):
+        self.assertEqual(self.conflicts('a x'), [])
+        self.assertEqual(self.conflicts('f g'), [])
+
+    def test_shadowed_by_existing_prefix(self):
+        self.assertEqual(self.conflicts('a b c'), ['a b'])
+        self.assertEqual(self.conflicts('e f'), ['e'])
+
+    def test_would_shadow_existing(self):
+        self.assertEqual(self.conflicts('a'), ['a b', 'a c d'])
+        self.assertEqual(self.conflicts('a c'), ['a c d'])
+
+    def test_duplicate(self):
+        self.assertEqual(self.conflicts('a b'), ['a b'])
+
+
+class TestRemove(unittest.TestCase):
+
+    def test_remove_prunes_empty_nodes(self):
+        trie = build('a b c', 'a d')
+        trie.remove(('a', 'b', 'c'), 'a b c')
+        self.assertEqual(len(trie), 1)
+        self.assertEqual(trie.children(('a',)), ['d'])
+        self.assertFalse(trie.has_prefix(('a', 'b')))
+
+    def test_remove_keeps_nodes_still_in_use(self):
+        trie = build('a b', 'a b c')
+        trie.remove(('a', 'b'), 'a b')
+        self.assertNotIn(('a', 'b'), trie)
+        self.assertIn(('a', 'b', 'c'), trie)
+        self.assertEqual(list(trie.find_shadowing()), [])
+
+    def test_remove_one_of_duplicates(self):
+        trie = ComposeTrie()
+        trie.insert(('a',), 1)
+        trie.insert(('a',), 2)
+        trie.remove(('a',), 1)
+        self.assertEqual(trie.get(('a',)), [2])
+        self.assertEqual(trie.count_with_prefix(('a',)), 1)
+
+    def test_remove_missing_raises(self):
+        trie = build('a b')
+        with self.assertRaises(KeyError):
+            trie.remove(('a', 'c'), 'a c')
+        with self.assertRaises(KeyError):
+            trie.remove(('a', 'b'), 'other value')
+        with self.assertRaises(KeyError):
+            trie.remove(('a',), None)  # Inner node, no entry
+        self.assertEqual(len(trie), 1)
+
+    def test_insert_remove_matches_rebuild(self):
+        rng = random.Random(11)
+        live = []
+        trie = ComposeTrie()
+        for _ in range(500):
+            if live and rng.random() < 0.4:
+                keys = live.pop(rng.randrange(len(live)))
+                trie.remove(keys.split(), keys)
+            else:
+                keys = ' '.join(rng.choice('abc') for _ in range(rng.randint(1, 4)))
+                live.append(keys)
+                trie.insert(keys.split(), keys)
+            self.assertEqual(len(trie), len(live))
+        found = sorted((short, long) for _, short, _, long in trie.find_shadowing())
+        rebuilt = sorted((short, long) for _, short, _, long in build(*live).find_shadowing())
+        self.assertEqual(found, rebuilt)
+        self.assertEqual(trie.branching_factors(), build(*live).branching_factors())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+"""Tests for TypoIndex, the one-slip neighbor index over key sequences."""
+
+import os
+import random
+import sys
+import unittest
+from pathlib import Path
+
+os.environ['XCOMPOSE_STEM_CACHE_DIR'] = ''  # Never touch the user's cache
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'tools'))
+
+from xcompose_lib import TypoIndex  # noqa: E402
+
+
+def slip(a, b):
+    """The slip turning a into b by pairwise comparison, or None."""
+    if len(a) == len(b):
+        diff = [i for i in range(len(a)) if a[i] != b[i]]
+        if len(diff) == 1:
+            return 'substitution'
+        if len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]:
+            return 'transposition'
+        return None
+    if len(b) == len(a) + 1 and any(b[:i] + b[i + 1:] == a for i in range(len(b))):
+        return 'insertion'
+    if len(a) == len(b) + 1 and any(a[:i] + a[i + 1:] == b for i in range(len(a))):
+        return 'deletion'
+    return None
+
+
+def build(*sequences):
+    index = TypoIndex()
+    for keys in sequences:
+        index.add(tuple(keys.split()), keys)
+    return index
+
+
+class TestNeighbors(unittest.TestCase):
+
+    def setUp(self):
+        self.index = build('g a', 'g b', 'a g', 'g a a', 'g', 'h b c')
+
+    def neighbors(self, keys):
+        return sorted((kind, value) for kind, _, value in self.index.neighbors(tuple(keys.split())))
+
+    def test_each_kind(self):
+        self.assertEqual(self.neighbors('g a'), [
+            ('deletion', 'g'),
+            ('insertion', 'g a a'),
+            ('substitution', 'g b'),
+            ('transposition', 'a g'),
+        ])
+
+    def test_whole_keysyms_are_compared(self):
+        index = build('g alpha', 'g alphb')
+        self.assertEqual([value for _, _, value in index.neighbors(('g', 'alpha'))], ['g alphb'])
+        index = build('g alpha', 'g alpha beta')
+        self.assertEqual([kind for kind, _, _ in index.neighbors(('g', 'alpha'))], ['insertion'])
+
+    def test_doubled_keys(self):
+        # Deleting either "a" of "g a a" gives "g a": reported once
+        self.assertEqual(self.neighbors('g a a'), [('deletion', 'g a')])
+
+    def test_query_not_in_index(self):
+        self.assertEqual(self.neighbors('h b'), [('insertion', 'h b c'), ('substitution', 'g b')])
+
+    def test_no_neighbors(self):
+        self.assertEqual(self.neighbors('x y z'), [])
+
+    def test_duplicates_are_all_reported(self):
+        index = TypoIndex()
+        index.add(('a', 'b'), 1)
+        index.add(('a', 'b'), 2)
+        index.add(('a', 'c'), 3)
+        self.assertEqual(sorted(value for _, _, value in index.neighbors(('a', 'c'))), [1, 2])
+        self.assertEqual(len(index), 3)
+
+
+class TestPairs(unittest.TestCase):
+
+    def test_each_pair_once_shorter_first(self):
+        index = build('g a', 'g a a', 'a g')
+        pairs = sorted((kind, keys, other) for kind, _, keys, _, other in index.pairs())
+        self.assertEqual(pairs, [('insertion', 'g a', 'g a a'), ('transposition', 'g a', 'a g')])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        sequences = list({tuple(rng.choice('abcd') for _ in range(rng.randint(1, 4)))
+                          for _ in range(150)})
+        index = TypoIndex()
+        for keys in sequences:
+            index.add(keys, keys)
+
+        for keys in sequences:
+            expected = sorted((slip(keys, other), other) for other in sequences
+                              if other != keys and slip(keys, other))
+            found = sorted((kind, other) for kind, other, _ in index.neighbors(keys))
+            self.assertEqual(found, expected, keys)
+
+        expected_pairs = {frozenset((a, b)) for a in sequences for b in sequences if a != b and slip(a, b)}
+        found_pairs = [frozenset((keys, other)) for _, keys, _, other, _ in index.pairs()]
+        self.assertEqual(len(found_pairs), len(set(found_pairs)))
+        self.assertEqual(set(found_pairs), expected_pairs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,8 +5,11 @@ XCompose-STEM: Design Audit Tool
 Analyzes XCompose file for:
 1. ASCII shortcut + mnemonic coverage (dual access principle)
 2. Symmetry (left/right, up/down, variants)
-3. Family completeness (if A exists, should B exist?)
+3. Family completeness (if A exists, should B exist?), with families
+   derived from Unicode character names
 4. Design consistency
+5. Symbol usage in a text corpus (--corpus): expected keystrokes per
+   symbol typed, and frequent symbols that only have long sequences
 
 Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
 
@@ -14,22 +17,195 @@ Copyright (c) 2025 Phil Bowens
 Repository: https://github.com/phil-bowens/xcompose-stem
 License: MIT
 
-Usage: ./audit_xcompose_design.py XCompose [--verbose] [--json]
+Usage: ./audit_xcompose_design.py XCompose [--verbose] [--json | --format jsonl|sarif] [--pairs-file FILE]
+       ./audit_xcompose_design.py XCompose --corpus DIR [--corpus DIR ...] [-j N]
 """
 
+import argparse
+import hashlib
+import inspect
+import os
+import re
 import sys
 import json
-from collections import defaultdict
-from typing import List, Set, Dict, Optional, Tuple
-
-from xcompose_lib import XComposeSequence, parse_xcompose
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Set, Dict, Optional, Tuple
+
+from xcompose_lib import (REPORT_FORMATS, TYPO_KINDS, ComposeTrie, Finding, ParseCache, ResultCache,
+                          SequenceTable, TypoIndex, XComposeSequence, format_result_cache_stats,
+                          open_emitter, parallel_imap, parse_xcompose)
+
+
+# Word pairs whose keysyms or comments should come in both forms
+# (replace with --pairs-file)
+SYMMETRY_PAIRS = [
+    ('left', 'right'),
+    ('up', 'down'),
+    ('less', 'greater'),
+    ('open', 'close'),
+    ('start', 'end'),
+    ('top', 'bottom'),
+    ('upper', 'lower'),
+    ('black', 'white'),
+    ('forward', 'backward'),
+    ('clockwise', 'counterclockwise'),
+]
+
+
+def load_symmetry_pairs(path: str) -> List[Tuple[str, str]]:
+    """Read a --pairs-file: one "word other-word" pair per line, # comments.
+
+    Raises:
+        ValueError: If a line does not hold exactly two words
+    """
+    pairs = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            words = line.split('#', 1)[0].split()
+            if not words:
+                continue
+            if len(words) != 2:
+                raise ValueError(f'{path}:{line_num}: expected two words, found {len(words)}')
+            pairs.append((words[0].lower(), words[1].lower()))
+    return pairs
+
+
+# Unicode blocks whose characters are grouped into families
+BLOCKS_PATH = Path(__file__).resolve().parent / 'data' / 'blocks.tsv'
+
+# Name words that vary within a family. Varying one of them gives the
+# character's counterparts: RIGHTWARDS DOUBLE ARROW is in the family
+# "[direction] double arrow" with LEFTWARDS, UPWARDS, DOWNWARDS, LEFT RIGHT
+# and UP DOWN DOUBLE ARROW. Two-word phrases are matched first.
+NAME_AXES = {
+    'direction': ('LEFT RIGHT', 'UP DOWN', 'LEFTWARDS', 'RIGHTWARDS', 'UPWARDS', 'DOWNWARDS',
+                  'LEFT', 'RIGHT', 'UP', 'DOWN'),
+    'diagonal': ('NORTH EAST', 'NORTH WEST', 'SOUTH EAST', 'SOUTH WEST'),
+    'order': ('LESS-THAN', 'GREATER-THAN'),
+    'inclusion': ('SUBSET', 'SUPERSET'),
+    'precedence': ('PRECEDES', 'SUCCEEDS'),
+    'logic': ('LOGICAL AND', 'LOGICAL OR', 'INTERSECTION', 'UNION'),
+    'fill': ('BLACK', 'WHITE'),
+    'script': ('SUPERSCRIPT', 'SUBSCRIPT'),
+}
+_AXIS_PHRASES = {tuple(phrase.split()): axis for axis, phrases in NAME_AXES.items()
+                 for phrase in phrases}
+
+# Negation words: NOT AN ELEMENT OF and ELEMENT OF form the family
+# "[not] element of" (DOES NOT CONTAIN pairs with CONTAINS)
+NEGATIONS = ('NOT AN', 'NOT A', 'NOT', 'NEITHER')
+_NEGATION_PHRASES = {tuple(phrase.split()) for phrase in NEGATIONS}
+
+
+def family_names(name: str) -> List[str]:
+    """Names of the families a character belongs to, from its Unicode name."""
+    words = name.split()
+    tokens = []  # Words, or (axis, phrase) for words that vary
+    plain = []  # The name with any negation removed
+    i = 0
+    while i < len(words):
+        if words[i:i + 2] == ['DOES', 'NOT'] and i + 2 < len(words):
+            tokens.extend(words[i:i + 3])
+            plain.append(words[i + 2] + 'S')
+            i += 3
+            continue
+        for length in (2, 1):
+            phrase = tuple(words[i:i + length])
+            if len(phrase) < length:
+                continue
+            if phrase in _AXIS_PHRASES:
+                tokens.append((_AXIS_PHRASES[phrase], ' '.join(phrase)))
+                plain.append(' '.join(phrase))
+                i += length
+                break
+            if phrase in _NEGATION_PHRASES:
+                tokens.append(' '.join(phrase))
+                i += length
+                break
+        else:
+            tokens.append(words[i])
+            plain.append(words[i])
+            i += 1
+
+    names = ['[not] ' + ' '.join(plain).lower()]
+    for position, token in enumerate(tokens):
+        if isinstance(token, tuple):
+            names.append(' '.join(
+                f'[{other[0]}]' if index == position else
+                other[1].lower() if isinstance(other, tuple) else other.lower()
+                for index, other in enumerate(tokens)))
+    return names
+
+
+def build_family_index(blocks_path: Path = BLOCKS_PATH) -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """Group every named character of the listed blocks into families.
+
+    Returns:
+        (families, member_of): family name -> its characters in codepoint
+        order (families of two or more only), and character -> names of
+        its families
+    """
+    families: Dict[str, List[str]] = defaultdict(list)
+    with open(blocks_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or not line.strip():
+                continue
+            start, end = line.split('\t')[:2]
+            for codepoint in range(int(start, 16), int(end, 16) + 1):
+                char = chr(codepoint)
+                name = unicodedata.name(char, None)
+                if name:
+                    for family in family_names(name):
+                        families[family].append(char)
+
+    families = {family: ''.join(chars) for family, chars in families.items() if len(chars) > 1}
+    member_of: Dict[str, List[str]] = defaultdict(list)
+    for family, chars in families.items():
+        for char in chars:
+            member_of[char].append(family)
+    return families, dict(member_of)
+
+
+_FAMILY_INDEX: Optional[Tuple[Dict[str, str], Dict[str, List[str]]]] = None
+
+
+def load_family_index() -> Tuple[Dict[str, str], Dict[str, List[str]]]:
+    """build_family_index(), cached on disk by Unicode version, block list, axes
+    and the source of the functions that derive the families."""
+    global _FAMILY_INDEX
+    if _FAMILY_INDEX is not None:
+        return _FAMILY_INDEX
+    try:
+        blocks = BLOCKS_PATH.read_bytes()
+    except OSError as e:
+        print(f"Warning: Cannot read {BLOCKS_PATH} ({e}); skipping family audit", file=sys.stderr)
+        _FAMILY_INDEX = ({}, {})
+        return _FAMILY_INDEX
+
+    digest = hashlib.blake2b(blocks, digest_size=16)
+    digest.update(repr((unicodedata.unidata_version, NAME_AXES, NEGATIONS)).encode('utf-8'))
+    # The derivation itself: editing how families are formed invalidates the cache too
+    for function in (family_names, build_family_index):
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    cache = ParseCache()
+    index = cache.get_content('families', digest.hexdigest())
+    if index is None:
+        index = build_family_index()
+        cache.put_content('families', digest.hexdigest(), index)
+    _FAMILY_INDEX = tuple(index)
+    return _FAMILY_INDEX
 
 
 class DesignAuditor:
     """Audit XCompose design for coverage, symmetry, and completeness"""
 
-    def __init__(self, sequences: List[XComposeSequence]):
+    def __init__(self, sequences: List[XComposeSequence],
+                 symmetry_pairs: Optional[List[Tuple[str, str]]] = None):
         self.sequences = sequences
+        self.symmetry_pairs = SYMMETRY_PAIRS if symmetry_pairs is None else symmetry_pairs
         self.symbol_to_seqs: Dict[str, List[XComposeSequence]] = defaultdict(list)
 
         # Build symbol mapping
@@ -66,44 +242,18 @@ class DesignAuditor:
     def audit_symmetry(self) -> Dict[str, List[Tuple[str, str, str]]]:
         """Check for symmetry patterns (left/right, up/down, etc.)"""
         issues = []
+        existing = {s.keys for s in self.sequences}
+        containing = self._sequences_containing({word1 for word1, _ in self.symmetry_pairs})
 
-        # Define symmetry pairs to check
-        symmetry_pairs = [
-            ('left', 'right'),
-            ('up', 'down'),
-            ('less', 'greater'),
-            ('open', 'close'),
-            ('start', 'end'),
-            ('top', 'bottom'),
-            ('upper', 'lower'),
-            ('black', 'white'),
-            ('forward', 'backward'),
-            ('clockwise', 'counterclockwise'),
-        ]
-
-        for word1, word2 in symmetry_pairs:
-            # Find sequences containing word1
-            seqs_with_word1 = [
-                s for s in self.sequences
-                if any(word1 in k.lower() for k in s.keys) or
-                   (s.comment and word1 in s.comment.lower())
-            ]
-
-            for seq1 in seqs_with_word1:
+        for word1, word2 in self.symmetry_pairs:
+            for seq1 in containing.get(word1, ()):
                 # Try to construct symmetric key sequence
-                symmetric_keys = []
-                for key in seq1.keys:
-                    if word1 in key.lower():
-                        symmetric_keys.append(key.replace(word1, word2))
-                    else:
-                        symmetric_keys.append(key)
-
-                # Check if symmetric sequence exists
-                symmetric_exists = any(
-                    s.keys == symmetric_keys for s in self.sequences
+                symmetric_keys = tuple(
+                    key.replace(word1, word2) if word1 in key.lower() else key
+                    for key in seq1.keys
                 )
 
-                if not symmetric_exists:
+                if symmetric_keys not in existing:
                     issues.append((
                         seq1.symbol,
                         seq1.key_string,
@@ -111,83 +261,61 @@ class DesignAuditor:
                         f"Has {word1}, missing {word2}?"
                     ))
 
-        # Also check for symbol patterns in comments
-        comment_pairs = [
-            ('left', 'right'),
-            ('up', 'down'),
-            ('forward', 'backward'),
-        ]
-
-        for word1, word2 in comment_pairs:
-            symbols_with_word1 = {}
-            for seq in self.sequences:
-                if seq.comment and word1 in seq.comment.lower():
-                    symbols_with_word1[seq.symbol] = seq
-
-            for symbol, seq in symbols_with_word1.items():
-                # Look for symmetric comment
-                symmetric_comment_exists = any(
-                    s.comment and word2 in s.comment.lower() and
-                    s.category == seq.category
-                    for s in self.sequences
-                )
-
-                if not symmetric_comment_exists:
-                    # Check if it's intentional (some symbols don't have pairs)
-                    pass  # Don't report everything, too noisy
-
         return {'symmetry_issues': issues}
 
+    def _sequences_containing(self, words: Set[str]) -> Dict[str, List[XComposeSequence]]:
+        """Map each word to the sequences (in file order) whose keys or comment
+        contain it, case-insensitively, as a substring.
+
+        Builds a token index in one pass: each distinct key name and comment
+        word is looked up once, by checking its substrings (no longer than
+        the longest word) against the word set, so adding words to the
+        vocabulary does not add passes over the file.
+        """
+        longest = max(map(len, words), default=0)
+        token_words: Dict[str, Tuple[str, ...]] = {}
+
+        def words_in(token: str) -> Tuple[str, ...]:
+            found = token_words.get(token)
+            if found is None:
+                text = token.lower()
+                substrings = {text[i:j] for i in range(len(text))
+                              for j in range(i + 1, min(i + longest, len(text)) + 1)}
+                found = token_words[token] = tuple(substrings & words)
+            return found
+
+        containing: Dict[str, List[XComposeSequence]] = defaultdict(list)
+        for seq in self.sequences:
+            found = set()
+            for key in seq.keys:
+                found.update(words_in(key))
+            if seq.comment:
+                for token in seq.comment.lower().split():
+                    found.update(words_in(token))
+            for word in found:
+                containing[word].append(seq)
+        return containing
+
     def audit_family_completeness(self) -> Dict[str, List[Dict]]:
-        """Check for completeness within symbol families"""
+        """Check for completeness within symbol families (see load_family_index)"""
         issues = []
-
-        # Define families to check
-        families = {
-            'arrows': {
-                'symbols': ['→', '←', '↑', '↓', '↔', '↕'],
-                'names': ['right', 'left', 'up', 'down', 'left-right', 'up-down']
-            },
-            'double_arrows': {
-                'symbols': ['⇒', '⇐', '⇑', '⇓', '⇔'],
-                'names': ['implies', 'implied', 'up double', 'down double', 'iff']
-            },
-            'long_arrows': {
-                'symbols': ['⟶', '⟵', '⟷'],
-                'names': ['long right', 'long left', 'long left-right']
-            },
-            'inequalities': {
-                'symbols': ['<', '>', '≤', '≥', '≪', '≫', '≠'],
-                'names': ['less', 'greater', 'leq', 'geq', 'much less', 'much greater', 'not equal']
-            },
-            'set_relations': {
-                'symbols': ['∈', '∉', '∋', '∌', '⊂', '⊃', '⊆', '⊇'],
-                'names': ['in', 'not in', 'contains', 'not contains',
-                          'subset', 'superset', 'subset-eq', 'superset-eq']
-            },
-            'logical': {
-                'symbols': ['∧', '∨', '¬', '∀', '∃'],
-                'names': ['and', 'or', 'not', 'forall', 'exists']
-            },
-            'turnstiles': {
-                'symbols': ['⊢', '⊣', '⊨', '⊭'],
-                'names': ['proves', 'reverse proves', 'models', 'not models']
-            },
-        }
+        families, member_of = load_family_index()
 
         existing_symbols = {seq.symbol for seq in self.sequences}
+        touched = {family for symbol in existing_symbols for family in member_of.get(symbol, ())}
 
-        for family_name, family_data in families.items():
-            expected = set(family_data['symbols'])
-            actual = expected & existing_symbols
-            missing = expected - actual
+        # Report in codepoint order of each family's first member
+        for family_name in sorted(touched, key=lambda name: (families[name][0], name)):
+            expected = families[family_name]
+            actual = [symbol for symbol in expected if symbol in existing_symbols]
+            missing = [symbol for symbol in expected if symbol not in existing_symbols]
 
             if missing:
                 issues.append({
                     'family': family_name,
                     'expected': list(expected),
-                    'actual': list(actual),
-                    'missing': list(missing),
+                    'actual': actual,
+                    'missing': missing,
                     'coverage': f"{len(actual)}/{len(expected)}"
                 })
 
@@ -208,28 +336,25 @@ class DesignAuditor:
 def audit_usage_patterns(sequences: List[XComposeSequence]) -> Dict[str, any]:
     """Analyze real-world usage patterns and potential issues"""
 
+    table = SequenceTable.from_sequences(sequences)
+
     # Ergonomics: sequence length distribution
-    length_dist = {}
-    for length in range(2, 11):
-        seqs = [s for s in sequences if len(s.keys) == length]
-        length_dist[length] = len(seqs)
+    histogram = table.length_histogram()
+    length_dist = {length: histogram.get(length, 0) for length in range(2, 11)}
 
     # Very long sequences (>=6 keys)
-    long_sequences = sorted([s for s in sequences if len(s.keys) >= 6],
+    long_indices = table.indices_where_length(min_length=6)
+    long_sequences = sorted([sequences[i] for i in long_indices],
                            key=lambda x: len(x.keys), reverse=True)
 
-    # Confusability: prefix clustering
-    prefix_clusters = {}
+    # Confusability: prefix clustering (sequences sharing their first 2 keys)
+    trie = ComposeTrie()
     for seq in sequences:
-        if len(seq.keys) >= 2:
-            prefix = tuple(seq.keys[:2])
-            if prefix not in prefix_clusters:
-                prefix_clusters[prefix] = []
-            prefix_clusters[prefix].append(seq)
+        trie.insert(seq.keys, seq)
 
     # High confusability prefixes (>5 sequences)
-    confusing_prefixes = [(p, len(seqs)) for p, seqs in prefix_clusters.items()
-                          if len(seqs) > 5]
+    confusing_prefixes = [(prefix, node.count) for prefix, node in trie.nodes(depth=2)
+                          if node.count > 5]
     confusing_prefixes.sort(key=lambda x: x[1], reverse=True)
 
     # Repeated key patterns (typo-prone)
@@ -241,16 +366,20 @@ def audit_usage_patterns(sequences: List[XComposeSequence]) -> Dict[str, any]:
                     repeated_key_seqs.append(seq)
                     break
 
-    # Shift key burden
-    shift_keys = {'asciicircum', 'quotedbl', 'exclam', 'asterisk', 'parenleft',
-                  'parenright', 'plus', 'colon', 'less', 'greater', 'underscore'}
-
-    heavy_shift = []
+    # Typo neighbors: pairs one slipped key apart (substituted, swapped,
+    # extra or missing) that type different symbols. Two-key sequences
+    # differing in one key are the prefix scheme itself (g a → α, g b → β),
+    # so those substitutions are not reported
+    typos = TypoIndex()
     for seq in sequences:
-        shift_count = sum(1 for k in seq.keys
-                         if k in shift_keys or (len(k) == 1 and k.isupper()))
-        if shift_count >= 3 and len(seq.keys) <= 4:
-            heavy_shift.append((seq, shift_count))
+        typos.add(seq.keys, seq)
+    typo_neighbors = [(kind, seq, other) for kind, _, seq, _, other in typos.pairs()
+                      if seq.symbol != other.symbol
+                      and not (kind == 'substitution' and len(seq.keys) == 2)]
+
+    # Shift key burden
+    heavy_shift = [(sequences[i], table.shift_counts[i])
+                   for i in table.shift_burden(min_shifts=3, max_length=4)]
     heavy_shift.sort(key=lambda x: x[1], reverse=True)
 
     # Common math symbols accessibility
@@ -269,16 +398,46 @@ def audit_usage_patterns(sequences: List[XComposeSequence]) -> Dict[str, any]:
     return {
         'length_dist': length_dist,
         'long_sequences': long_sequences[:10],
+        'very_long_count': len(long_indices),
         'confusing_prefixes': confusing_prefixes[:10],
         'repeated_key_seqs': repeated_key_seqs,
+        'typo_neighbors': typo_neighbors,
         'heavy_shift': heavy_shift[:10],
         'math_access': math_access
     }
 
 
-def generate_report(sequences: List[XComposeSequence], verbose: bool = False):
+def summary_counts(auditor: DesignAuditor, dual: Dict[str, List], symmetry_issues: List,
+                   family_issues: List[Dict], usage: Dict[str, any]) -> Dict[str, int]:
+    """Headline counts from audit results that are already computed"""
+    return {
+        'unique symbols': len(auditor.symbol_to_seqs),
+        'dual access': len(dual['both']),
+        'ASCII only': len(dual['ascii_only']),
+        'mnemonic only': len(dual['mnemonic_only']),
+        'symmetry issues': len(symmetry_issues),
+        'incomplete families': len(family_issues),
+        'very long sequences': usage['very_long_count'],
+        'typo-prone sequences': len(usage['repeated_key_seqs']),
+        'typo neighbors': len(usage['typo_neighbors']),
+        'heavy shift burden': len(usage['heavy_shift']),
+    }
+
+
+def audit_summary(sequences: List[XComposeSequence],
+                  symmetry_pairs: Optional[List[Tuple[str, str]]] = None) -> Dict[str, int]:
+    """Headline audit counts (used by the watch daemon to report changes)"""
+    auditor = DesignAuditor(sequences, symmetry_pairs)
+    return summary_counts(auditor, auditor.audit_dual_access(),
+                          auditor.audit_symmetry()['symmetry_issues'],
+                          auditor.audit_family_completeness()['family_issues'],
+                          audit_usage_patterns(sequences))
+
+
+def generate_report(sequences: List[XComposeSequence], verbose: bool = False,
+                    symmetry_pairs: Optional[List[Tuple[str, str]]] = None):
     """Generate human-readable audit report"""
-    auditor = DesignAuditor(sequences)
+    auditor = DesignAuditor(sequences, symmetry_pairs)
 
     print("=" * 70)
     print("XCompose Design & Usage Quality Report")
@@ -352,10 +511,11 @@ def generate_report(sequences: List[XComposeSequence], verbose: bool = False):
     print("=" * 70)
 
     prefix_info = auditor.audit_prefix_consistency()
+    prefix_category_counts = Counter((s.keys[0], s.category) for s in sequences if s.keys)
     for prefix, categories in sorted(prefix_info['prefix_categories'].items()):
         print(f"\n<{prefix}> prefix used in:")
         for cat in sorted(categories):
-            count = len([s for s in sequences if s.keys and s.keys[0] == prefix and s.category == cat])
+            count = prefix_category_counts[(prefix, cat)]
             print(f"  - {cat:40} ({count} sequences)")
 
     # Usage Patterns Audit
@@ -392,6 +552,16 @@ def generate_report(sequences: List[XComposeSequence], verbose: bool = False):
             for seq in usage['repeated_key_seqs'][:10]:
                 print(f"  {seq.key_string[:40]:40} → {seq.symbol}")
 
+    if usage['typo_neighbors']:
+        kinds = Counter(kind for kind, _, _ in usage['typo_neighbors'])
+        print(f"\nOne-slip neighbors (a typo types another symbol): "
+              f"{len(usage['typo_neighbors'])} pairs")
+        print("  " + ", ".join(f"{kinds[kind]} {kind}" for kind in TYPO_KINDS if kinds[kind]))
+        if verbose:
+            for kind, seq, other in usage['typo_neighbors'][:10]:
+                print(f"  {seq.key_string:20} → {seq.symbol}  ~  "
+                      f"{other.key_string:20} → {other.symbol}  ({kind})")
+
     if usage['heavy_shift']:
         print(f"\nHeavy shift burden (≥3 shifts in ≤4 keys):")
         for seq, shift_count in usage['heavy_shift'][:5]:
@@ -420,17 +590,19 @@ def generate_report(sequences: List[XComposeSequence], verbose: bool = False):
     print(f"Incomplete families: {len(families['family_issues'])}")
 
     # Usage quality metrics
-    very_long = len([s for s in sequences if len(s.keys) >= 6])
+    very_long = usage['very_long_count']
     print(f"\nUsage Quality:")
     print(f"  Very long sequences (≥6 keys): {very_long}")
     print(f"  Typo-prone patterns: {len(usage['repeated_key_seqs'])}")
+    print(f"  One-slip neighbors: {len(usage['typo_neighbors'])}")
     print(f"  High shift burden: {len(usage['heavy_shift'])}")
     print(f"  Confusing prefixes (>5 variants): {len(usage['confusing_prefixes'])}")
 
 
-def generate_json_report(sequences: List[XComposeSequence]) -> str:
+def generate_json_report(sequences: List[XComposeSequence],
+                         symmetry_pairs: Optional[List[Tuple[str, str]]] = None) -> str:
     """Generate machine-readable JSON report"""
-    auditor = DesignAuditor(sequences)
+    auditor = DesignAuditor(sequences, symmetry_pairs)
 
     dual = auditor.audit_dual_access()
     symmetry = auditor.audit_symmetry()
@@ -473,7 +645,7 @@ def generate_json_report(sequences: List[XComposeSequence]) -> str:
         'prefixes': prefixes,
         'usage_patterns': {
             'length_distribution': usage['length_dist'],
-            'very_long_count': len([s for s in sequences if len(s.keys) >= 6]),
+            'very_long_count': usage['very_long_count'],
             'longest_sequences': [
                 {
                     'keys': s.key_string,
@@ -485,6 +657,17 @@ def generate_json_report(sequences: List[XComposeSequence]) -> str:
             ],
             'confusing_prefixes_count': len(usage['confusing_prefixes']),
             'typo_prone_count': len(usage['repeated_key_seqs']),
+            'typo_neighbor_count': len(usage['typo_neighbors']),
+            'typo_neighbors': [
+                {
+                    'kind': kind,
+                    'keys': seq.key_string,
+                    'symbol': seq.symbol,
+                    'other_keys': other.key_string,
+                    'other_symbol': other.symbol
+                }
+                for kind, seq, other in usage['typo_neighbors']
+            ],
             'heavy_shift_count': len(usage['heavy_shift']),
             'math_symbols_access': usage['math_access']
         }
@@ -493,24 +676,443 @@ def generate_json_report(sequences: List[XComposeSequence]) -> str:
     return json.dumps(report, indent=2, ensure_ascii=False)
 
 
-def main():
-    if len(sys.argv) < 2:
-        print("Usage: audit_xcompose_design.py <XCompose_file> [--verbose] [--json]")
-        sys.exit(1)
+def iter_findings(sequences: List[XComposeSequence], filepath: str,
+                  symmetry_pairs: Optional[List[Tuple[str, str]]] = None,
+                  summary: Optional[Dict[str, int]] = None) -> Iterator[Finding]:
+    """Yield audit findings one at a time (for --format jsonl/sarif).
+
+    Each audit runs only when the consumer reaches it, so the findings of
+    earlier audits are already written while later ones are computed. If
+    summary is given, it is filled with the audit_summary() counts once the
+    last finding has been yielded, without running the audits again.
+    """
+    auditor = DesignAuditor(sequences, symmetry_pairs)
+
+    dual = auditor.audit_dual_access()
+    for rule, label, group in (('ascii_only', 'an ASCII shortcut', dual['ascii_only']),
+                               ('mnemonic_only', 'a mnemonic', dual['mnemonic_only'])):
+        for symbol, seqs in group:
+            seq = seqs[0]
+            yield Finding(rule, f'{symbol} only has {label} ({seq.key_string})', 'note',
+                          filepath, seq.line_num,
+                          {'symbol': symbol, 'keys': seq.key_string, 'comment': seq.comment})
+
+    line_of = {seq.key_string: seq.line_num for seq in reversed(sequences)}
+    symmetry_issues = auditor.audit_symmetry()['symmetry_issues']
+    for symbol, keys, sym_keys, reason in symmetry_issues:
+        yield Finding('symmetry_gap', f'{symbol} {keys}: missing {sym_keys} ({reason})', 'warning',
+                      filepath, line_of.get(keys, 0),
+                      {'symbol': symbol, 'existing_keys': keys, 'missing_keys': sym_keys})
+
+    family_issues = auditor.audit_family_completeness()['family_issues']
+    for issue in family_issues:
+        missing = sorted(issue['missing'])
+        yield Finding('incomplete_family',
+                      f"{issue['family']}: {issue['coverage']} coverage, missing {', '.join(missing)}",
+                      'warning', filepath, 0,
+                      {'family': issue['family'], 'present': sorted(issue['actual']),
+                       'missing': missing})
+
+    table = SequenceTable.from_sequences(sequences)
+    for i in table.indices_where_length(min_length=6):
+        seq = sequences[i]
+        yield Finding('very_long_sequence', f'{len(seq.keys)} keys: {seq.key_string} → {seq.symbol}',
+                      'note', filepath, seq.line_num,
+                      {'keys': seq.key_string, 'length': len(seq.keys), 'symbol': seq.symbol})
+
+    usage = audit_usage_patterns(sequences)
+    for seq in usage['repeated_key_seqs']:
+        yield Finding('typo_prone', f'Repeated key: {seq.key_string} → {seq.symbol}', 'note',
+                      filepath, seq.line_num, {'keys': seq.key_string, 'symbol': seq.symbol})
+
+    for kind, seq, other in usage['typo_neighbors']:
+        yield Finding('typo_neighbor',
+                      f'{seq.key_string} → {seq.symbol} is one {kind} away from '
+                      f'{other.key_string} → {other.symbol} (line {other.line_num})',
+                      'note', filepath, seq.line_num,
+                      {'kind': kind, 'keys': seq.key_string, 'symbol': seq.symbol,
+                       'other_keys': other.key_string, 'other_symbol': other.symbol,
+                       'other_line': other.line_num})
+
+    for i in table.shift_burden(min_shifts=3, max_length=4):
+        seq = sequences[i]
+        shifts = table.shift_counts[i]
+        yield Finding('heavy_shift', f'{shifts} shifts: {seq.key_string} → {seq.symbol}', 'note',
+                      filepath, seq.line_num,
+                      {'keys': seq.key_string, 'shifts': shifts, 'symbol': seq.symbol})
+
+    if summary is not None:
+        summary.update(summary_counts(auditor, dual, symmetry_issues, family_issues, usage))
+
+
+# Corpus frequency audit (--corpus)
+CORPUS_EXTENSIONS = ('.tex', '.md', '.txt')
+CORPUS_CHUNK_BYTES = 8 * 2**20  # Unit of work handed to one worker
+CORPUS_LINE_OVERRUN = 2**16  # Longest read past a chunk edge to reach a line end
+# Symbols with at least this share of all occurrences are flagged when their
+# shortest sequence has this many keys or more (not counting Compose)
+FREQUENT_SHARE = 0.01
+LONG_SEQUENCE_KEYS = 4
+
+
+def iter_corpus_files(paths: List[str]) -> Iterator[str]:
+    """Yield the .tex/.md/.txt files under each path, in a stable order.
+
+    Files named explicitly are used whatever their extension.
+    """
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith(CORPUS_EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def corpus_chunks(files: List[str], chunk_bytes: int = CORPUS_CHUNK_BYTES) -> Iterator[Tuple[str, int, int]]:
+    """Split files into (path, start, end) byte ranges of about chunk_bytes."""
+    for path in files:
+        try:
+            size = os.path.getsize(path)
+        except OSError as e:
+            print(f"Warning: Skipping {path}: {e}", file=sys.stderr)
+            continue
+        for start in range(0, size, chunk_bytes):
+            yield path, start, min(start + chunk_bytes, size)
+
+
+_PATTERNS: Dict[Tuple[bytes, ...], re.Pattern] = {}  # Compiled once per worker
+
+
+def _line_boundary(f: BinaryIO, offset: int) -> int:
+    """Return where the chunk edge at offset really falls in an open file.
+
+    This is the start of the first line beginning at or after offset, but no
+    more than CORPUS_LINE_OVERRUN bytes further on. Both chunks that share
+    an edge compute the same position, so none of the text is skipped or
+    scanned twice.
+    """
+    if not offset:
+        return 0
+    f.seek(offset - 1)
+    f.readline(CORPUS_LINE_OVERRUN)
+    return f.tell()
+
+
+def _count_chunk(job: Tuple[str, int, int, Tuple[bytes, ...]]) -> Tuple[Dict[bytes, int], int, Optional[str]]:
+    """Count the outputs in one byte range of a corpus file (worker process).
+
+    A chunk owns the lines that start inside it, so a symbol is never split
+    between two chunks or counted twice. Only a line longer than
+    CORPUS_LINE_OVERRUN is cut at a chunk edge, which can miss the one
+    symbol that straddles the cut. The corpus is matched as UTF-8 bytes: no
+    decoding, and an encoded output cannot match in the middle of another
+    character.
+
+    Returns:
+        (occurrences per encoded output, bytes scanned, error message or None)
+    """
+    path, start, end, outputs = job
+    pattern = _PATTERNS.get(outputs)
+    if pattern is None:
+        # Longest first, so a multi-character output wins over its prefix
+        pattern = _PATTERNS[outputs] = re.compile(b'|'.join(map(re.escape, outputs)))
+
+    try:
+        with open(path, 'rb') as f:
+            start = _line_boundary(f, start)
+            end = _line_boundary(f, end)
+            if start >= end:
+                return {}, 0, None
+            f.seek(start)
+            data = f.read(end - start)
+    except OSError as e:
+        return {}, 0, f"{path}: {e}"
+    return dict(Counter(pattern.findall(data))), len(data), None
+
+
+def count_corpus(paths: List[str], outputs: List[str], jobs: Optional[int] = None,
+                 chunk_bytes: int = CORPUS_CHUNK_BYTES) -> Dict[str, any]:
+    """Count every occurrence of the given outputs in a text corpus.
+
+    Files are split into chunks that are counted on a process pool, so
+    multi-gigabyte corpora are streamed rather than loaded.
+    """
+    files = list(iter_corpus_files(paths))
+    encoded = tuple(sorted({output.encode('utf-8') for output in outputs},
+                           key=lambda b: (-len(b), b)))
+    jobs_list = [(path, start, end, encoded) for path, start, end in corpus_chunks(files, chunk_bytes)]
+
+    counts = Counter()
+    scanned = 0
+    errors = []
+    for chunk_counts, size, error in parallel_imap(_count_chunk, jobs_list, jobs=jobs, min_items=2):
+        if error:
+            errors.append(error)
+        counts.update(chunk_counts)
+        scanned += size
 
-    filepath = sys.argv[1]
-    verbose = '--verbose' in sys.argv
-    json_output = '--json' in sys.argv
+    return {
+        'files': len(files),
+        'bytes': scanned,
+        'counts': Counter({output.decode('utf-8'): n for output, n in counts.items()}),
+        'errors': errors,
+    }
+
+
+def audit_corpus_usage(sequences: List[XComposeSequence], counts: Counter) -> Dict[str, any]:
+    """Weigh the table by corpus usage.
+
+    A symbol typed through its shortest sequence costs one keystroke for
+    Compose plus one per key. Outputs that are plain ASCII are typed
+    directly and are not counted.
+    """
+    shortest: Dict[str, XComposeSequence] = {}
+    for seq in sequences:
+        if seq.symbol.isascii():
+            continue
+        best = shortest.get(seq.symbol)
+        if best is None or len(seq.keys) < len(best.keys):
+            shortest[seq.symbol] = seq
+
+    total = sum(counts[symbol] for symbol in shortest)
+    keystrokes = sum(counts[symbol] * (len(seq.keys) + 1) for symbol, seq in shortest.items())
+
+    ranked = sorted((symbol for symbol in shortest if counts[symbol]),
+                    key=lambda symbol: (-counts[symbol], shortest[symbol].line_num))
+    usage = [{'symbol': symbol, 'count': counts[symbol],
+              'share': counts[symbol] / total,
+              'keystrokes': len(shortest[symbol].keys) + 1,
+              'sequence': shortest[symbol]}
+             for symbol in ranked]
+
+    return {
+        'total': total,
+        'expected_keystrokes': keystrokes / total if total else 0,
+        'usage': usage,
+        'frequent_long': [entry for entry in usage
+                          if entry['share'] >= FREQUENT_SHARE
+                          and len(entry['sequence'].keys) >= LONG_SEQUENCE_KEYS],
+        'unseen': [symbol for symbol in shortest if not counts[symbol]],
+    }
+
+
+def audit_corpus(filepath: str, corpus_paths: List[str], output_format: str, verbose: bool,
+                 jobs: Optional[int] = None) -> int:
+    """Count table outputs in a corpus and print the usage report. Returns the exit code."""
+    for path in corpus_paths:
+        if not os.path.exists(path):
+            print(f"Error: Corpus not found: {path}", file=sys.stderr)
+            return 1
 
     sequences = parse_xcompose(filepath)
     if sequences is None:
-        sys.exit(1)
+        return 1
+
+    start = time.perf_counter()
+    outputs = {seq.symbol for seq in sequences if not seq.symbol.isascii()}
+    corpus = count_corpus(corpus_paths, sorted(outputs), jobs)
+    elapsed = time.perf_counter() - start
+    for error in corpus['errors']:
+        print(f"Warning: Cannot read {error}", file=sys.stderr)
+    if not corpus['files']:
+        print(f"Error: No {'/'.join(CORPUS_EXTENSIONS)} files in {', '.join(corpus_paths)}",
+              file=sys.stderr)
+        return 1
+
+    usage = audit_corpus_usage(sequences, corpus['counts'])
+    summary = {
+        'files': corpus['files'],
+        'bytes': corpus['bytes'],
+        'occurrences': usage['total'],
+        'symbols_seen': len(usage['usage']),
+        'symbols_unseen': len(usage['unseen']),
+        'expected_keystrokes': round(usage['expected_keystrokes'], 3),
+        'frequent_long_count': len(usage['frequent_long']),
+    }
 
-    if json_output:
-        print(generate_json_report(sequences))
+    def entry_dict(entry):
+        seq = entry['sequence']
+        return {'symbol': entry['symbol'], 'count': entry['count'],
+                'share': round(entry['share'], 5), 'keystrokes': entry['keystrokes'],
+                'keys': seq.key_string, 'line': seq.line_num}
+
+    if output_format in REPORT_FORMATS:
+        emitter = open_emitter(output_format, 'audit_xcompose_design')
+        for entry in usage['frequent_long']:
+            seq = entry['sequence']
+            emitter.emit(Finding(
+                'frequent_long_sequence',
+                f"{entry['symbol']} is {entry['share']:.1%} of symbols in the corpus "
+                f"but its shortest sequence is {seq.key_string} ({entry['keystrokes']} keystrokes)",
+                'warning', filepath, seq.line_num, entry_dict(entry)))
+        emitter.close({'file': filepath, 'corpus': corpus_paths, **summary})
+    elif output_format == 'json':
+        print(json.dumps({
+            'metadata': {'file': filepath, 'corpus': corpus_paths, **summary},
+            'usage': [entry_dict(entry) for entry in usage['usage']],
+            'frequent_long': [entry_dict(entry) for entry in usage['frequent_long']],
+            'unseen': usage['unseen'],
+        }, indent=2, ensure_ascii=False))
+    else:
+        print("=" * 70)
+        print("XCompose Corpus Usage Report")
+        print("=" * 70)
+        print(f"\nCorpus: {corpus['files']} file(s), {corpus['bytes'] / 2**20:,.1f} MiB "
+              f"in {elapsed:.1f}s")
+        print(f"Symbol occurrences: {usage['total']:,} "
+              f"({len(usage['usage'])} of {len(usage['usage']) + len(usage['unseen'])} symbols seen)")
+        print(f"Expected keystrokes per symbol: {usage['expected_keystrokes']:.2f} (including Compose)")
+
+        shown = usage['usage'] if verbose else usage['usage'][:20]
+        if shown:
+            print(f"\n{'Most used' if not verbose else 'All used'} symbols:")
+            print(f"  {'Symbol':<8} {'Count':>10} {'Share':>7} {'Keys':>5}  Shortest sequence")
+            for entry in shown:
+                print(f"  {entry['symbol']:<8} {entry['count']:>10,} {entry['share']:>7.2%} "
+                      f"{entry['keystrokes']:>5}  {entry['sequence'].key_string}")
+
+        print("\n" + "=" * 70)
+        print(f"FREQUENT SYMBOLS WITH LONG SEQUENCES (≥{FREQUENT_SHARE:.0%} of use, "
+              f"≥{LONG_SEQUENCE_KEYS} keys after Compose)")
+        print("=" * 70)
+        if usage['frequent_long']:
+            for entry in usage['frequent_long']:
+                print(f"  ⚠️  {entry['symbol']} ({entry['share']:.1%}): "
+                      f"{entry['sequence'].key_string} (line {entry['sequence'].line_num})")
+        else:
+            print("  ✅ Every frequent symbol has a short sequence")
+
+        if verbose and usage['unseen']:
+            print(f"\nNever used in the corpus ({len(usage['unseen'])}):")
+            print("  " + " ".join(usage['unseen']))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Audit XCompose design quality (coverage, symmetry, ergonomics)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s XCompose                    # Human-readable report
+  %(prog)s XCompose --verbose          # Include per-symbol details
+  %(prog)s XCompose --json             # One JSON document
+  %(prog)s XCompose --format jsonl     # One JSON finding per line, streamed
+  %(prog)s XCompose --format sarif     # SARIF log for code scanning
+  %(prog)s XCompose --pairs-file team_pairs.txt   # Own symmetry vocabulary
+  %(prog)s XCompose --corpus ~/papers  # Symbol usage in your .tex/.md/.txt files
+  %(prog)s XCompose --no-cache         # Always re-audit
+  %(prog)s --cache-stats               # Result cache hit rate and time saved
+        """
+    )
+
+    parser.add_argument(
+        'file',
+        nargs='?',
+        default='XCompose',
+        help='Path to XCompose file (default: XCompose)'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Show detailed information'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output results as JSON (same as --format json)'
+    )
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json'] + list(REPORT_FORMATS),
+        default='text',
+        help='Output format: text report, one JSON document, JSON Lines '
+             '(one finding per line, streamed) or SARIF (default: text)'
+    )
+
+    parser.add_argument(
+        '--pairs-file',
+        metavar='FILE',
+        help='Word pairs for the symmetry audit, one "word other-word" pair per '
+             'line (# starts a comment); replaces the built-in left/right, up/down, ... list'
+    )
+
+    parser.add_argument(
+        '--corpus',
+        action='append',
+        metavar='PATH',
+        help='Count symbol usage in the .tex/.md/.txt files under PATH (repeatable) '
+             'and report keystrokes per symbol instead of the design audit'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes for --corpus (default: one per CPU; 1 disables parallelism)'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not replay or store cached results'
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Show result cache hit rate and time saved, and exit'
+    )
+
+    args = parser.parse_args()
+    if args.cache_stats:
+        print(format_result_cache_stats())
+        return 0
+    if args.json:
+        args.format = 'json'
+    if args.corpus:
+        # Corpora are too large to hash for the result cache
+        return audit_corpus(args.file, args.corpus, args.format, args.verbose, args.jobs)
+
+    symmetry_pairs = None
+    inputs = [args.file, str(BLOCKS_PATH)]
+    if args.pairs_file:
+        try:
+            symmetry_pairs = load_symmetry_pairs(args.pairs_file)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"Error: Cannot read pairs file: {e}", file=sys.stderr)
+            return 1
+        inputs.append(args.pairs_file)
+
+    def run():
+        return audit(args.file, args.format, args.verbose, symmetry_pairs), []
+
+    if args.no_cache:
+        return run()[0]
+    options = {'format': args.format, 'verbose': args.verbose, 'pairs_file': bool(args.pairs_file)}
+    return ResultCache('audit_xcompose_design', __file__).run(options, inputs, run)
+
+
+def audit(filepath: str, output_format: str, verbose: bool,
+          symmetry_pairs: Optional[List[Tuple[str, str]]] = None) -> int:
+    """Audit one file and print the report. Returns the exit code."""
+    sequences = parse_xcompose(filepath)
+    if sequences is None:
+        return 1
+
+    if output_format in REPORT_FORMATS:
+        emitter = open_emitter(output_format, 'audit_xcompose_design')
+        counts = {}
+        for finding in iter_findings(sequences, filepath, symmetry_pairs, counts):
+            emitter.emit(finding)
+        emitter.close({'file': filepath, 'total_sequences': len(sequences), 'counts': counts})
+    elif output_format == 'json':
+        print(generate_json_report(sequences, symmetry_pairs))
     else:
-        generate_report(sequences, verbose)
+        generate_report(sequences, verbose, symmetry_pairs)
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
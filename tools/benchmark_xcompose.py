@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+XCompose-STEM: Benchmarks
+
+Measures the performance characteristics of the shared XCompose library:
+- memory: tracemalloc report of bytes per sequence for large tables
+- lexer: line throughput of the Compose lexer vs. the legacy regexes
+
+Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
+
+Copyright (c) 2025 Phil Bowens
+Repository: https://github.com/phil-bowens/xcompose-stem
+License: MIT
+
+Usage:
+    ./benchmark_xcompose.py memory XCompose
+    ./benchmark_xcompose.py memory XCompose --count 1000000
+    ./benchmark_xcompose.py lexer /usr/share/X11/locale/en_US.UTF-8/Compose
+"""
+
+import argparse
+import gc
+import re
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from xcompose_lib import (ComposeProduction, ComposeSyntaxError, TAG_PATTERN,
+                          XComposeParser, iter_lines, lex_compose_line)
+
+# The regexes the tools used before the grammar lexer, kept for comparison
+SEQUENCE_PATTERN = re.compile(
+    r'^<Multi_key>(\s+<[^>]+>)+\s*:\s*"([^"]+)"(?:\s+U([0-9A-Fa-f]{4,6}))?(?:\s*#\s*(.*))?$'
+)
+KEY_PATTERN = re.compile(r'<([^>]+)>')
+
+
+@dataclass
+class LegacySequence:
+    """The pre-slots sequence model (regular dataclass, list of key names)."""
+    keys: List[str]
+    symbol: str
+    codepoint: Optional[str]
+    comment: Optional[str]
+    tag: Optional[str]
+    category: str
+    subcategory: Optional[str]
+    line_num: int
+
+
+def parse_legacy(line: str, line_num: int, category: str,
+                 subcategory: Optional[str]) -> Optional[LegacySequence]:
+    """Build a LegacySequence the way the original parser did."""
+    seq_match = SEQUENCE_PATTERN.match(line)
+    if not seq_match:
+        return None
+
+    keys = [k for k in KEY_PATTERN.findall(seq_match.group(0)) if k != 'Multi_key']
+    comment = seq_match.group(4).strip() if seq_match.group(4) else None
+    tag = None
+    if comment:
+        tag_match = TAG_PATTERN.match(comment)
+        if tag_match:
+            tag = tag_match.group(1)
+            comment = tag_match.group(2).strip()
+
+    return LegacySequence(keys, seq_match.group(2), seq_match.group(3), comment, tag,
+                          category, subcategory, line_num)
+
+
+def measure(build: Callable[[int], object], count: int) -> int:
+    """Return the net bytes allocated while building `count` objects."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    table = [build(i) for i in range(count)]
+
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    gc.collect()
+    return after - before
+
+
+def run_memory_report(filepath: str, count: int) -> int:
+    """Print bytes per sequence for legacy and slotted models."""
+    parser = XComposeParser(filepath)
+    if not parser.filepath.exists():
+        print(f"Error: File not found: {filepath}", file=sys.stderr)
+        return 1
+
+    # Keep the source lines of every sequence, with their header context,
+    # and cycle through them to synthesize a table of the requested size
+    samples = []
+    parser.current_category = "Uncategorized"
+    parser.current_subcategory = None
+    for line_num, line in enumerate(iter_lines(parser.filepath), 1):
+        line = line.strip()
+        seq = parser._parse_line(line, line_num)
+        if seq is not None:
+            samples.append((line, seq.category, seq.subcategory))
+
+    if not samples:
+        print(f"Error: No sequences found in {filepath}", file=sys.stderr)
+        return 1
+
+    def build_legacy(i):
+        line, category, subcategory = samples[i % len(samples)]
+        return parse_legacy(line, i, category, subcategory)
+
+    def build_slotted(i):
+        line, category, subcategory = samples[i % len(samples)]
+        parser.current_category = category
+        parser.current_subcategory = subcategory
+        return parser._parse_line(line, i)
+
+    def build_slotted_warm(i):
+        seq = build_slotted(i)
+        seq.sequence_string, seq.key_string  # Populate derived-string caches
+        return seq
+
+    print("=" * 70)
+    print("XCompose Sequence Memory Report (tracemalloc)")
+    print(f"Source: {filepath} ({len(samples)} distinct sequences)")
+    print(f"Table size: {count:,} sequences")
+    print("=" * 70)
+
+    results = [
+        ('Legacy dataclass (List[str] keys)', measure(build_legacy, count)),
+        ('Slotted (interned keysym IDs)', measure(build_slotted, count)),
+        ('Slotted + cached display strings', measure(build_slotted_warm, count)),
+    ]
+
+    baseline = results[0][1]
+    print(f"\n{'Model':<38} {'Total MiB':>10} {'Bytes/seq':>10} {'vs legacy':>10}")
+    print("-" * 70)
+    for name, total in results:
+        ratio = f"{total / baseline * 100:.0f}%" if baseline else "-"
+        print(f"{name:<38} {total / 2**20:>10.1f} {total / count:>10.1f} {ratio:>10}")
+    print()
+
+    return 0
+
+
+def time_best(func: Callable[[], int], repeat: int) -> float:
+    """Return the best wall time of `repeat` runs of func."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_lexer_report(filepath: str, repeat: int) -> int:
+    """Print line throughput and coverage of the lexer vs. legacy regexes.
+
+    Both parsers build the same ComposeProduction per line, so the timings
+    compare parsing only. The middle row times the lexer on exactly the
+    lines the legacy regexes accept, the like-for-like comparison.
+    """
+    try:
+        lines = [line.strip() for line in iter_lines(filepath)]
+    except OSError as e:
+        print(f"Error: Cannot read {filepath}: {e}", file=sys.stderr)
+        return 1
+    legacy_lines = [line for line in lines if SEQUENCE_PATTERN.match(line)]
+
+    def legacy():
+        found = 0
+        for line in lines:
+            match = SEQUENCE_PATTERN.match(line)
+            if match:
+                ComposeProduction(tuple(KEY_PATTERN.findall(match.group(0))),
+                                  match.group(2), match.group(3), match.group(4))
+                found += 1
+        return found
+
+    def lex(source):
+        def run():
+            found = 0
+            for line in source:
+                try:
+                    if lex_compose_line(line).__class__ is ComposeProduction:
+                        found += 1
+                except ComposeSyntaxError:
+                    pass
+            return found
+        return run
+
+    print("=" * 70)
+    print("Compose Lexer Throughput")
+    print(f"Source: {filepath} ({len(lines):,} lines)")
+    print(f"Best of {repeat} runs")
+    print("=" * 70)
+
+    parsers = [
+        ('Legacy regexes (Multi_key only)', lines, legacy),
+        ('Grammar lexer, same lines', legacy_lines, lex(legacy_lines)),
+        ('Grammar lexer (full Compose(5))', lines, lex(lines)),
+    ]
+    found = [func() for _, _, func in parsers]
+
+    # Interleave the runs so that drift in machine load hits every parser
+    best = [float('inf')] * len(parsers)
+    for _ in range(repeat):
+        for i, (_, _, func) in enumerate(parsers):
+            start = time.perf_counter()
+            func()
+            best[i] = min(best[i], time.perf_counter() - start)
+
+    baseline = best[0]
+    print(f"\n{'Parser':<34} {'Lines':>6} {'Productions':>11} {'ms':>8} {'Klines/s':>9} {'vs legacy':>10}")
+    print("-" * 83)
+    for (name, source, _), count, seconds in zip(parsers, found, best):
+        rate = len(source) / seconds / 1000 if seconds else 0
+        ratio = f"{seconds / baseline * 100:.0f}%" if baseline else "-"
+        print(f"{name:<34} {len(source):>6,} {count:>11,} {seconds * 1000:>8.1f} {rate:>9.0f} {ratio:>10}")
+    print()
+
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the XCompose-STEM library',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s memory XCompose                  # Bytes per sequence, 1M entries
+  %(prog)s memory XCompose --count 100000   # Smaller table
+  %(prog)s lexer XCompose                   # Lexer vs. legacy regex timing
+        """
+    )
+
+    subparsers = parser.add_subparsers(dest='benchmark')
+    subparsers.required = True
+
+    memory = subparsers.add_parser('memory', help='Report memory per sequence')
+    memory.add_argument(
+        'file',
+        nargs='?',
+        default='XCompose',
+        help='XCompose file to sample sequences from (default: XCompose)'
+    )
+    memory.add_argument(
+        '--count',
+        type=int,
+        default=1_000_000,
+        help='Number of sequences in the synthetic table (default: 1000000)'
+    )
+
+    lexer = subparsers.add_parser('lexer', help='Compare lexer and legacy regex throughput')
+    lexer.add_argument(
+        'file',
+        nargs='?',
+        default='XCompose',
+        help='Compose file to lex (default: XCompose)'
+    )
+    lexer.add_argument(
+        '--repeat',
+        type=int,
+        default=100,
+        help='Number of timed runs; the best is reported (default: 100)'
+    )
+
+    args = parser.parse_args()
+
+    if args.benchmark == 'memory':
+        return run_memory_report(args.file, args.count)
+    if args.benchmark == 'lexer':
+        return run_lexer_report(args.file, args.repeat)
+
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -15,15 +15,22 @@
 #
 
 import sys
-import re
 import os
+import glob
+import hashlib
 from pathlib import Path
 from collections import defaultdict
 
+from xcompose_lib import (REPORT_FORMATS, X11_LOCALE_DIR, ComposeInclude, ComposeSyntaxError,
+                          CrossFileIndex, Finding, IncludeResolver, ParseCache, ResultCache,
+                          format_result_cache_stats, iter_lines, lex_compose_line, open_emitter,
+                          parallel_imap, parallel_map)
+
 class ComposeComparator:
     def __init__(self, custom_file, system_file=None):
         self.custom_file = custom_file
         self.system_file = system_file or self._find_system_compose()
+        self.cache = ParseCache()
 
         self.custom_sequences = {}
         self.system_sequences = {}
@@ -45,8 +52,8 @@ class ComposeComparator:
                 # Convert locale name to X11 format (e.g., en_US.UTF-8)
                 if '.' not in current_locale:
                     current_locale = f"{current_locale}.UTF-8"
-        except:
-            pass
+        except ValueError:
+            pass  # Unparseable locale environment; fall back to the defaults below
 
         # Build search order based on detected locale
         candidates = []
@@ -77,94 +84,94 @@ class ComposeComparator:
 
         return None
 
-    def list_available_compose_files(self):
-        """List all available system Compose files."""
-        import glob
+    def list_available_compose_files(self, jobs=None, use_cache=True):
+        """List all available system Compose files, in locale order.
 
-        compose_files = glob.glob('/usr/share/X11/locale/*/Compose')
-
-        if not compose_files:
-            return []
-
-        # Parse each file to get sequence count
-        results = []
-        for filepath in sorted(compose_files):
-            locale_name = filepath.split('/locale/')[1].split('/')[0]
-            try:
-                sequences = self.parse_file(filepath)
-                results.append({
-                    'locale': locale_name,
-                    'path': filepath,
-                    'sequences': len(sequences)
-                })
-            except:
-                results.append({
-                    'locale': locale_name,
-                    'path': filepath,
-                    'sequences': '?'
-                })
-
-        return results
+        See build_locale_inventory(); jobs is the number of worker processes
+        (default one per CPU).
+        """
+        return build_locale_inventory(jobs=jobs, cache=self.cache if use_cache else None)
 
     def _parse_sequence(self, line):
         """Parse a compose sequence line."""
-        # Match: <Multi_key> <key1> <key2> : "output" UXXXX
-        pattern = r'^(<Multi_key>(?:\s+<[^>]+>)+)\s*:\s*"([^"]+)"(?:\s+U([0-9A-Fa-f]{4,6}))?'
-        match = re.match(pattern, line.strip())
+        try:
+            item = lex_compose_line(line)
+        except ComposeSyntaxError:
+            return None, None, None
 
-        if match:
-            sequence = match.group(1)
-            output = match.group(2)
-            codepoint = match.group(3)
+        # Only plain Multi_key sequences are comparable with ours
+        if (item is None or item.__class__ is ComposeInclude or item.modifiers
+                or len(item.keys) < 2 or item.keys[0] != 'Multi_key'):
+            return None, None, None
 
-            # Normalize sequence (remove extra whitespace)
-            sequence = ' '.join(sequence.split())
+        return item.sequence_string, item.output, item.codepoint
 
-            return sequence, output, codepoint
+    def parse_file(self, filepath):
+        """Parse a Compose file and return sequences dict ({} if unreadable)."""
+        try:
+            return self.read_file(filepath)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Error parsing {filepath}: {e}", file=sys.stderr)
+            return {}
 
-        return None, None, None
+    def read_file(self, filepath):
+        """Parse a Compose file and return sequences dict.
 
-    def parse_file(self, filepath):
-        """Parse a Compose file and return sequences dict."""
-        sequences = {}
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        rows = self.cache.get(filepath, 'compare')
+        if rows is not None:
+            return {
+                sequence: {'output': output, 'codepoint': codepoint, 'line': line_num}
+                for sequence, output, codepoint, line_num in rows
+            }
 
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
+        sequences = {}
 
-                    # Skip comments and empty lines
-                    if not line or line.startswith('#'):
-                        continue
+        for line_num, line in enumerate(iter_lines(filepath), 1):
+            line = line.strip()
 
-                    sequence, output, codepoint = self._parse_sequence(line)
+            # Skip comments and empty lines
+            if not line or line.startswith('#'):
+                continue
 
-                    if sequence and output:
-                        sequences[sequence] = {
-                            'output': output,
-                            'codepoint': codepoint,
-                            'line': line_num
-                        }
+            sequence, output, codepoint = self._parse_sequence(line)
 
-        except Exception as e:
-            print(f"Error parsing {filepath}: {e}", file=sys.stderr)
-            return {}
+            if sequence and output:
+                sequences[sequence] = {
+                    'output': output,
+                    'codepoint': codepoint,
+                    'line': line_num
+                }
 
+        self.cache.put(filepath, 'compare', [
+            (sequence, data['output'], data['codepoint'], data['line'])
+            for sequence, data in sequences.items()
+        ])
         return sequences
 
-    def compare(self):
-        """Compare custom sequences against system defaults."""
-        print("Parsing files...")
-        print(f"  Custom: {self.custom_file}")
-        print(f"  System: {self.system_file}")
-        print()
+    def compare(self, sink=None):
+        """Compare custom sequences against system defaults.
+
+        Args:
+            sink: If given, called with a Finding for each overlap and
+                conflict as it is found (progress output is suppressed)
+        """
+        if sink is None:
+            print("Parsing files...")
+            print(f"  Custom: {self.custom_file}")
+            print(f"  System: {self.system_file}")
+            print()
 
         self.custom_sequences = self.parse_file(self.custom_file)
         self.system_sequences = self.parse_file(self.system_file)
 
-        print(f"Custom sequences: {len(self.custom_sequences)}")
-        print(f"System sequences: {len(self.system_sequences)}")
-        print()
+        if sink is None:
+            print(f"Custom sequences: {len(self.custom_sequences)}")
+            print(f"System sequences: {len(self.system_sequences)}")
+            print()
 
         # Compare
         for seq, custom_data in self.custom_sequences.items():
@@ -178,6 +185,14 @@ class ComposeComparator:
                         'output': custom_data['output'],
                         'custom_line': custom_data['line']
                     })
+                    if sink is not None:
+                        sink(Finding(
+                            'system_overlap',
+                            f"{seq} → {custom_data['output']} is already a system default",
+                            'note', self.custom_file, custom_data['line'],
+                            {'sequence': seq, 'output': custom_data['output'],
+                             'system_file': self.system_file, 'system_line': system_data['line']}
+                        ))
                 else:
                     # Conflict - overriding system default
                     self.conflicts.append({
@@ -186,6 +201,16 @@ class ComposeComparator:
                         'system_output': system_data['output'],
                         'custom_line': custom_data['line']
                     })
+                    if sink is not None:
+                        sink(Finding(
+                            'system_override',
+                            f"{seq} → {custom_data['output']} overrides system default "
+                            f"{system_data['output']}",
+                            'warning', self.custom_file, custom_data['line'],
+                            {'sequence': seq, 'custom_output': custom_data['output'],
+                             'system_output': system_data['output'],
+                             'system_file': self.system_file, 'system_line': system_data['line']}
+                        ))
             else:
                 # Unique addition
                 self.unique.append({
@@ -421,29 +446,18 @@ class ComposeComparator:
                             key=lambda x: x[1]['codepoint'] if x[1]['codepoint'] else 'ZZZZ')
 
         # Generate output based on format
-        if output_format == 'markdown':
-            return self._format_table_markdown(sorted_chars)
-        elif output_format == 'csv':
-            return self._format_table_csv(sorted_chars)
-        elif output_format == 'tsv':
-            return self._format_table_tsv(sorted_chars)
-        else:
-            return self._format_table_markdown(sorted_chars)
-
-    def _format_table_markdown(self, sorted_chars):
-        """Format comparison table as Markdown."""
-        lines = []
-        lines.append("# XCompose Character Comparison Table")
-        lines.append("")
-        lines.append("Comparison of custom XCompose sequences vs system defaults.")
-        lines.append("")
-        lines.append(f"- **Total characters:** {len(sorted_chars)}")
-        lines.append(f"- **Custom file:** `{self.custom_file}`")
-        lines.append(f"- **System file:** `{self.system_file}`")
-        lines.append("")
-        lines.append("| Character | Codepoint | Custom Sequence(s) | System Sequence(s) | Status |")
-        lines.append("|-----------|-----------|-------------------|-------------------|--------|")
-
+        if output_format in ('csv', 'tsv'):
+            rows = []
+            for char, data in sorted_chars:
+                codepoint = f"U+{data['codepoint']}" if data['codepoint'] else ""
+                custom_seqs = '; '.join(s.strip() for s in data['custom_sequences'])
+                system_seqs = '; '.join(s.strip() for s in data['system_sequences'])
+                rows.append([char, codepoint, custom_seqs, system_seqs, data['status']])
+            headers = ['Character', 'Codepoint', 'Custom Sequences', 'System Sequences', 'Status']
+            return format_table(output_format, headers, rows)
+
+        headers = ['Character', 'Codepoint', 'Custom Sequence(s)', 'System Sequence(s)', 'Status']
+        rows = []
         for char, data in sorted_chars:
             # Escape special characters for Markdown
             char_display = char if char not in ['|', '\\'] else f'`{char}`'
@@ -460,54 +474,21 @@ class ComposeComparator:
                 if len(data['system_sequences']) > 3:
                     system_seqs += f"<br>*+{len(data['system_sequences'])-3} more*"
 
-            status = data['status']
-
-            lines.append(f"| {char_display} | {codepoint} | {custom_seqs} | {system_seqs} | {status} |")
-
-        lines.append("")
-        lines.append("## Status Legend")
-        lines.append("")
-        lines.append("- **Unique**: Character sequence not available in system defaults")
-        lines.append("- **Overlap**: Same sequence produces same character in both")
-        lines.append("- **Override**: Custom sequence overrides system default for this character")
-        lines.append("- **Available in System**: Character can be produced via system defaults (different sequence)")
-
-        return '\n'.join(lines)
-
-    def _format_table_csv(self, sorted_chars):
-        """Format comparison table as CSV."""
-        import csv
-        from io import StringIO
-
-        output = StringIO()
-        writer = csv.writer(output)
-
-        writer.writerow(['Character', 'Codepoint', 'Custom Sequences', 'System Sequences', 'Status'])
-
-        for char, data in sorted_chars:
-            codepoint = f"U+{data['codepoint']}" if data['codepoint'] else ""
-            custom_seqs = '; '.join(s.strip() for s in data['custom_sequences'])
-            system_seqs = '; '.join(s.strip() for s in data['system_sequences']) if data['system_sequences'] else ""
-            status = data['status']
-
-            writer.writerow([char, codepoint, custom_seqs, system_seqs, status])
-
-        return output.getvalue()
-
-    def _format_table_tsv(self, sorted_chars):
-        """Format comparison table as TSV."""
-        lines = []
-        lines.append("Character\tCodepoint\tCustom Sequences\tSystem Sequences\tStatus")
-
-        for char, data in sorted_chars:
-            codepoint = f"U+{data['codepoint']}" if data['codepoint'] else ""
-            custom_seqs = '; '.join(s.strip() for s in data['custom_sequences'])
-            system_seqs = '; '.join(s.strip() for s in data['system_sequences']) if data['system_sequences'] else ""
-            status = data['status']
-
-            lines.append(f"{char}\t{codepoint}\t{custom_seqs}\t{system_seqs}\t{status}")
-
-        return '\n'.join(lines)
+            rows.append([char_display, codepoint, custom_seqs, system_seqs, data['status']])
+
+        return format_table('markdown', headers, rows,
+                            title="XCompose Character Comparison Table",
+                            intro=["Comparison of custom XCompose sequences vs system defaults.",
+                                   "",
+                                   f"- **Total characters:** {len(sorted_chars)}",
+                                   f"- **Custom file:** `{self.custom_file}`",
+                                   f"- **System file:** `{self.system_file}`"],
+                            legend=[
+                                "- **Unique**: Character sequence not available in system defaults",
+                                "- **Overlap**: Same sequence produces same character in both",
+                                "- **Override**: Custom sequence overrides system default for this character",
+                                "- **Available in System**: Character can be produced via system defaults (different sequence)",
+                            ])
 
     def print_documentation_notes(self):
         """Print suggested documentation for README."""
@@ -584,6 +565,410 @@ class ComposeComparator:
         print()
         print("=" * 70)
 
+def resolve_locale_table(filepath, locale_dir=X11_LOCALE_DIR):
+    """The plain Multi_key productions a locale loads from its Compose file.
+
+    Includes are followed as libX11 does, with %S the locale directory and
+    %L the file itself, and a later definition replaces an earlier one.
+
+    Returns:
+        ({keys after Multi_key: output} in table order, files read in load
+        order, problems such as unreadable files)
+    """
+    index = CrossFileIndex(locale_compose=filepath, locale_dir=locale_dir)
+    index.add_file(filepath)
+    table = {}
+    for keys, entry in index.entries.items():
+        if entry.production.modifiers or len(keys) < 2 or keys[0] != 'Multi_key':
+            continue
+        table[keys[1:]] = entry.production.output
+    return table, index.files, index.problems
+
+
+def _table_digest(table):
+    """Content hash of a resolved table, independent of definition order."""
+    h = hashlib.blake2b(digest_size=16)
+    for keys, output in sorted(table.items()):
+        h.update(f"{' '.join(keys)}\0{output}\0".encode('utf-8'))
+    return h.hexdigest()
+
+
+def _inventory_locale(job):
+    """Resolve one locale's Compose file for the inventory (worker process).
+
+    Returns:
+        (sequence count, table hash, (path, size, mtime) of every file
+        read, error) - count and hash are None if a file could not be read
+    """
+    filepath, locale_dir = job
+    table, files, problems = resolve_locale_table(filepath, locale_dir)
+    if problems:
+        return None, None, (), '; '.join(problems)
+    try:
+        stats = tuple((path, st.st_size, st.st_mtime_ns) for path, st in
+                      ((path, os.stat(path)) for path in files))
+    except OSError as e:
+        return None, None, (), str(e)
+    return len(table), _table_digest(table), stats, None
+
+
+TABLE_FORMATS = ('markdown', 'csv', 'tsv')
+
+
+def _format_table_markdown(headers, rows, title=None, intro=(), legend=()):
+    """Format a table as Markdown, with optional title, intro lines and legend.
+
+    Cells are written as given, so callers escape or decorate them.
+    """
+    lines = []
+    if title:
+        lines.append(f"# {title}")
+        lines.append("")
+    if intro:
+        lines.extend(intro)
+        lines.append("")
+    lines.append("| " + " | ".join(headers) + " |")
+    lines.append("|" + "|".join("-" * (len(header) + 2) for header in headers) + "|")
+    for row in rows:
+        lines.append("| " + " | ".join(str(cell) for cell in row) + " |")
+    if legend:
+        lines.append("")
+        lines.append("## Status Legend")
+        lines.append("")
+        lines.extend(legend)
+
+    return '\n'.join(lines)
+
+
+def _format_table_csv(headers, rows):
+    """Format a table as CSV."""
+    import csv
+    from io import StringIO
+
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return output.getvalue()
+
+
+def _format_table_tsv(headers, rows):
+    """Format a table as TSV."""
+    lines = ['\t'.join(headers)]
+    lines.extend('\t'.join(str(cell) for cell in row) for row in rows)
+    return '\n'.join(lines)
+
+
+def format_table(output_format, headers, rows, **markdown):
+    """Format a table as 'markdown' (default), 'csv' or 'tsv'.
+
+    Keyword arguments (title, intro, legend) only apply to Markdown.
+    """
+    if output_format == 'csv':
+        return _format_table_csv(headers, rows)
+    if output_format == 'tsv':
+        return _format_table_tsv(headers, rows)
+    return _format_table_markdown(headers, rows, **markdown)
+
+
+def _unchanged(stats):
+    """Whether every (path, size, mtime) recorded for a locale still holds."""
+    try:
+        for path, size, mtime in stats:
+            st = os.stat(path)
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                return False
+    except OSError:
+        return False
+    return bool(stats)
+
+
+def build_locale_inventory(locale_dir=X11_LOCALE_DIR, jobs=None, cache=None):
+    """Inventory of the system Compose files, one dict per locale.
+
+    Each entry has the locale, path, sequence count (None if unreadable,
+    with 'error' set), the hash of the table the locale loads, whether the
+    file is a symlink, and 'same_as': the locale whose Compose file it links
+    to or loads the same table as. Counts and hashes are taken after
+    resolving includes (see resolve_locale_table()), so a locale that only
+    includes another one's file is counted and matched with that locale.
+
+    The inventory is kept in the parse cache. Only locales for which a file
+    they read changed (size or mtime) are resolved again, on a process pool.
+    """
+    compose_files = sorted(glob.glob(os.path.join(locale_dir, '*', 'Compose')))
+    if not compose_files:
+        return []
+
+    key = os.path.abspath(locale_dir)
+    previous = {}
+    if cache is not None:
+        for row in cache.get_content('locale-inventory', key) or ():
+            previous[row[0]] = row
+
+    rows = []
+    pending = []
+    for filepath in compose_files:
+        old = previous.get(filepath)
+        if old is not None and _unchanged(old[3]):
+            rows.append(list(old))
+        else:
+            rows.append([filepath, None, None, (), None])
+            pending.append(rows[-1])
+
+    jobs_list = [(row[0], locale_dir) for row in pending]
+    for row, result in zip(pending, parallel_map(_inventory_locale, jobs_list, jobs=jobs, min_items=2)):
+        row[1:] = result
+
+    if cache is not None:
+        cache.put_content('locale-inventory', key, [tuple(row) for row in rows])
+
+    def is_link(filepath):
+        return os.path.realpath(filepath) != os.path.abspath(filepath)
+
+    # Name the locale each link or duplicate shares its table with,
+    # preferring a real file over a symlink, then the file that defines the
+    # table over those that include it
+    canonical = {}
+    for filepath, _, digest, stats, _ in sorted(rows, key=lambda row: (is_link(row[0]), len(row[3]))):
+        if digest:
+            canonical.setdefault(digest, filepath)
+
+    def locale_of(filepath):
+        return os.path.basename(os.path.dirname(filepath))
+
+    inventory = []
+    for filepath, count, digest, _, error in rows:
+        first = canonical.get(digest)
+        inventory.append({
+            'locale': locale_of(filepath),
+            'path': filepath,
+            'sequences': count,
+            'error': error,
+            'hash': digest,
+            'symlink': is_link(filepath),
+            'same_as': locale_of(first) if first and first != filepath else None,
+        })
+    return inventory
+
+
+# Status of one of our sequences in one locale, by precedence
+LOCALE_STATUSES = ('override', 'redundant', 'shadowed')
+
+
+def iter_multi_key_productions(filepath):
+    """Yield (keys after Multi_key, output, line number) for each plain
+    Multi_key production of a Compose file, streaming it line by line.
+
+    Raises:
+        OSError: If the file cannot be read
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
+    for line_num, line in enumerate(iter_lines(filepath), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        try:
+            item = lex_compose_line(line)
+        except ComposeSyntaxError:
+            continue
+        if (item is None or item.__class__ is ComposeInclude or item.modifiers
+                or len(item.keys) < 2 or item.keys[0] != 'Multi_key'):
+            continue
+        yield item.keys[1:], item.output, line_num
+
+
+_SCAN_INDEXES = {}  # Our sequences -> (exact, prefixes), built once per worker
+
+
+def _scan_locale_file(job):
+    """Classify our sequences against the table one locale loads (worker
+    process), with its includes resolved (see resolve_locale_table()).
+
+    Only our sequences are indexed: each entry of the locale's table is
+    looked up by its keys, its strict prefixes (it is shadowed by one of
+    ours) and as a strict prefix of ours (it shadows ours).
+
+    Returns:
+        ({our index: (status, system output or keys)}, error or None)
+    """
+    filepath, locale_dir, ours = job
+    index = _SCAN_INDEXES.get(ours)
+    if index is None:
+        exact = {}
+        prefixes = defaultdict(list)
+        for i, (keys, _) in enumerate(ours):
+            exact[keys] = i
+            for n in range(1, len(keys)):
+                prefixes[keys[:n]].append(i)
+        index = _SCAN_INDEXES[ours] = (exact, dict(prefixes))
+    exact, prefixes = index
+
+    table, _, problems = resolve_locale_table(filepath, locale_dir)
+    if problems:
+        return {}, '; '.join(problems)
+
+    found = {}
+    for keys, output in table.items():
+        i = exact.get(keys)
+        if i is not None:
+            found[i] = ('redundant' if output == ours[i][1] else 'override', output)
+            continue
+        shadowed = list(prefixes.get(keys, ()))
+        shadowed.extend(exact[keys[:n]] for n in range(1, len(keys)) if keys[:n] in exact)
+        for i in shadowed:
+            if i not in found:
+                found[i] = ('shadowed', ' '.join(keys))
+    return found, None
+
+
+def build_locale_matrix(custom_file, jobs=None, cache=None, locale_dir=X11_LOCALE_DIR):
+    """Status of our sequences in every locale.
+
+    Each distinct table (see build_locale_inventory()) is resolved and
+    scanned once, on a process pool; locales loading the same table share
+    the result.
+
+    Returns:
+        (ours, locales, per_locale) where ours lists (keys, output) of the
+        custom file, locales is the inventory, and per_locale maps a locale
+        name to ({our index: (status, detail)}, error)
+    """
+    ours = {}
+    for keys, output, _ in iter_multi_key_productions(custom_file):
+        ours[keys] = output  # Later definitions win
+    ours = tuple(ours.items())
+
+    locales = build_locale_inventory(locale_dir, jobs=jobs, cache=cache)
+    distinct = {}
+    for item in locales:
+        if item['hash'] and not item['same_as']:
+            distinct[item['hash']] = item['path']
+
+    jobs_list = [(path, locale_dir, ours) for path in distinct.values()]
+    results = dict(zip(distinct, parallel_imap(_scan_locale_file, jobs_list, jobs=jobs, min_items=2)))
+
+    per_locale = {}
+    for item in locales:
+        per_locale[item['locale']] = results[item['hash']] if item['hash'] else ({}, item['error'])
+    return ours, locales, per_locale
+
+
+def format_locale_matrix(custom_file, ours, locales, per_locale, output_format='markdown',
+                         verbose=False):
+    """Locale × status matrix (and, with verbose, sequence × status)."""
+    headers = ['Locale', 'Override', 'Redundant', 'Shadowed', 'Unique', 'Same as']
+    rows = []
+    by_sequence = defaultdict(lambda: {status: [] for status in LOCALE_STATUSES})
+    for item in locales:
+        found, error = per_locale[item['locale']]
+        counts = {status: 0 for status in LOCALE_STATUSES}
+        for i, (status, _) in found.items():
+            counts[status] += 1
+            by_sequence[i][status].append(item['locale'])
+        if error:
+            cells = ['?'] * 4
+        else:
+            cells = [counts[status] for status in LOCALE_STATUSES] + [len(ours) - len(found)]
+        same_as = item['same_as'] or ''
+        if output_format == 'markdown':
+            locale_cell = f"`{item['locale']}`"
+            same_as = f"`{same_as}`" if same_as else "—"
+        else:
+            locale_cell = item['locale']
+        rows.append([locale_cell] + cells + [same_as])
+
+    distinct = len({item['hash'] for item in locales if item['hash']})
+    table = format_table(
+        output_format, headers, rows,
+        title="XCompose Conflict Matrix (all locales)",
+        intro=[f"Status of the {len(ours)} sequences of `{custom_file}` in every system locale.",
+               "",
+               f"- **Locales:** {len(locales)} ({distinct} distinct tables)"],
+        legend=[
+            "- **Override**: Same sequence, different output in the locale (ours replaces it)",
+            "- **Redundant**: Same sequence and output as the locale's default",
+            "- **Shadowed**: Ours is a prefix of a locale sequence, or the other way round",
+            "- **Unique**: Not defined by the locale",
+            "- **Same as**: Locale whose Compose file this one links to, or that loads the same table",
+        ])
+    if not verbose:
+        return table
+
+    headers = ['Sequence', 'Output', 'Override', 'Redundant', 'Shadowed']
+    rows = []
+    for i in sorted(by_sequence):
+        keys, output = ours[i]
+        sequence = ' '.join(keys)
+        cells = [len(by_sequence[i][status]) for status in LOCALE_STATUSES]
+        if output_format == 'markdown':
+            rows.append([f"`{sequence}`", output if output not in ['|', '\\'] else f'`{output}`']
+                        + cells)
+        else:
+            rows.append([sequence, output] + cells)
+    details = format_table(output_format, headers, rows)
+    if output_format == 'markdown':
+        details = "## Sequences (number of locales per status)\n\n" + details
+    # Second table after a blank line
+    return table.rstrip('\n') + '\n\n' + details
+
+
+def print_effective_table(root, locale_compose, verbose=False):
+    """Print the effective table loaded from a root file, by source layer."""
+    resolver = IncludeResolver(locale_compose=locale_compose)
+    table = resolver.resolve(root)
+
+    print("=" * 70)
+    print("Effective XCompose Table (include directives resolved)")
+    print("=" * 70)
+    print()
+    print(f"Root file:    {root}")
+    print(f"Locale (%L):  {resolver.locale_compose or 'not found'}")
+    print()
+
+    # Count how many definitions of each layer later layers replaced
+    replaced = defaultdict(int)
+    for entry in table.overrides():
+        for source, _ in entry.overridden:
+            replaced[source] += 1
+
+    print("📚 LAYERS (load order)")
+    print("-" * 70)
+    by_source = table.by_source()
+    for index, layer in enumerate(table.layers, 1):
+        print(f"  {index}. {layer}")
+        print(f"     {len(by_source.get(layer, [])):5d} effective entries, "
+              f"{replaced[layer]} overridden by later layers")
+    print()
+
+    overrides = table.overrides()
+    print(f"Total effective sequences: {len(table.entries)}")
+    print(f"Overridden definitions:    {len(overrides)}")
+    print()
+
+    if overrides:
+        print("🔀 OVERRIDES (later definition wins)")
+        print("-" * 70)
+        shown = overrides if verbose else overrides[:10]
+        for entry in shown:
+            seq = entry.sequence
+            source, previous = entry.overridden[-1]
+            print(f"  {seq.key_string:30s} {previous.symbol} ({Path(source).name}:{previous.line_num})"
+                  f"  →  {seq.symbol} ({Path(entry.source).name}:{seq.line_num})")
+        if len(overrides) > len(shown):
+            print(f"  ... and {len(overrides) - len(shown)} more (use --verbose to see all)")
+        print()
+
+    if table.problems:
+        print("⚠️  PROBLEMS")
+        print("-" * 70)
+        for problem in table.problems:
+            print(f"  {problem}")
+        print()
+
+    print("=" * 70)
+    return 1 if table.problems and not table.layers else 0
+
 def main():
     import argparse
 
@@ -610,6 +995,26 @@ def main():
         action='store_true',
         help='List all available system Compose files and exit'
     )
+    parser.add_argument(
+        '--all-locales',
+        action='store_true',
+        help='Compare against every system locale and print a locale × status '
+             '(override/redundant/shadowed/unique) matrix in --format markdown, csv or tsv; '
+             'with --verbose, also a table of sequences by locale count'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes for parsing many files, e.g. with --list-locales/--all-locales '
+             '(default: one per CPU; 1 disables parallelism)'
+    )
+    parser.add_argument(
+        '--effective',
+        action='store_true',
+        help='Resolve include directives in custom_file (e.g. ~/.XCompose) and '
+             'show the effective table by source file'
+    )
     parser.add_argument(
         '--notes',
         action='store_true',
@@ -622,24 +1027,46 @@ def main():
     )
     parser.add_argument(
         '--format',
-        choices=['markdown', 'csv', 'tsv'],
+        choices=['markdown', 'csv', 'tsv'] + list(REPORT_FORMATS),
         default='markdown',
-        help='Output format for table (default: markdown)'
+        help='Output format for table (default: markdown); jsonl or sarif '
+             'instead stream each overlap and conflict as a finding'
     )
     parser.add_argument(
         '--output',
         help='Output file for table (default: stdout)'
     )
 
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not replay or store cached results'
+    )
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Show result cache hit rate and time saved, and exit'
+    )
+
     args = parser.parse_args()
 
+    if args.cache_stats:
+        print(format_result_cache_stats())
+        return 0
+
+    if args.table and args.format in REPORT_FORMATS:
+        parser.error(f"--format {args.format} reports findings and cannot be used with --table")
+    if args.all_locales and args.format not in TABLE_FORMATS:
+        parser.error(f"--all-locales writes a table; use --format {', '.join(TABLE_FORMATS)}")
+
     # Handle --list-locales
     if args.list_locales:
         comparator = ComposeComparator(args.custom_file if args.custom_file else 'XCompose')
         print("Available system Compose files:")
         print("=" * 70)
 
-        locales = comparator.list_available_compose_files()
+        locales = comparator.list_available_compose_files(jobs=args.jobs,
+                                                          use_cache=not args.no_cache)
         if not locales:
             print("No Compose files found in /usr/share/X11/locale/")
             return 1
@@ -647,11 +1074,17 @@ def main():
         print(f"{'Locale':<30} {'Sequences':<12} Path")
         print("-" * 70)
         for item in locales:
-            seq_count = str(item['sequences']).rjust(8)
-            print(f"{item['locale']:<30} {seq_count:<12} {item['path']}")
+            seq_count = str(item['sequences'] if item['sequences'] is not None else '?').rjust(8)
+            note = ''
+            if item['same_as']:
+                note = f"  ({'symlink to' if item['symlink'] else 'same as'} {item['same_as']})"
+            print(f"{item['locale']:<30} {seq_count:<12} {item['path']}{note}")
+            if item['error']:
+                print(f"{'':<30} ⚠️  {item['error']}")
 
         print()
-        print(f"Total locales: {len(locales)}")
+        distinct = len({item['hash'] for item in locales if item['hash']})
+        print(f"Total locales: {len(locales)} ({distinct} distinct tables)")
         print()
         print("Use --system-file <path> to compare against a specific locale")
         return 0
@@ -660,6 +1093,13 @@ def main():
         print(f"Error: Custom file not found: {args.custom_file}", file=sys.stderr)
         return 1
 
+    if args.all_locales:
+        return run_all_locales(args)
+
+    if args.effective:
+        locale_compose = args.system_file or ComposeComparator(args.custom_file).system_file
+        return print_effective_table(args.custom_file, locale_compose, verbose=args.verbose)
+
     comparator = ComposeComparator(args.custom_file, args.system_file)
 
     if not comparator.system_file:
@@ -667,6 +1107,60 @@ def main():
         print("Try specifying it with --system-file", file=sys.stderr)
         return 1
 
+    def run():
+        return run_comparison(comparator, args), []
+
+    # --output writes a file, which a replay would not reproduce
+    if args.no_cache or args.output:
+        return run()[0]
+    options = {'verbose': args.verbose, 'notes': args.notes, 'table': args.table,
+               'format': args.format}
+    return ResultCache('check_system_defaults', __file__).run(
+        options, [args.custom_file, comparator.system_file], run)
+
+
+def run_all_locales(args):
+    """Print or write the all-locales conflict matrix. Returns the exit code."""
+    cache = None if args.no_cache else ParseCache()
+    try:
+        ours, locales, per_locale = build_locale_matrix(args.custom_file, jobs=args.jobs, cache=cache)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error: Cannot read {args.custom_file}: {e}", file=sys.stderr)
+        return 1
+    if not locales:
+        print(f"Error: No Compose files found in {X11_LOCALE_DIR}/", file=sys.stderr)
+        return 1
+    for name, (_, error) in per_locale.items():
+        if error:
+            print(f"Warning: {name}: {error}", file=sys.stderr)
+
+    table_output = format_locale_matrix(args.custom_file, ours, locales, per_locale,
+                                        args.format, verbose=args.verbose)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(table_output)
+        print(f"Table written to: {args.output}")
+    else:
+        print(table_output)
+    return 0
+
+
+def run_comparison(comparator, args):
+    """Compare and print the report, table or findings. Returns the exit code."""
+    if args.format in REPORT_FORMATS:
+        emitter = open_emitter(args.format, 'check_system_defaults')
+        comparator.compare(sink=emitter.emit)
+        emitter.close({
+            'custom_file': args.custom_file,
+            'system_file': comparator.system_file,
+            'custom_sequences': len(comparator.custom_sequences),
+            'system_sequences': len(comparator.system_sequences),
+            'overlaps': len(comparator.overlaps),
+            'conflicts': len(comparator.conflicts),
+            'unique': len(comparator.unique),
+        })
+        return 0
+
     comparator.compare()
 
     # Handle --table flag
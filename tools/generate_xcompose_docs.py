@@ -30,10 +30,9 @@ import json
 import sys
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
-from dataclasses import asdict
+from typing import Dict, List
 
-from xcompose_lib import XComposeSequence, XComposeParser as BaseParser
+from xcompose_lib import SequenceTable, XComposeSequence, XComposeParser as BaseParser, keysym_glyph
 
 
 class XComposeParser:
@@ -59,14 +58,10 @@ class XComposeParser:
         if not self.sequences:
             return {}
 
-        # Count prefixes (first key after Multi_key)
-        prefixes = defaultdict(int)
-        for seq in self.sequences:
-            if seq.keys:
-                prefixes[seq.keys[0]] += 1
+        table = SequenceTable.from_sequences(self.sequences)
 
-        # Sequence length distribution
-        lengths = [len(seq.keys) for seq in self.sequences]
+        # Count prefixes (first key after Multi_key)
+        prefixes = table.prefix_counts()
 
         return {
             'total_sequences': len(self.sequences),
@@ -74,11 +69,7 @@ class XComposeParser:
             'categories': list(self.categories.keys()),
             'unique_prefixes': len(prefixes),
             'top_prefixes': sorted(prefixes.items(), key=lambda x: x[1], reverse=True)[:10],
-            'sequence_length': {
-                'min': min(lengths) if lengths else 0,
-                'max': max(lengths) if lengths else 0,
-                'avg': sum(lengths) / len(lengths) if lengths else 0
-            }
+            'sequence_length': table.length_summary()
         }
 
 
@@ -202,28 +193,8 @@ class MarkdownTableGenerator:
 
     def format_keys_compact(self, keys: List[str]) -> str:
         """Format keys in a compact, readable way for table display."""
-        # Map common X11 keysyms to readable symbols
-        key_map = {
-            'asciicircum': '^', 'asciitilde': '~', 'exclam': '!',
-            'at': '@', 'numbersign': '#', 'dollar': '$', 'percent': '%',
-            'ampersand': '&', 'asterisk': '*', 'parenleft': '(',
-            'parenright': ')', 'minus': '-', 'underscore': '_',
-            'plus': '+', 'equal': '=', 'bracketleft': '[',
-            'bracketright': ']', 'braceleft': '{', 'braceright': '}',
-            'backslash': '\\', 'bar': '|', 'semicolon': ';',
-            'colon': ':', 'apostrophe': "'", 'quotedbl': '"',
-            'comma': ',', 'period': '.', 'less': '<', 'greater': '>',
-            'slash': '/', 'question': '?', 'grave': '`',
-        }
-
-        formatted = []
-        for k in keys:
-            if k in key_map:
-                formatted.append(key_map[k])
-            else:
-                formatted.append(k)
-
-        return ' '.join(formatted)
+        # Spelled-out ASCII keysyms (parenleft, minus, ...) become their glyphs
+        return ' '.join(keysym_glyph(k) for k in keys)
 
     def generate(self, output_file: str):
         """Generate comprehensive Markdown table."""
@@ -337,40 +308,9 @@ class MarkdownTableGenerator:
 class HTMLGenerator:
     """Generates an HTML reference page."""
 
-    # X11 keysym name to visual character mapping
-    KEY_SYMBOL_MAP = {
-        'asciicircum': '^',
-        'asciitilde': '~',
-        'exclam': '!',
-        'at': '@',
-        'numbersign': '#',
-        'dollar': '$',
-        'percent': '%',
-        'ampersand': '&',
-        'asterisk': '*',
-        'parenleft': '(',
-        'parenright': ')',
+    # Visual overrides on top of the keysym registry's ASCII glyphs
+    KEY_SYMBOL_OVERRIDES = {
         'minus': '−',
-        'underscore': '_',
-        'plus': '+',
-        'equal': '=',
-        'bracketleft': '[',
-        'bracketright': ']',
-        'braceleft': '{',
-        'braceright': '}',
-        'backslash': '\\',
-        'bar': '|',
-        'semicolon': ';',
-        'colon': ':',
-        'apostrophe': "'",
-        'quotedbl': '"',
-        'comma': ',',
-        'period': '.',
-        'less': '<',
-        'greater': '>',
-        'slash': '/',
-        'question': '?',
-        'grave': '`',
         'space': '␣',
         'Tab': '⇥',
         'Return': '⏎',
@@ -464,7 +404,7 @@ class HTMLGenerator:
         visual_keys = []
         for key in keys:
             # Map to symbol if available, otherwise use the key name
-            visual_key = self.KEY_SYMBOL_MAP.get(key, key)
+            visual_key = self.KEY_SYMBOL_OVERRIDES.get(key) or keysym_glyph(key)
             visual_keys.append(visual_key)
         return ' '.join(visual_keys)
 
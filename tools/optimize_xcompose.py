@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+XCompose-STEM: Sequence Optimizer
+
+Proposes shorter sequences for frequently used symbols:
+- weights each symbol by its use in a text corpus (or a weights file)
+- shortens mnemonic sequences by dropping keys, keeping the category
+  prefix (h, g, k, ...) and the first key after it
+- keeps a trie of occupied slots, so no reassignment ever shadows,
+  duplicates or is shadowed by another sequence
+- prints the moves, the projected keystroke savings and a unified diff
+
+Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
+
+Copyright (c) 2025 Phil Bowens
+Repository: https://github.com/phil-bowens/xcompose-stem
+License: MIT
+
+Usage:
+    ./optimize_xcompose.py XCompose --corpus ~/papers
+    ./optimize_xcompose.py XCompose --weights weights.tsv --json
+    ./optimize_xcompose.py XCompose --corpus ~/papers --patch | patch -p1
+"""
+
+import argparse
+import difflib
+import json
+import re
+import sys
+import time
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from xcompose_lib import ComposeTrie, XComposeSequence, parse_xcompose
+from audit_xcompose_design import count_corpus
+
+# Left-hand side of a Multi_key production, up to the colon
+MULTI_KEY_LHS = re.compile(r'^(\s*)(<Multi_key>(?:\s*<[^>]+>)+)(\s*:)')
+
+# Sequences displaced to make room for a heavier symbol, at most
+EJECT_LIMIT = 3
+# Improvement passes over all movable sequences, at most
+MAX_PASSES = 5
+
+
+def load_weights(path: str) -> Dict[str, float]:
+    """Read a weights file: one "symbol<TAB>weight" pair per line, # comments.
+
+    Raises:
+        ValueError: If a line is not a symbol and a number separated by a tab
+    """
+    weights = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.rstrip('\n')
+            if not line.strip() or line.startswith('#'):
+                continue
+            symbol, sep, value = line.rpartition('\t')
+            try:
+                if not sep or not symbol:
+                    raise ValueError
+                weights[symbol] = float(value)
+            except ValueError:
+                raise ValueError(f'{path}:{line_num}: expected "symbol<TAB>weight"') from None
+    return weights
+
+
+class SequenceOptimizer:
+    """Local search for a cheaper, shadow-free assignment of key sequences.
+
+    The cost of a symbol is its weight times the keystrokes of its shortest
+    sequence, counting Compose. Movable sequences (mnemonics) may only move
+    to a subsequence of their original keys that keeps the prefix and the
+    first key after it, so ∑ <h> <s> <u> <m> can become <h> <s> <m> or
+    <h> <s>, but never <g> <s> or <h> <m>.
+
+    Every sequence, fixed or movable, sits in a trie of occupied slots. A
+    slot is free when no entry lies on its path or below it, so a move never
+    creates a prefix conflict. Movable sequences are visited heaviest first;
+    each takes its shortest free candidate, or displaces up to EJECT_LIMIT
+    lighter sequences when they can fall back to other free slots and the
+    total cost still drops. Passes repeat until nothing improves.
+    """
+
+    def __init__(self, sequences: List[XComposeSequence], weights: Dict[str, float],
+                 fixed: Optional[Set[int]] = None):
+        self.sequences = sequences
+        self.weights = weights
+        self.keys: List[Tuple[str, ...]] = [seq.keys for seq in sequences]
+        self.trie = ComposeTrie()
+        self.by_symbol: Dict[str, List[int]] = defaultdict(list)
+        for i, seq in enumerate(sequences):
+            self.trie.insert(seq.keys, i)
+            self.by_symbol[seq.symbol].append(i)
+
+        fixed = fixed or set()
+        self.movable = {i for i, seq in enumerate(sequences)
+                        if i not in fixed and seq.is_mnemonic and len(seq.keys) > 2}
+
+    def symbol_cost(self, symbol: str) -> float:
+        """Weighted keystrokes of a symbol through its shortest sequence."""
+        weight = self.weights.get(symbol, 0)
+        if not weight:
+            return 0
+        return weight * (min(len(self.keys[i]) for i in self.by_symbol[symbol]) + 1)
+
+    def total_cost(self) -> float:
+        return sum(self.symbol_cost(symbol) for symbol in self.by_symbol)
+
+    def candidates(self, i: int) -> Iterator[Tuple[str, ...]]:
+        """Shortened slots for sequence i, shortest first, then its original keys."""
+        original = self.sequences[i].keys
+        head, rest = original[:2], original[2:]
+        seen = set()
+        for size in range(len(rest)):
+            for kept in combinations(rest, size):
+                slot = head + kept
+                if slot not in seen:
+                    seen.add(slot)
+                    yield slot
+        yield original
+
+    def optimize(self) -> int:
+        """Run improvement passes. Returns the number of passes made."""
+        order = sorted(self.movable, key=lambda i: (-self.weights.get(self.sequences[i].symbol, 0),
+                                                    self.sequences[i].line_num))
+        order = [i for i in order if self.weights.get(self.sequences[i].symbol, 0) > 0]
+
+        for passes in range(1, MAX_PASSES + 1):
+            improved = False
+            for i in order:
+                if self._improve(i):
+                    improved = True
+            if not improved:
+                return passes
+        return MAX_PASSES
+
+    def _move(self, i: int, slot: Tuple[str, ...]):
+        self.trie.remove(self.keys[i], i)
+        self.keys[i] = slot
+        self.trie.insert(slot, i)
+
+    def _improve(self, i: int) -> bool:
+        """Move sequence i to a cheaper slot if one is reachable."""
+        symbol = self.sequences[i].symbol
+        current = self.keys[i]
+        others = [len(self.keys[j]) for j in self.by_symbol[symbol] if j != i]
+        useful = min([len(current)] + others)  # Only shorter than this saves anything
+
+        self.trie.remove(current, i)
+        for slot in self.candidates(i):
+            if len(slot) >= useful:
+                break
+            blockers = self.trie.conflicts(slot)
+            if not blockers:
+                self.keys[i] = slot
+                self.trie.insert(slot, i)
+                return True
+            if self._eject(i, current, slot, blockers):
+                return True
+        self.trie.insert(current, i)
+        return False
+
+    def _eject(self, i: int, current: Tuple[str, ...], slot: Tuple[str, ...],
+               blockers: List[Tuple[Tuple[str, ...], int]]) -> bool:
+        """Put i at slot by moving its blockers elsewhere, if that is cheaper.
+
+        Called with i already out of the trie. On failure the trie is left
+        as it was.
+        """
+        displaced = [j for _, j in blockers]
+        if len(displaced) > EJECT_LIMIT or not all(j in self.movable for j in displaced):
+            return False
+
+        affected = {symbol for symbol in
+                    [self.sequences[j].symbol for j in displaced] + [self.sequences[i].symbol]}
+        before = sum(self.symbol_cost(symbol) for symbol in affected)
+        previous = {j: self.keys[j] for j in displaced}
+
+        for j in displaced:
+            self.trie.remove(self.keys[j], j)
+        self.keys[i] = slot
+        self.trie.insert(slot, i)
+
+        placed = []
+        for j in displaced:
+            for candidate in self.candidates(j):
+                if not self.trie.conflicts(candidate):
+                    self.keys[j] = candidate
+                    self.trie.insert(candidate, j)
+                    placed.append(j)
+                    break
+            else:
+                break
+
+        if len(placed) == len(displaced) and \
+                sum(self.symbol_cost(symbol) for symbol in affected) < before:
+            return True
+
+        # Roll back
+        for j in placed:
+            self.trie.remove(self.keys[j], j)
+        self.trie.remove(slot, i)
+        for j, keys in previous.items():
+            self.keys[j] = keys
+            self.trie.insert(keys, j)
+        self.keys[i] = current
+        return False
+
+    def moves(self) -> List[int]:
+        """Indices of the sequences whose keys changed, in file order."""
+        return [i for i, keys in enumerate(self.keys) if keys != self.sequences[i].keys]
+
+    def new_shadowing(self) -> List[Tuple[int, int]]:
+        """Prefix conflicts in the result that were not in the input."""
+        def pairs(assignment):
+            trie = ComposeTrie()
+            for i, keys in enumerate(assignment):
+                trie.insert(keys, i)
+            return {(short, long) for _, short, _, long in trie.find_shadowing()}
+        return sorted(pairs(self.keys) - pairs([seq.keys for seq in self.sequences]))
+
+
+def rewrite_lines(lines: List[str], sequences: List[XComposeSequence],
+                  assignment: Dict[int, Tuple[str, ...]]) -> List[str]:
+    """Return a copy of the file's lines with the given sequences re-keyed."""
+    new_lines = list(lines)
+    for i, keys in assignment.items():
+        index = sequences[i].line_num - 1
+        lhs = '<Multi_key> ' + ' '.join(f'<{key}>' for key in keys)
+        new_lines[index] = MULTI_KEY_LHS.sub(lambda m: m.group(1) + lhs + m.group(3),
+                                             lines[index], count=1)
+    return new_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Propose shorter sequences for frequently used symbols',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s XCompose --corpus ~/papers          # Weights from your own documents
+  %(prog)s XCompose --weights weights.tsv      # Weights from a file
+  %(prog)s XCompose --corpus ~/papers --patch  # Only the unified diff
+  %(prog)s XCompose --corpus ~/papers --json   # Moves and savings as JSON
+
+Without --corpus or --weights every symbol weighs 1, which minimizes the
+total length of the table.
+        """
+    )
+
+    parser.add_argument(
+        'file',
+        nargs='?',
+        default='XCompose',
+        help='Path to XCompose file (default: XCompose)'
+    )
+    parser.add_argument(
+        '--corpus',
+        action='append',
+        metavar='PATH',
+        help='Weight symbols by their use in the .tex/.md/.txt files under PATH (repeatable)'
+    )
+    parser.add_argument(
+        '--weights',
+        metavar='FILE',
+        help='Weight symbols from FILE, one "symbol<TAB>weight" pair per line'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes for --corpus (default: one per CPU; 1 disables parallelism)'
+    )
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='Output moves and savings as JSON'
+    )
+    parser.add_argument(
+        '--patch',
+        action='store_true',
+        help='Output only the unified diff'
+    )
+
+    args = parser.parse_args()
+    if args.corpus and args.weights:
+        parser.error('--corpus and --weights are mutually exclusive')
+
+    sequences = parse_xcompose(args.file)
+    if sequences is None:
+        return 1
+    try:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"Error: Cannot read {args.file}: {e}", file=sys.stderr)
+        return 1
+
+    if args.weights:
+        try:
+            weights = load_weights(args.weights)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            print(f"Error: Cannot read weights file: {e}", file=sys.stderr)
+            return 1
+        source = args.weights
+    elif args.corpus:
+        outputs = sorted({seq.symbol for seq in sequences if not seq.symbol.isascii()})
+        corpus = count_corpus(args.corpus, outputs, args.jobs)
+        for error in corpus['errors']:
+            print(f"Warning: Cannot read {error}", file=sys.stderr)
+        if not corpus['files']:
+            print(f"Error: No corpus files in {', '.join(args.corpus)}", file=sys.stderr)
+            return 1
+        weights = dict(corpus['counts'])
+        source = f"{corpus['files']} corpus file(s), {sum(weights.values()):,} occurrences"
+    else:
+        weights = {seq.symbol: 1 for seq in sequences}
+        source = 'uniform (1 per symbol)'
+
+    # Only Multi_key lines can be rewritten in place
+    fixed = {i for i, seq in enumerate(sequences)
+             if not MULTI_KEY_LHS.match(lines[seq.line_num - 1])}
+
+    start = time.perf_counter()
+    optimizer = SequenceOptimizer(sequences, weights, fixed)
+    cost_before = optimizer.total_cost()
+    passes = optimizer.optimize()
+    cost_after = optimizer.total_cost()
+    elapsed = time.perf_counter() - start
+
+    shadows = optimizer.new_shadowing()
+    if shadows:
+        for short, long in shadows:
+            print(f"Error: {' '.join(optimizer.keys[short])} would shadow "
+                  f"{' '.join(optimizer.keys[long])}", file=sys.stderr)
+        return 2
+
+    moved = optimizer.moves()
+    assignment = {i: optimizer.keys[i] for i in moved}
+    diff = ''.join(difflib.unified_diff(lines, rewrite_lines(lines, sequences, assignment),
+                                        f'a/{args.file}', f'b/{args.file}'))
+    total_weight = sum(weights.get(symbol, 0) for symbol in optimizer.by_symbol)
+
+    def per_symbol(cost):
+        return cost / total_weight if total_weight else 0
+
+    if args.patch:
+        sys.stdout.write(diff)
+        return 0
+
+    if args.json:
+        print(json.dumps({
+            'metadata': {'file': args.file, 'weights': source, 'sequences': len(sequences),
+                         'movable': len(optimizer.movable), 'passes': passes},
+            'cost_before': cost_before,
+            'cost_after': cost_after,
+            'keystrokes_per_symbol_before': round(per_symbol(cost_before), 3),
+            'keystrokes_per_symbol_after': round(per_symbol(cost_after), 3),
+            'moves': [
+                {'symbol': sequences[i].symbol, 'line': sequences[i].line_num,
+                 'old_keys': sequences[i].key_string, 'new_keys': ' '.join(optimizer.keys[i]),
+                 'weight': weights.get(sequences[i].symbol, 0)}
+                for i in moved
+            ],
+            'diff': diff,
+        }, indent=2, ensure_ascii=False))
+        return 0
+
+    print("=" * 70)
+    print("XCompose Sequence Optimizer")
+    print("=" * 70)
+    print(f"\nWeights: {source}")
+    print(f"Sequences: {len(sequences)} ({len(optimizer.movable)} movable mnemonics)")
+    print(f"Search: {passes} pass(es) in {elapsed * 1000:.0f} ms")
+
+    if not moved:
+        print("\n✅ No shorter shadow-free assignment found")
+        return 0
+
+    print(f"\nProposed moves ({len(moved)}):")
+    for i in sorted(moved, key=lambda i: -weights.get(sequences[i].symbol, 0)):
+        seq = sequences[i]
+        print(f"  {seq.symbol:<4} {seq.key_string:<16} → {' '.join(optimizer.keys[i]):<12} "
+              f"(line {seq.line_num}, weight {weights.get(seq.symbol, 0):,g})")
+
+    saved = cost_before - cost_after
+    print(f"\nWeighted keystrokes: {cost_before:,.0f} → {cost_after:,.0f} "
+          f"(-{saved / cost_before * 100 if cost_before else 0:.1f}%)")
+    print(f"Keystrokes per symbol: {per_symbol(cost_before):.2f} → {per_symbol(cost_after):.2f}")
+    print("\nProposed diff:\n")
+    sys.stdout.write(diff)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
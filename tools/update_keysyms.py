@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+XCompose-STEM: Keysym Table Generator
+
+Regenerates tools/data/keysyms.tsv, the vendored keysym table behind the
+keysym registry in xcompose_lib, from X11/keysymdef.h (xorgproto).
+
+Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
+
+Copyright (c) 2025 Phil Bowens
+Repository: https://github.com/phil-bowens/xcompose-stem
+License: MIT
+
+Usage:
+    ./update_keysyms.py
+    ./update_keysyms.py --header /path/to/keysymdef.h
+"""
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+from xcompose_lib import KEYSYM_TABLE_PATH
+
+DEFAULT_HEADER = '/usr/include/X11/keysymdef.h'
+
+# The three line forms documented at the top of keysymdef.h:
+#   #define XK_name 0xvalue  /* U+XXXX NAME */        (exact Unicode mapping)
+#   #define XK_name 0xvalue  /*(U+XXXX NAME)*/        (approximate mapping)
+#   #define XK_name 0xvalue  /* free-form comment */  (no mapping)
+DEFINE_PATTERN = re.compile(r'^#define XK_([a-zA-Z_0-9]+)\s+0x([0-9a-fA-F]+)\s*(?:/\*(.*)\*/)?\s*$')
+UNICODE_COMMENT = re.compile(r'^\s*\(?U\+([0-9A-F]{4,6})\s')
+
+
+def keysym_codepoint(value: int, comment: str):
+    """Unicode codepoint a keysym types, or None for function keys."""
+    match = UNICODE_COMMENT.match(comment)
+    if match:
+        return int(match.group(1), 16)
+    # Latin-1 keysyms equal their codepoint (this also covers the
+    # deprecated aliases, which carry no U+ comment)
+    if 0x20 <= value <= 0x7e or 0xa0 <= value <= 0xff:
+        return value
+    # Directly encoded Unicode keysyms
+    if 0x01000100 <= value <= 0x0110ffff:
+        return value - 0x01000000
+    return None
+
+
+def read_header(header: Path):
+    """Yield (name, value, codepoint) for every keysym in keysymdef.h."""
+    with open(header, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = DEFINE_PATTERN.match(line.strip())
+            if not match:
+                continue
+            name, value, comment = match.group(1), int(match.group(2), 16), match.group(3) or ''
+            yield name, value, keysym_codepoint(value, comment)
+
+
+def write_table(rows, output: Path, source: str):
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(f"# Keysym table generated by tools/update_keysyms.py from {source}\n")
+        f.write("# Do not edit by hand; run `make keysyms` to regenerate.\n")
+        f.write("# name\tvalue\tcodepoint\n")
+        for name, value, codepoint in rows:
+            cp = f"{codepoint:04X}" if codepoint is not None else '-'
+            f.write(f"{name}\t0x{value:04x}\t{cp}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Regenerate the vendored keysym table from keysymdef.h',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                   # From /usr/include/X11/keysymdef.h
+  %(prog)s --header ~/src/xorgproto/include/X11/keysymdef.h
+        """
+    )
+    parser.add_argument(
+        '--header',
+        default=DEFAULT_HEADER,
+        help=f'Path to keysymdef.h (default: {DEFAULT_HEADER})'
+    )
+    parser.add_argument(
+        '--output',
+        default=str(KEYSYM_TABLE_PATH),
+        help='Table to write (default: tools/data/keysyms.tsv)'
+    )
+    args = parser.parse_args()
+
+    header = Path(args.header)
+    if not header.exists():
+        print(f"Error: Header not found: {header}", file=sys.stderr)
+        print("Install xorgproto (x11proto-dev) or pass --header", file=sys.stderr)
+        return 1
+
+    rows = list(read_header(header))
+    if not rows:
+        print(f"Error: No keysym definitions found in {header}", file=sys.stderr)
+        return 1
+
+    write_table(rows, Path(args.output), 'X11/keysymdef.h')
+    print(f"✓ Wrote {len(rows)} keysyms to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,8 +4,9 @@ XCompose-STEM: XCompose Validator
 
 Validation tool for XCompose files that checks for:
 - Prefix shadowing (complete sequences that shadow longer ones)
+- Cross-file shadowing against the system locale and user Compose files
 - Duplicate sequences (same sequence mapping to different symbols)
-- Syntax errors (malformed sequence definitions)
+- Syntax errors (malformed sequence definitions, unknown keysyms)
 - Statistics and coverage analysis
 
 Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
@@ -18,7 +19,7 @@ Exit codes:
     0: All validations passed
     1: Prefix shadowing detected
     2: Duplicate sequences detected
-    3: Syntax errors detected
+    3: Syntax errors (or unknown keysyms) detected
     4: Multiple validation failures
     5: File not found or read error
 
@@ -27,12 +28,32 @@ License: MIT
 """
 
 import argparse
+import bisect
+import contextlib
+import glob
+import hashlib
+import inspect
+import io
 import json
+import os
 import re
+import subprocess
 import sys
-from collections import defaultdict
+import time
+import unicodedata
+from collections import Counter, defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, Iterable, List, NamedTuple, Set, Tuple, Optional, Union
+
+from xcompose_lib import (REPORT_FORMATS, ComposeInclude, ComposeProduction, ComposeSyntaxError,
+                          CONFUSABLES_PATH, ComposeTrie, CrossFileIndex, Finding, ParseCache,
+                          ResultCache, SequenceTable, confusable_skeleton, format_codepoints,
+                          invisible_characters,
+                          find_locale_compose, format_result_cache_stats, is_known_keysym,
+                          lex_compose_line, open_emitter, parallel_imap)
+
+# ValidationError severity -> report (SARIF) level
+SEVERITY_LEVELS = {'critical': 'error', 'error': 'error', 'warning': 'warning', 'info': 'note'}
 
 
 class ValidationError:
@@ -56,190 +77,147 @@ class ValidationError:
             'details': self.details
         }
 
+    def to_finding(self, path: str) -> Finding:
+        """Convert to a Finding for the streaming report formats."""
+        return Finding(self.error_type, self.message, SEVERITY_LEVELS[self.severity],
+                       path, self.line_num, self.details)
 
-class XComposeValidator:
-    """Validates XCompose configuration files."""
 
-    def __init__(self, filepath: str, verbose: bool = False):
-        self.filepath = Path(filepath)
-        self.verbose = verbose
-        self.sequences: Dict[str, Tuple[str, int, str]] = {}  # seq -> (symbol, line_num, full_line)
+class ComposeLine(NamedTuple):
+    """One source line, tokenized once and shared by every rule."""
+    line_num: int
+    text: str  # Stripped line
+    item: Union[None, ComposeProduction, ComposeInclude]  # Lexed content
+    error: Optional[ComposeSyntaxError]  # Set if the line failed to lex
+    sequence: Optional[str] = None  # Normalized LHS of a production
+
+
+class ValidationRule:
+    """Base class for validation rules.
+
+    The engine tokenizes each line once and calls visit() on every
+    registered rule, in registration order; after the last line it calls
+    finish(), where table-wide rules (duplicates, shadowing) do their work.
+    Each rule reports into its own buffers, which are merged in rule order
+    so the report reads the same regardless of how lines interleave.
+
+    With --changed-since only changed lines are visited, plus unchanged
+    "context" lines defining related sequences; rules that set context
+    also see those (the rest only judge lines on their own).
+    """
+
+    name = ''
+    context = False  # Also visit unchanged context lines (--changed-since)
+
+    def __init__(self, validator: 'XComposeValidator'):
+        self.validator = validator
         self.errors: List[ValidationError] = []
         self.warnings: List[ValidationError] = []
 
-    def validate_all(self) -> bool:
-        """Run all validations. Returns True if all pass."""
-        if not self._load_file():
-            return False
+    def visit(self, line: ComposeLine):
+        """Inspect one line (called for every line of the file)."""
 
-        self._validate_syntax()
-        self._validate_duplicates()
-        self._validate_shadowing()
-        self._validate_comment_format()
+    def finish(self):
+        """Report table-wide findings after the last line."""
 
-        return len(self.errors) == 0
 
-    def _load_file(self) -> bool:
-        """Load and parse the XCompose file."""
-        if not self.filepath.exists():
-            self.errors.append(ValidationError(
-                'file_error',
-                f'File not found: {self.filepath}',
-                severity='critical'
-            ))
-            return False
+# Registered rule classes, in report order
+RULES: List[type] = []
 
-        try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                self.lines = f.readlines()
-        except UnicodeDecodeError as e:
-            self.errors.append(ValidationError(
-                'encoding_error',
-                f'Invalid UTF-8 encoding: {e}',
-                severity='critical'
-            ))
-            return False
-        except Exception as e:
-            self.errors.append(ValidationError(
-                'read_error',
-                f'Failed to read file: {e}',
-                severity='critical'
-            ))
-            return False
 
-        return True
+def register_rule(rule_class: type) -> type:
+    """Class decorator adding a ValidationRule to the engine."""
+    RULES.append(rule_class)
+    return rule_class
 
-    def _validate_syntax(self):
-        """Validate XCompose syntax and extract sequences."""
-        # Pattern with explicit Unicode codepoint
-        sequence_with_codepoint = re.compile(
-            r'^(<Multi_key>(?:\s+<[^>]+>)+)\s*:\s*"([^"]+)"\s+U([0-9A-Fa-f]{4,6})'
-        )
-        # Pattern without explicit codepoint (multi-char strings or composed sequences)
-        sequence_without_codepoint = re.compile(
-            r'^(<Multi_key>(?:\s+<[^>]+>)+)\s*:\s*"([^"]+)"\s*(?:#.*)?$'
-        )
-
-        for line_num, line in enumerate(self.lines, 1):
-            line_stripped = line.strip()
-
-            # Skip comments and empty lines
-            if not line_stripped or line_stripped.startswith('#'):
-                continue
 
-            # Check for sequence definitions
-            if '<Multi_key>' in line_stripped:
-                # Try pattern with codepoint first
-                match = sequence_with_codepoint.match(line_stripped)
-                has_codepoint = True
-
-                if not match:
-                    # Try pattern without explicit codepoint
-                    match = sequence_without_codepoint.match(line_stripped)
-                    has_codepoint = False
-
-                if not match:
-                    # Give helpful error messages
-                    if '<Multi_key>' in line_stripped and ':' not in line_stripped:
-                        self.errors.append(ValidationError(
-                            'syntax_error',
-                            'Missing colon separator',
-                            line_num,
-                            details={'line': line_stripped[:60]}
-                        ))
-                    elif '<Multi_key>' in line_stripped and '"' not in line_stripped:
-                        self.errors.append(ValidationError(
-                            'syntax_error',
-                            'Missing output string in quotes',
-                            line_num,
-                            details={'line': line_stripped[:60]}
-                        ))
-                    else:
-                        self.errors.append(ValidationError(
-                            'syntax_error',
-                            'Malformed sequence definition',
-                            line_num,
-                            details={'line': line_stripped[:60]}
-                        ))
-                    continue
-
-                sequence = match.group(1).strip()
-                symbol = match.group(2)
-
-                # If codepoint is provided, validate it
-                if has_codepoint:
-                    codepoint = match.group(3)
-
-                    # Only validate single-character outputs
-                    if len(symbol) == 1:
-                        expected_codepoint = f"{ord(symbol):04X}"
-                        if codepoint.upper() != expected_codepoint:
-                            self.warnings.append(ValidationError(
-                                'codepoint_mismatch',
-                                f'Symbol "{symbol}" (U+{expected_codepoint}) does not match declared codepoint U+{codepoint}',
-                                line_num,
-                                severity='warning',
-                                details={'sequence': sequence}
-                            ))
-                    elif len(symbol) > 1:
-                        self.warnings.append(ValidationError(
-                            'multi_char_with_codepoint',
-                            f'Multi-character output "{symbol}" has codepoint U+{codepoint} (unusual)',
-                            line_num,
-                            severity='warning',
-                            details={'sequence': sequence}
-                        ))
-
-                # Store sequence (don't add error for duplicates here - caught in duplicate check)
-                if sequence not in self.sequences:
-                    self.sequences[sequence] = (symbol, line_num, line_stripped)
-
-                # Validate sequence keys
-                self._validate_sequence_keys(sequence, line_num)
-
-    def _validate_sequence_keys(self, sequence: str, line_num: int):
-        """Validate individual keys in a sequence."""
-        keys = re.findall(r'<([^>]+)>', sequence)
-
-        for key in keys:
-            if key == 'Multi_key':
-                continue
+@register_rule
+class SyntaxRule(ValidationRule):
+    """Grammar errors, codepoint mismatches and unknown keysyms."""
+
+    name = 'syntax'
+
+    def __init__(self, validator: 'XComposeValidator'):
+        super().__init__(validator)
+        self.known_keysyms = set()
 
-            # Check for common mistakes
-            if ' ' in key:
+    def visit(self, line: ComposeLine):
+        if line.error is not None:
+            message = line.error.message
+            if message not in ('Missing colon separator', 'Missing output string in quotes'):
+                message = f'Malformed sequence definition ({message})'
+            self.errors.append(ValidationError(
+                'syntax_error',
+                message,
+                line.line_num,
+                details={'line': line.text[:60]}
+            ))
+            return
+
+        sequence = line.sequence
+        if sequence is None:
+            return
+
+        item = line.item
+        symbol = item.output
+        line_num = line.line_num
+
+        # If codepoint is provided, validate it
+        codepoint = item.codepoint
+        if codepoint and item.string is not None:
+            # Only validate single-character outputs
+            if len(symbol) == 1:
+                expected_codepoint = f"{ord(symbol):04X}"
+                if codepoint.upper() != expected_codepoint:
+                    self.warnings.append(ValidationError(
+                        'codepoint_mismatch',
+                        f'Symbol "{symbol}" (U+{expected_codepoint}) does not match declared codepoint U+{codepoint}',
+                        line_num,
+                        severity='warning',
+                        details={'sequence': sequence}
+                    ))
+            elif len(symbol) > 1:
                 self.warnings.append(ValidationError(
-                    'suspicious_key',
-                    f'Key contains space: "<{key}>"',
+                    'multi_char_with_codepoint',
+                    f'Multi-character output "{symbol}" has codepoint U+{codepoint} (unusual)',
                     line_num,
                     severity='warning',
                     details={'sequence': sequence}
                 ))
 
-            # Check for very long key names (likely error)
-            if len(key) > 20:
-                self.warnings.append(ValidationError(
-                    'suspicious_key',
-                    f'Unusually long key name: "<{key}>"',
+        # Validate individual keys against the keysym registry
+        known = self.known_keysyms
+        for key in item.keys:
+            if key in known:
+                continue
+            if is_known_keysym(key):
+                known.add(key)
+            else:
+                self.errors.append(ValidationError(
+                    'unknown_keysym',
+                    f'Unknown keysym "<{key}>"',
                     line_num,
-                    severity='warning',
-                    details={'sequence': sequence}
+                    details={'sequence': sequence, 'keysym': key}
                 ))
 
-    def _validate_duplicates(self):
-        """Check for duplicate sequence definitions."""
-        sequence_occurrences = defaultdict(list)
-
-        for line_num, line in enumerate(self.lines, 1):
-            line_stripped = line.strip()
-            if '<Multi_key>' in line_stripped:
-                match = re.match(r'^(<Multi_key>(?:\s+<[^>]+>)+)\s*:', line_stripped)
-                if match:
-                    sequence = match.group(1).strip()
-                    symbol_match = re.search(r':\s*"([^"]+)"', line_stripped)
-                    symbol = symbol_match.group(1) if symbol_match else '?'
-                    sequence_occurrences[sequence].append((symbol, line_num, line_stripped))
-
-        for sequence, occurrences in sequence_occurrences.items():
+
+@register_rule
+class DuplicateRule(ValidationRule):
+    """Sequences defined more than once."""
+
+    name = 'duplicates'
+    context = True
+
+    def __init__(self, validator: 'XComposeValidator'):
+        super().__init__(validator)
+        self.occurrences = defaultdict(list)
+
+    def visit(self, line: ComposeLine):
+        if line.sequence is not None:
+            self.occurrences[line.sequence].append((line.item.output, line.line_num))
+
+    def finish(self):
+        for sequence, occurrences in self.occurrences.items():
             if len(occurrences) > 1:
                 # Check if they map to the same symbol (harmless duplicate)
                 symbols = {occ[0] for occ in occurrences}
@@ -267,93 +245,177 @@ class XComposeValidator:
                         }
                     ))
 
-    def _validate_shadowing(self):
-        """Check for prefix shadowing issues."""
-        seq_list = sorted(self.sequences.keys())
 
-        for short in seq_list:
-            for long in seq_list:
-                if short != long and long.startswith(short + ' '):
-                    short_sym, short_line, _ = self.sequences[short]
-                    long_sym, long_line, _ = self.sequences[long]
+@register_rule
+class ShadowingRule(ValidationRule):
+    """Complete sequences that are a prefix of longer ones."""
 
-                    self.errors.append(ValidationError(
-                        'prefix_shadowing',
-                        f'{short} → {short_sym} shadows {long} → {long_sym}',
-                        short_line,
-                        severity='error',
-                        details={
-                            'shadowing_sequence': short,
-                            'shadowing_symbol': short_sym,
-                            'shadowing_line': short_line,
-                            'shadowed_sequence': long,
-                            'shadowed_symbol': long_sym,
-                            'shadowed_line': long_line
-                        }
-                    ))
+    name = 'shadowing'
 
-    def _validate_comment_format(self):
-        """Check for standardized comment format with type tags."""
-        valid_tags = {'ICONIC', 'MNEMONIC'}
-        tag_pattern = re.compile(r'#\s*\[(' + '|'.join(valid_tags) + r')\]\s+(.+)')
+    def finish(self):
+        sequences = self.validator.sequences
+        trie = ComposeTrie()
+        for seq, keys in self.validator.sequence_keys.items():
+            trie.insert(keys, seq)
 
-        tagged_count = 0
-        untagged_count = 0
+        # One trie traversal finds every (short, long) pair; report them in
+        # sequence order for stable output
+        shadowed = sorted((short, long) for _, short, _, long in trie.find_shadowing())
 
-        for line_num, line in enumerate(self.lines, 1):
-            line_stripped = line.strip()
+        for short, long in shadowed:
+            short_sym, short_line, _ = sequences[short]
+            long_sym, long_line, _ = sequences[long]
 
-            # Only check sequence lines
-            if not line_stripped or not line_stripped.startswith('<Multi_key>'):
-                continue
+            self.errors.append(ValidationError(
+                'prefix_shadowing',
+                f'{short} → {short_sym} shadows {long} → {long_sym}',
+                short_line,
+                severity='error',
+                details={
+                    'shadowing_sequence': short,
+                    'shadowing_symbol': short_sym,
+                    'shadowing_line': short_line,
+                    'shadowed_sequence': long,
+                    'shadowed_symbol': long_sym,
+                    'shadowed_line': long_line
+                }
+            ))
 
-            # Extract comment if present
-            if '#' not in line_stripped:
-                self.warnings.append(ValidationError(
-                    'missing_comment',
-                    'Sequence has no comment',
-                    line_num,
-                    severity='warning',
-                    details={'line': line_stripped[:60]}
-                ))
-                continue
 
-            comment_part = line_stripped.split('#', 1)[1]
+@register_rule
+class CrossFileShadowingRule(ValidationRule):
+    """Prefix shadowing between this file and the files loaded with it.
 
-            # Check if comment has type tag
-            match = tag_pattern.match('#' + comment_part)
+    Only active with --cross-file. Builds one prefix index over the system
+    locale Compose file, this file (following its includes) and the user's
+    ~/.XCompose, and reports pairs whose entries come from different files.
+    Pairs involving this file are errors; pairs between the other files are
+    warnings, since they are outside this file's control.
+    """
 
-            if match:
-                tagged_count += 1
-                tag_type = match.group(1)
-                description = match.group(2).strip()
+    name = 'cross_file'
 
-                # Validate description is not empty
-                if not description:
-                    self.warnings.append(ValidationError(
-                        'empty_description',
-                        f'Comment has tag [{tag_type}] but no description',
-                        line_num,
-                        severity='warning',
-                        details={'tag': tag_type}
-                    ))
+    def __init__(self, validator: 'XComposeValidator'):
+        super().__init__(validator)
+        self.items = []
 
-                # Optional: Check for proper description format
-                # Could add more checks here (capitalization, punctuation, etc.)
-            else:
-                untagged_count += 1
-                # Only warn if comment doesn't match expected format at all
-                if self.verbose:
-                    self.warnings.append(ValidationError(
-                        'untagged_comment',
-                        f'Comment not tagged with [ICONIC] or [MNEMONIC]',
-                        line_num,
-                        severity='info',
-                        details={'comment': comment_part.strip()[:40]}
-                    ))
+    def visit(self, line: ComposeLine):
+        if self.validator.cross_file is not None and line.item is not None:
+            self.items.append((line.line_num, line.item))
+
+    def finish(self):
+        if self.validator.cross_file is None:
+            return
+        system_compose, user_compose = self.validator.cross_file
+        own_path = os.path.realpath(self.validator.filepath)
+
+        index = CrossFileIndex(locale_compose=system_compose)
+        if system_compose:
+            index.add_file(system_compose)
+        index.add_items(own_path, self.items)
+        if user_compose:
+            index.add_file(user_compose)
+        self.validator.inputs.extend(index.files)
 
+        for problem in index.problems:
+            self.warnings.append(ValidationError(
+                'include_error',
+                problem,
+                severity='warning'
+            ))
+
+        def where(entry):
+            name = self.validator.filepath.name if entry.path == own_path else entry.path
+            return f'{name}:{entry.line_num}'
+
+        for short, long in index.find_shadowing():
+            involves_self = own_path in (short.path, long.path)
+            line_num = short.line_num if short.path == own_path else \
+                long.line_num if long.path == own_path else 0
+            report = self.errors if involves_self else self.warnings
+            report.append(ValidationError(
+                'cross_file_shadowing',
+                f'{short.production.sequence_string} → {short.production.output} ({where(short)}) '
+                f'shadows {long.production.sequence_string} → {long.production.output} ({where(long)})',
+                line_num,
+                severity='error' if involves_self else 'warning',
+                details={
+                    'shadowing_sequence': short.production.sequence_string,
+                    'shadowing_symbol': short.production.output,
+                    'shadowing_file': short.path,
+                    'shadowing_line': short.line_num,
+                    'shadowed_sequence': long.production.sequence_string,
+                    'shadowed_symbol': long.production.output,
+                    'shadowed_file': long.path,
+                    'shadowed_line': long.line_num
+                }
+            ))
+
+
+@register_rule
+class CommentFormatRule(ValidationRule):
+    """Standardized comment format with type tags."""
+
+    name = 'comment_format'
+    TAG_PATTERN = re.compile(r'#\s*\[(ICONIC|MNEMONIC)\]\s+(.+)')
+
+    def __init__(self, validator: 'XComposeValidator'):
+        super().__init__(validator)
+        self.tagged_count = 0
+        self.untagged_count = 0
+
+    def visit(self, line: ComposeLine):
+        # Only check Multi_key sequence lines
+        if line.sequence is None:
+            return
+        item = line.item
+        if item.keys[0] != 'Multi_key':
+            return
+
+        comment = item.comment
+        if comment is None:
+            self.warnings.append(ValidationError(
+                'missing_comment',
+                'Sequence has no comment',
+                line.line_num,
+                severity='warning',
+                details={'line': line.text[:60]}
+            ))
+            return
+
+        # Check if comment has type tag
+        match = self.TAG_PATTERN.match('#' + comment)
+
+        if match:
+            self.tagged_count += 1
+            tag_type = match.group(1)
+            description = match.group(2).strip()
+
+            # Validate description is not empty
+            if not description:
+                self.warnings.append(ValidationError(
+                    'empty_description',
+                    f'Comment has tag [{tag_type}] but no description',
+                    line.line_num,
+                    severity='warning',
+                    details={'tag': tag_type}
+                ))
+        else:
+            self.untagged_count += 1
+            # Only warn if comment doesn't match expected format at all
+            if self.validator.verbose:
+                self.warnings.append(ValidationError(
+                    'untagged_comment',
+                    f'Comment not tagged with [ICONIC] or [MNEMONIC]',
+                    line.line_num,
+                    severity='info',
+                    details={'comment': comment[:40]}
+                ))
+
+    def finish(self):
         # Add summary info
-        if self.verbose and (tagged_count > 0 or untagged_count > 0):
+        tagged_count, untagged_count = self.tagged_count, self.untagged_count
+        if self.validator.verbose and (tagged_count > 0 or untagged_count > 0):
             total = tagged_count + untagged_count
             pct = (tagged_count / total * 100) if total > 0 else 0
             self.warnings.append(ValidationError(
@@ -364,20 +426,502 @@ class XComposeValidator:
                 details={'tagged': tagged_count, 'untagged': untagged_count}
             ))
 
+
+@register_rule
+class UnicodeRule(ValidationRule):
+    """Outputs that are not NFC-normalized or contain invisible characters."""
+
+    name = 'unicode'
+
+    def visit(self, line: ComposeLine):
+        if line.sequence is None:
+            return
+        output = line.item.string
+        if not output or output.isascii():
+            return
+
+        if not unicodedata.is_normalized('NFC', output):
+            normalized = unicodedata.normalize('NFC', output)
+            self.warnings.append(ValidationError(
+                'not_nfc',
+                f'Output "{output}" ({format_codepoints(output)}) is not NFC-normalized '
+                f'(NFC: "{normalized}" {format_codepoints(normalized)})',
+                line.line_num,
+                severity='warning',
+                details={'sequence': line.sequence, 'nfc': normalized}
+            ))
+
+        invisible = invisible_characters(output)
+        if not invisible:
+            return
+        names = ', '.join(f'U+{ord(char):04X} {unicodedata.name(char, "")}'.rstrip()
+                          for char in dict.fromkeys(invisible))
+        if len(invisible) == len(output):
+            # A sequence whose whole purpose is to type e.g. ZERO WIDTH JOINER
+            if self.validator.verbose:
+                self.warnings.append(ValidationError(
+                    'invisible_output',
+                    f'Output is invisible: {names}',
+                    line.line_num,
+                    severity='info',
+                    details={'sequence': line.sequence}
+                ))
+        elif not self._is_emoji_zwj_sequence(output):
+            self.warnings.append(ValidationError(
+                'invisible_character',
+                f'Output "{output}" contains invisible character(s): {names}',
+                line.line_num,
+                severity='warning',
+                details={'sequence': line.sequence, 'codepoints': format_codepoints(output)}
+            ))
+
+    @staticmethod
+    def _is_emoji_zwj_sequence(output: str) -> bool:
+        """Whether every invisible character is a ZWJ joining two symbols (👩‍🔬)."""
+        for i, char in enumerate(output):
+            if char == '\u200d':
+                if not (0 < i < len(output) - 1 and unicodedata.category(output[i - 1]) == 'So'
+                        and unicodedata.category(output[i + 1]) == 'So'):
+                    return False
+            elif char not in '\ufe0e\ufe0f' and invisible_characters(char):
+                return False
+        return True
+
+
+def equivalence_key(text: str) -> str:
+    """NFD with plain compatibility mappings applied: µ MICRO SIGN, K KELVIN
+    SIGN and Ω OHM SIGN fold to μ, K and Ω. Tagged compatibility forms
+    (<super>, <sub>, <font>, ...) are kept, so ² and ₂ stay distinct."""
+    return unicodedata.normalize('NFD', ''.join(
+        unicodedata.normalize('NFKD', char)
+        if unicodedata.decomposition(char).startswith('<compat>') else char
+        for char in unicodedata.normalize('NFD', text)))
+
+
+def lookalike_key(output: str) -> str:
+    """Outputs that are equivalent or look alike share this key."""
+    return confusable_skeleton(equivalence_key(output))
+
+
+@register_rule
+class ConfusableRule(ValidationRule):
+    """Different outputs that look alike.
+
+    Outputs that are canonically or compatibility equivalent (Ω U+2126 and
+    U+03A9, µ U+00B5 and μ U+03BC) are warnings. Outputs that only share a
+    confusables prototype (Σ U+03A3 and ∑ U+2211) are usually deliberate
+    and are listed with --verbose.
+
+    Indexes every output by its confusable skeleton, so lookalikes are
+    found in one pass instead of comparing outputs pairwise.
+    """
+
+    name = 'confusables'
+    context = True
+
+    def __init__(self, validator: 'XComposeValidator'):
+        super().__init__(validator)
+        # skeleton -> {output: (sequence, line_num)} for the first definition of each output
+        self.index: Dict[str, Dict[str, Tuple[str, int]]] = defaultdict(dict)
+
+    def visit(self, line: ComposeLine):
+        if line.sequence is None:
+            return
+        output = line.item.string
+        if not output or output.isspace():
+            return
+        outputs = self.index[lookalike_key(output)]
+        if output not in outputs:
+            outputs[output] = (line.sequence, line.line_num)
+
+    def finish(self):
+        groups = [sorted(outputs.items(), key=lambda entry: entry[1][1])
+                  for outputs in self.index.values() if len(outputs) > 1]
+        # Report each group at its last definition, in line order
+        for entries in sorted(groups, key=lambda entries: entries[-1][1][1]):
+            equivalent = defaultdict(list)
+            for entry in entries:
+                equivalent[equivalence_key(entry[0])].append(entry)
+            for subgroup in equivalent.values():
+                if len(subgroup) > 1:
+                    self._report(subgroup, 'equivalent_output', 'Outputs are equivalent', 'warning')
+            if len(equivalent) > 1 and self.validator.verbose:
+                self._report(entries, 'confusable_output', 'Outputs look alike', 'info')
+
+    def _report(self, entries: List[Tuple[str, Tuple[str, int]]], error_type: str,
+                label: str, severity: str):
+        described = ' and '.join(f'"{output}" {format_codepoints(output)} ({sequence})'
+                                 for output, (sequence, _) in entries)
+        self.warnings.append(ValidationError(
+            error_type,
+            f'{label}: {described}',
+            entries[-1][1][1],
+            severity=severity,
+            details={'outputs': [{'symbol': output, 'codepoints': format_codepoints(output),
+                                  'sequence': sequence, 'line': line_num}
+                                 for output, (sequence, line_num) in entries]}
+        ))
+
+
+HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class GitError(Exception):
+    """git is missing, or a git command failed."""
+
+
+class GitChanges(NamedTuple):
+    """How a file differs from its version at a git revision."""
+    old_blob: Optional[str]  # Blob id at the revision (None if the file is new)
+    hunks: List[Tuple[int, int, int, int]]  # (old start, old count, new start, new count)
+    added: List[Tuple[int, str]]  # (new line number, text) of added/changed lines
+
+
+def _git(args: List[str], cwd: Path, check: bool = True) -> Optional[str]:
+    """Run a git command; return stdout, or None if check is False and it failed."""
+    try:
+        result = subprocess.run(['git'] + args, cwd=str(cwd), capture_output=True)
+    except OSError as e:
+        raise GitError(f'Cannot run git: {e}')
+    if result.returncode != 0:
+        if not check:
+            return None
+        message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise GitError(message[0] if message else f"git {' '.join(args)} failed")
+    return result.stdout.decode('utf-8')
+
+
+def read_git_changes(filepath: Path, rev: str) -> GitChanges:
+    """Read `git diff -U0 <rev>` for one file (working tree vs. revision)."""
+    cwd = filepath.parent
+    name = f'./{filepath.name}'
+    _git(['rev-parse', '--verify', '--quiet', f'{rev}^{{commit}}'], cwd)
+    blob = _git(['rev-parse', '--verify', '--quiet', f'{rev}:{name}'], cwd, check=False)
+
+    if blob is None:
+        # Not in the revision (e.g. a new file): every line is added
+        with open(filepath, 'r', encoding='utf-8') as f:
+            added = [(line_num, line.rstrip('\n')) for line_num, line in enumerate(f, 1)]
+        return GitChanges(None, [(0, 0, 1, len(added))], added)
+
+    diff = _git(['diff', '-U0', '--no-color', '--no-ext-diff', '--no-textconv', rev, '--', name], cwd)
+    hunks = []
+    added = []
+    new_line = None
+    for line in diff.splitlines():
+        if line.startswith('@@'):
+            match = HUNK_HEADER.match(line)
+            if match is None:
+                raise GitError(f'Cannot parse diff hunk header: {line}')
+            old_start, old_count, new_start, new_count = (
+                int(value) if value is not None else 1 for value in match.groups())
+            hunks.append((old_start, old_count, new_start, new_count))
+            new_line = new_start
+        elif new_line is not None and line.startswith('+'):
+            added.append((new_line, line[1:]))
+            new_line += 1
+    return GitChanges(blob.strip(), hunks, added)
+
+
+def build_sequence_index(text: str) -> Tuple[Dict, Dict, Dict]:
+    """Index the sequences of one version of a file, for --changed-since.
+
+    Returns:
+        (definitions, extensions, lookalikes): keysyms -> line numbers of
+        every definition, keysym prefix -> keysyms of every sequence that
+        strictly extends it, and confusable skeleton -> (line number,
+        output) of every string output. Plain dicts and tuples, so they
+        marshal.
+    """
+    definitions: Dict[Tuple[str, ...], List[int]] = {}
+    extensions: Dict[Tuple[str, ...], List[Tuple[str, ...]]] = defaultdict(list)
+    lookalikes: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    for line_num, line in enumerate(text.split('\n'), 1):
+        item, _, sequence = XComposeValidator._lex(line.strip())
+        if sequence is None:
+            continue
+        keys = item.keys
+        lines = definitions.get(keys)
+        if lines is None:
+            lines = definitions[keys] = []
+            for length in range(1, len(keys)):
+                extensions[keys[:length]].append(keys)
+        lines.append(line_num)
+        if item.string:
+            lookalikes[lookalike_key(item.string)].append((line_num, item.string))
+    return definitions, dict(extensions), dict(lookalikes)
+
+
+def load_sequence_index(filepath: Path, blob: str) -> Tuple[Dict, Dict, Dict]:
+    """build_sequence_index() of a git blob, cached under the blob id."""
+    # Lookalike keys depend on the confusables table, the Unicode version
+    # and the folding code, so all of them are part of the key
+    digest = hashlib.blake2b(digest_size=8)
+    try:
+        digest.update(CONFUSABLES_PATH.read_bytes())
+    except OSError:
+        pass
+    digest.update(unicodedata.unidata_version.encode('utf-8'))
+    for function in (equivalence_key, lookalike_key):
+        digest.update(inspect.getsource(function).encode('utf-8'))
+    key = f'{blob}-{digest.hexdigest()}'
+    cache = ParseCache()
+    index = cache.get_content('changed-since', key)
+    if index is None:
+        index = build_sequence_index(_git(['cat-file', 'blob', blob], filepath.parent))
+        cache.put_content('changed-since', key, index)
+    return index
+
+
+def map_old_lines(hunks: List[Tuple[int, int, int, int]]) -> Callable[[int], Optional[int]]:
+    """Return old line number -> new line number (None if removed) for a diff."""
+    ends = []  # Last old line each hunk touches (insertions: the line before)
+    shifts = [0]  # Cumulative line shift after each hunk
+    for old_start, old_count, _, new_count in hunks:
+        ends.append(old_start + old_count - 1 if old_count else old_start)
+        shifts.append(shifts[-1] + new_count - old_count)
+
+    def new_line(old_line: int) -> Optional[int]:
+        i = bisect.bisect_left(ends, old_line)
+        if i < len(hunks) and hunks[i][1] and hunks[i][0] <= old_line:
+            return None  # Removed or changed
+        return old_line + shifts[i]
+
+    return new_line
+
+
+class XComposeValidator:
+    """Validates XCompose configuration files."""
+
+    def __init__(self, filepath: str, verbose: bool = False, timings: bool = False,
+                 lex_cache: Optional[Dict[str, tuple]] = None,
+                 cross_file: Optional[Tuple[Optional[str], Optional[str]]] = None,
+                 sink: Optional[Callable[[ValidationError], None]] = None):
+        self.filepath = Path(filepath)
+        self.verbose = verbose
+        # (system Compose, user Compose) to check shadowing against, if any
+        self.cross_file = cross_file
+        # If set, findings are passed to sink as they are produced instead of
+        # being collected in errors/warnings; only their counts are kept
+        self.sink = sink
+        self.streamed_errors: Counter = Counter()  # error_type -> count
+        self.streamed_warnings = 0
+        self.inputs: List[str] = []  # Other files read (e.g. by --cross-file)
+        # Optional line text -> lexed result memo, shared across runs (watch mode)
+        self.lex_cache = lex_cache
+        # Per-rule (name, seconds) after validate_all(), if timings requested
+        self.timings: Optional[List[Tuple[str, float]]] = [] if timings else None
+        self.sequences: Dict[str, Tuple[str, int, str]] = {}  # seq -> (symbol, line_num, full_line)
+        self.sequence_keys: Dict[str, Tuple[str, ...]] = {}  # seq -> keysyms (incl. Multi_key)
+        # With validate_changes(): revision and line counts of the checked scope
+        self.scope: Optional[Dict] = None
+        self.errors: List[ValidationError] = []
+        self.warnings: List[ValidationError] = []
+
+    def validate_all(self) -> bool:
+        """Run all validations in one pass over the file. Returns True if all pass."""
+        if not self._load_file():
+            self._stream(self.errors, self.warnings)
+            return False
+        return self.validate_lines(self.lines)
+
+    def validate_lines(self, lines: List[str]) -> bool:
+        """Run all validations over an in-memory buffer. Returns True if all pass."""
+        self.lines = lines
+        return self._run(enumerate(lines, 1))
+
+    def validate_changes(self, rev: str) -> bool:
+        """Validate only what changed since a git revision. Returns True if all pass.
+
+        Added and changed lines go through every rule. Duplicate, shadowing
+        and lookalike checks also see the unchanged definitions whose
+        keysyms equal, prefix or extend a changed sequence, or whose output
+        looks like a changed output, found through an index of the file at
+        the revision (cached by blob id), so every conflict involving a
+        changed line is reported, as a full run would, without lexing the
+        rest of the file.
+        """
+        if not self._load_file():
+            self._stream(self.errors, self.warnings)
+            return False
+        try:
+            changes = read_git_changes(self.filepath, rev)
+            definitions, extensions, lookalikes = load_sequence_index(self.filepath, changes.old_blob) \
+                if changes.old_blob else ({}, {}, {})
+        except (GitError, OSError, UnicodeDecodeError) as e:
+            self.errors.append(ValidationError(
+                'git_error',
+                f'Cannot read changes since {rev}: {e}',
+                severity='critical'
+            ))
+            self._stream(self.errors, self.warnings)
+            return False
+
+        if self.lex_cache is None:
+            self.lex_cache = {}  # Changed lines are lexed here and again in _run()
+        new_line = map_old_lines(changes.hunks)
+        changed = {line_num for line_num, _ in changes.added if line_num <= len(self.lines)}
+        context = set()
+        for line_num in changed:
+            text = self.lines[line_num - 1].strip()
+            item, _, sequence = self.lex_cache.setdefault(text, self._lex(text))
+            if sequence is None:
+                continue
+            keys = item.keys
+            related = [keys[:length] for length in range(1, len(keys) + 1)]
+            related.extend(extensions.get(keys, ()))
+            old_lines = [old_line for other in related for old_line in definitions.get(other, ())]
+            if item.string:
+                old_lines.extend(old_line for old_line, output in
+                                 lookalikes.get(lookalike_key(item.string), ())
+                                 if output != item.string)
+            for old_line in old_lines:
+                line = new_line(old_line)
+                if line is not None:
+                    context.add(line)
+        context -= changed
+
+        self.scope = {'since': rev, 'changed_lines': len(changed), 'context_lines': len(context)}
+        return self._run([(line_num, self.lines[line_num - 1]) for line_num in sorted(changed | context)],
+                         context)
+
+    def _run(self, numbered_lines: Iterable[Tuple[int, str]], context: Set[int] = frozenset()) -> bool:
+        """Visit (line number, raw line) pairs with every rule, then finish.
+
+        Lines in context are only shown to rules that accept context lines.
+        """
+        timed = self.timings is not None
+        clock = time.perf_counter
+        rules = [rule_class(self) for rule_class in RULES]
+        visits = [(rule, rule.visit) for rule in rules if type(rule).visit is not ValidationRule.visit]
+        context_visits = [(rule, visit) for rule, visit in visits if rule.context]
+        spent = dict.fromkeys([rule.name for rule in rules], 0.0)
+        tokenize_time = 0.0
+        streaming = self.sink is not None
+
+        for line_num, raw in numbered_lines:
+            start = clock() if timed else 0.0
+            line = self._tokenize(line_num, raw)
+            line_visits = context_visits if line_num in context else visits
+            if timed:
+                tokenize_time += clock() - start
+                for rule, visit in line_visits:
+                    start = clock()
+                    visit(line)
+                    spent[rule.name] += clock() - start
+            else:
+                for _, visit in line_visits:
+                    visit(line)
+            if streaming:
+                for rule, _ in line_visits:
+                    if rule.errors or rule.warnings:
+                        self._stream(rule.errors, rule.warnings)
+
+        for rule in rules:
+            start = clock() if timed else 0.0
+            rule.finish()
+            if timed:
+                spent[rule.name] += clock() - start
+            if streaming:
+                self._stream(rule.errors, rule.warnings)
+
+        # Merge per-rule buffers in rule order
+        for rule in rules:
+            self.errors.extend(rule.errors)
+            self.warnings.extend(rule.warnings)
+
+        if timed:
+            self.timings = [('tokenize', tokenize_time)] + list(spent.items())
+
+        return len(self.errors) == 0 and not self.streamed_errors
+
+    def _stream(self, errors: List[ValidationError], warnings: List[ValidationError]):
+        """Hand buffered findings to the sink (if streaming) and drop them."""
+        if self.sink is None:
+            return
+        for error in errors:
+            self.streamed_errors[error.error_type] += 1
+            self.sink(error)
+        for warning in warnings:
+            self.streamed_warnings += 1
+            self.sink(warning)
+        errors.clear()
+        warnings.clear()
+
+    def _tokenize(self, line_num: int, raw: str) -> ComposeLine:
+        """Lex one line and record sequence definitions."""
+        text = raw.strip()
+        cache = self.lex_cache
+        lexed = cache.get(text) if cache is not None else None
+        if lexed is None:
+            lexed = self._lex(text)
+            if cache is not None:
+                cache[text] = lexed
+
+        item, error, sequence = lexed
+        if sequence is None:
+            return ComposeLine(line_num, text, item, error)
+
+        # First definition wins; later ones are reported as duplicates
+        if sequence not in self.sequences:
+            self.sequences[sequence] = (item.output, line_num, text)
+            self.sequence_keys[sequence] = item.keys
+
+        return ComposeLine(line_num, text, item, None, sequence)
+
+    @staticmethod
+    def _lex(text: str) -> tuple:
+        """(item, error, normalized sequence) for one stripped line."""
+        try:
+            item = lex_compose_line(text)
+        except ComposeSyntaxError as e:
+            return None, e, None
+        if item is None or item.__class__ is not ComposeProduction:
+            return item, None, None
+        return item, None, item.sequence_string
+
+    def _load_file(self) -> bool:
+        """Load and parse the XCompose file."""
+        if not self.filepath.exists():
+            self.errors.append(ValidationError(
+                'file_error',
+                f'File not found: {self.filepath}',
+                severity='critical'
+            ))
+            return False
+
+        try:
+            with open(self.filepath, 'r', encoding='utf-8') as f:
+                self.lines = f.readlines()
+        except UnicodeDecodeError as e:
+            self.errors.append(ValidationError(
+                'encoding_error',
+                f'Invalid UTF-8 encoding: {e}',
+                severity='critical'
+            ))
+            return False
+        except Exception as e:
+            self.errors.append(ValidationError(
+                'read_error',
+                f'Failed to read file: {e}',
+                severity='critical'
+            ))
+            return False
+
+        return True
+
     def get_statistics(self) -> Dict:
         """Get statistics about the XCompose file."""
-        if not self.sequences:
+        if not self.sequences or self.scope is not None:
             return {}
 
-        # Analyze sequence lengths
-        lengths = [len(re.findall(r'<[^>]+>', seq)) - 1 for seq in self.sequences.keys()]  # -1 for Multi_key
+        # Build a columnar table of keys (excluding Multi_key)
+        table = SequenceTable()
+        for keys in self.sequence_keys.values():
+            table.append(keys[1:] if keys[0] == 'Multi_key' else keys)
 
-        # Analyze prefixes
-        prefixes = defaultdict(int)
-        for seq in self.sequences.keys():
-            keys = re.findall(r'<([^>]+)>', seq)
-            if len(keys) >= 2:  # Multi_key + first key
-                prefixes[keys[1]] += 1
+        # Analyze prefixes (first key after Multi_key)
+        prefixes = table.prefix_counts()
 
         # Most common prefixes
         top_prefixes = sorted(prefixes.items(), key=lambda x: x[1], reverse=True)[:10]
@@ -385,11 +929,7 @@ class XComposeValidator:
         return {
             'total_sequences': len(self.sequences),
             'total_lines': len(self.lines),
-            'sequence_length': {
-                'min': min(lengths) if lengths else 0,
-                'max': max(lengths) if lengths else 0,
-                'avg': sum(lengths) / len(lengths) if lengths else 0
-            },
+            'sequence_length': table.length_summary(),
             'unique_prefixes': len(prefixes),
             'top_prefixes': [{'prefix': k, 'count': v} for k, v in top_prefixes],
             'errors': len(self.errors),
@@ -404,6 +944,9 @@ class XComposeValidator:
         print("=" * 70)
         print(f"XCompose Validation Report")
         print(f"File: {self.filepath.name}")
+        if self.scope is not None:
+            print(f"Scope: changes since {self.scope['since']} ({self.scope['changed_lines']} changed "
+                  f"line(s), {self.scope['context_lines']} related line(s))")
         print("=" * 70)
 
         # Print statistics
@@ -476,21 +1019,35 @@ class XComposeValidator:
             print(f"   {len(self.errors)} error(s) must be fixed")
         print("=" * 70)
 
+    def print_timings(self):
+        """Print wall time and line throughput per rule (after --timings)."""
+        if not self.timings:
+            return
+        lines = len(self.lines)
+        total = sum(seconds for _, seconds in self.timings)
+
+        print(f"\n⏱  Rule timings ({lines} lines):")
+        print(f"   {'Rule':<18} {'ms':>8} {'Klines/s':>10} {'Share':>7}")
+        for name, seconds in self.timings:
+            rate = f"{lines / seconds / 1000:.0f}" if seconds else '-'
+            share = seconds / total * 100 if total else 0
+            print(f"   {name:<18} {seconds * 1000:>8.2f} {rate:>10} {share:>6.1f}%")
+        print(f"   {'total':<18} {total * 1000:>8.2f}")
+
     def get_exit_code(self) -> int:
         """Get appropriate exit code based on validation results."""
-        if not self.errors:
+        error_types = {error.error_type for error in self.errors} | set(self.streamed_errors)
+        if not error_types:
             return 0
 
-        error_types = {error.error_type for error in self.errors}
-
         # Critical errors
-        if 'file_error' in error_types or 'read_error' in error_types or 'encoding_error' in error_types:
+        if error_types & {'file_error', 'read_error', 'encoding_error', 'git_error'}:
             return 5
 
         # Check for specific error types
-        has_shadowing = 'prefix_shadowing' in error_types
+        has_shadowing = 'prefix_shadowing' in error_types or 'cross_file_shadowing' in error_types
         has_duplicates = 'duplicate_conflict' in error_types
-        has_syntax = 'syntax_error' in error_types
+        has_syntax = 'syntax_error' in error_types or 'unknown_keysym' in error_types
 
         if has_shadowing and has_duplicates:
             return 4
@@ -505,13 +1062,112 @@ class XComposeValidator:
 
     def to_json(self) -> str:
         """Export results as JSON."""
-        return json.dumps({
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_dict(self) -> Dict:
+        """Results as a JSON-serializable dict."""
+        result = {
             'file': str(self.filepath),
             'statistics': self.get_statistics(),
             'errors': [e.to_dict() for e in self.errors],
             'warnings': [w.to_dict() for w in self.warnings],
             'passed': len(self.errors) == 0
-        }, indent=2)
+        }
+        if self.scope is not None:
+            result['scope'] = self.scope
+        if self.timings:
+            result['timings'] = [{'rule': name, 'seconds': seconds}
+                                 for name, seconds in self.timings]
+        return result
+
+
+def aggregate_exit_code(codes: List[int]) -> int:
+    """Combine per-file exit codes, keeping the single-file 0-5 meanings.
+
+    0 if every file passed, 5 if any file could not be read, the shared
+    code if all failing files failed the same way, and 4 otherwise.
+    """
+    failures = {code for code in codes if code != 0}
+    if not failures:
+        return 0
+    if 5 in failures:
+        return 5
+    if len(failures) == 1:
+        return failures.pop()
+    return 4
+
+
+def expand_file_args(patterns: List[str]) -> List[str]:
+    """Expand glob patterns, keeping order and dropping repeats.
+
+    Patterns that match nothing are kept as-is, so a missing file is still
+    reported (exit code 5) rather than silently skipped.
+    """
+    files = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else []
+        for path in matches or [pattern]:
+            if path not in seen and not os.path.isdir(path):
+                seen.add(path)
+                files.append(path)
+    return files
+
+
+def validate_file(job: Tuple, sink: Optional[Callable[[Finding], None]] = None) -> Dict:
+    """Validate one file and capture its report (runs in worker processes).
+
+    Args:
+        job: (filepath, verbose, timings, output, show_warnings, show_stats,
+            cross_file, since), where output is 'json', 'quiet', 'text' or a
+            streaming format, cross_file is None or (system Compose, user
+            Compose), and since is None or the git revision to validate
+            changes against
+        sink: Called with each Finding as it is produced, when validating
+            in-process in a streaming format
+
+    Returns:
+        Dict with 'file', 'exit_code', 'passed', 'errors', 'inputs' (other
+        files read) and either
+        'result' (json), 'report' (printed text) or, for a streaming format
+        without a sink, 'findings'
+    """
+    filepath, verbose, timings, output, show_warnings, show_stats, cross_file, since = job
+    streaming = output in REPORT_FORMATS
+    findings = []
+    if streaming:
+        emit = sink if sink is not None else findings.append
+        validator_sink = lambda error: emit(error.to_finding(filepath))
+    else:
+        validator_sink = None
+    validator = XComposeValidator(filepath, verbose=verbose, timings=timings,
+                                  cross_file=cross_file, sink=validator_sink)
+    if since is not None:
+        validator.validate_changes(since)
+    else:
+        validator.validate_all()
+
+    errors = len(validator.errors) + sum(validator.streamed_errors.values())
+    summary = {
+        'file': filepath,
+        'exit_code': validator.get_exit_code(),
+        'passed': not errors,
+        'errors': errors,
+        'inputs': validator.inputs,
+    }
+    if streaming:
+        summary['warnings'] = len(validator.warnings) + validator.streamed_warnings
+        if sink is None:
+            summary['findings'] = findings
+    elif output == 'json':
+        summary['result'] = validator.to_dict()
+    elif output == 'text':
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            validator.print_results(show_warnings=show_warnings, show_stats=show_stats)
+            validator.print_timings()
+        summary['report'] = buffer.getvalue()
+    return summary
 
 
 def main():
@@ -525,22 +1181,34 @@ Exit codes:
   2: Duplicate sequences detected
   3: Syntax errors detected
   4: Multiple validation failures
-  5: File not found or read error
+  5: File not found, read error or git failure (--changed-since)
+
+Several files exit with 0 if all pass, 5 if any could not be read, the
+shared code if every failing file failed the same way, and 4 otherwise.
 
 Examples:
   %(prog)s XCompose                    # Validate XCompose file
+  %(prog)s variants/*.XCompose -j 8    # Validate many files in parallel
   %(prog)s XCompose -v                 # Verbose output
   %(prog)s XCompose --json             # JSON output for CI/CD
+  %(prog)s XCompose --format jsonl     # One JSON finding per line, streamed
+  %(prog)s XCompose --format sarif     # SARIF log for code scanning
   %(prog)s XCompose --no-warnings      # Hide warnings
   %(prog)s XCompose --quiet            # Only show pass/fail
+  %(prog)s XCompose --timings          # Per-rule wall time and throughput
+  %(prog)s XCompose --cross-file       # Also check against system/user Compose
+  %(prog)s XCompose --changed-since HEAD   # Only what changed since a git revision
+  %(prog)s XCompose --no-cache         # Always revalidate
+  %(prog)s --cache-stats               # Result cache hit rate and time saved
         """
     )
 
     parser.add_argument(
-        'file',
-        nargs='?',
-        default='./XCompose',
-        help='Path to XCompose file (default: ./XCompose)'
+        'files',
+        nargs='*',
+        metavar='file',
+        default=['./XCompose'],
+        help='XCompose files or glob patterns (default: ./XCompose)'
     )
 
     parser.add_argument(
@@ -558,7 +1226,15 @@ Examples:
     parser.add_argument(
         '--json',
         action='store_true',
-        help='Output results as JSON'
+        help='Output results as JSON (same as --format json)'
+    )
+
+    parser.add_argument(
+        '--format',
+        choices=['text', 'json'] + list(REPORT_FORMATS),
+        default='text',
+        help='Output format: text report, one JSON document, JSON Lines '
+             '(one finding per line, streamed) or SARIF (default: text)'
     )
 
     parser.add_argument(
@@ -573,29 +1249,179 @@ Examples:
         help='Do not show statistics'
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        '--timings',
+        action='store_true',
+        help='Report wall time and line throughput per validation rule'
+    )
 
-    # Create validator
-    validator = XComposeValidator(args.file, verbose=args.verbose)
+    parser.add_argument(
+        '--cross-file',
+        action='store_true',
+        help='Also report shadowing between this file, the system locale Compose '
+             'file and ~/.XCompose (as loaded with include "%%L")'
+    )
 
-    # Run validation
-    validator.validate_all()
+    parser.add_argument(
+        '--system-compose',
+        metavar='FILE',
+        help='System Compose file for --cross-file (default: the current locale\'s)'
+    )
+
+    parser.add_argument(
+        '--user-compose',
+        metavar='FILE',
+        help='User Compose file for --cross-file (default: ~/.XCompose, if present)'
+    )
+
+    parser.add_argument(
+        '--changed-since',
+        metavar='REV',
+        help='Only validate lines changed since git revision REV (plus the '
+             'unchanged sequences they conflict with); statistics are skipped'
+    )
+
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='Worker processes when validating several files '
+             '(default: one per CPU; 1 disables parallelism)'
+    )
+
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not replay or store cached results'
+    )
+
+    parser.add_argument(
+        '--cache-stats',
+        action='store_true',
+        help='Show result cache hit rate and time saved, and exit'
+    )
+
+    args = parser.parse_args()
+
+    if args.cache_stats:
+        print(format_result_cache_stats())
+        return 0
+
+    files = expand_file_args(args.files)
+    if not files:
+        print("Error: No files to validate", file=sys.stderr)
+        return 5
+
+    cross_file = None
+    if args.cross_file:
+        system_compose = args.system_compose or find_locale_compose()
+        if not system_compose:
+            print("Warning: No system Compose file found for this locale "
+                  "(use --system-compose)", file=sys.stderr)
+        user_compose = args.user_compose
+        if user_compose is None and os.path.exists(os.path.expanduser('~/.XCompose')):
+            user_compose = os.path.expanduser('~/.XCompose')
+        cross_file = (system_compose, user_compose)
 
-    # Output results
     if args.json:
-        print(validator.to_json())
-    elif args.quiet:
-        if validator.errors:
-            print(f"FAILED: {len(validator.errors)} error(s)")
+        args.format = 'json'
+    if args.format in REPORT_FORMATS:
+        output = args.format
+    else:
+        output = 'json' if args.format == 'json' else 'quiet' if args.quiet else 'text'
+    jobs = [(path, args.verbose, args.timings, output, not args.no_warnings, not args.no_stats,
+             cross_file, args.changed_since) for path in files]
+
+    def run():
+        return run_validation(jobs, output, args.jobs)
+
+    # Timings are measurements of this run, so never replay them; a diff
+    # depends on the repository state, which the cache key does not cover
+    if args.no_cache or args.timings or args.changed_since:
+        return run()[0]
+    return ResultCache('validate_xcompose', __file__).run({'job': jobs[0][1:]}, files, run)
+
+
+def run_validation(jobs: List[Tuple], output: str, workers: Optional[int]) -> Tuple[int, List[str]]:
+    """Validate every job and print the report.
+
+    Returns:
+        (exit code, other files read besides the validated ones)
+    """
+    if output in REPORT_FORMATS:
+        results = stream_findings(jobs, output, workers)
+        return aggregate_exit_code([r['exit_code'] for r in results]), \
+            [path for r in results for path in r['inputs']]
+
+    results = list(parallel_imap(validate_file, jobs, jobs=workers, min_items=2))
+    exit_code = aggregate_exit_code([r['exit_code'] for r in results])
+
+    # Output results (a single file prints exactly as it always has)
+    if output == 'json':
+        if len(results) == 1:
+            print(json.dumps(results[0]['result'], indent=2))
         else:
-            print("PASSED")
+            print(json.dumps({
+                'files': [r['result'] for r in results],
+                'passed': exit_code == 0,
+                'exit_code': exit_code
+            }, indent=2))
+    elif output == 'quiet':
+        for r in results:
+            prefix = f"{r['file']}: " if len(results) > 1 else ''
+            if r['errors']:
+                print(f"{prefix}FAILED: {r['errors']} error(s)")
+            else:
+                print(f"{prefix}PASSED")
     else:
-        validator.print_results(
-            show_warnings=not args.no_warnings,
-            show_stats=not args.no_stats
-        )
+        for r in results:
+            print(r['report'], end='')
+        if len(results) > 1:
+            print_summary(results, exit_code)
+
+    return exit_code, [path for r in results for path in r['inputs']]
 
-    return validator.get_exit_code()
+
+def stream_findings(jobs: List[Tuple], output: str, workers: Optional[int]) -> List[Dict]:
+    """Validate files, writing findings in a streaming format as they come.
+
+    A single file (or --jobs 1) is validated in-process and each finding is
+    written the moment its rule reports it. With several workers, each
+    file's findings are written as soon as that file is done.
+    """
+    emitter = open_emitter(output, 'validate_xcompose')
+    if len(jobs) == 1 or workers == 1:
+        results = [validate_file(job, sink=emitter.emit) for job in jobs]
+    else:
+        results = []
+        for result in parallel_imap(validate_file, jobs, jobs=workers, min_items=2):
+            for finding in result.pop('findings'):
+                emitter.emit(finding)
+            results.append(result)
+
+    exit_code = aggregate_exit_code([r['exit_code'] for r in results])
+    emitter.close({
+        'files': [{key: r[key] for key in ('file', 'passed', 'errors', 'warnings', 'exit_code')}
+                  for r in results],
+        'passed': exit_code == 0,
+        'exit_code': exit_code,
+    })
+    return results
+
+
+def print_summary(results: List[Dict], exit_code: int):
+    """Print the merged pass/fail table for a multi-file run."""
+    failed = [r for r in results if not r['passed']]
+
+    print()
+    print("=" * 70)
+    print(f"Summary: {len(results)} files, {len(results) - len(failed)} passed, {len(failed)} failed")
+    print("=" * 70)
+    for r in results:
+        status = "✅ PASS" if r['passed'] else f"❌ FAIL ({r['errors']} error(s), exit {r['exit_code']})"
+        print(f"  {status:<34} {r['file']}")
+    print("=" * 70)
+    print(f"Exit code: {exit_code}")
 
 
 if __name__ == '__main__':
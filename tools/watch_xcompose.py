@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+XCompose-STEM: Watch Daemon
+
+Keeps the parsed XCompose model in memory and, on every save:
+- re-parses only the edited lines (incremental parser)
+- revalidates, reusing the lexed form of unchanged lines
+- reports the latency of each step
+
+Once no save has arrived for the debounce interval, it re-audits
+(reporting metrics that moved) and regenerates the docs, rewriting only
+files whose content changed. Bursts of saves thus cost one audit.
+
+Uses inotify (via ctypes) to wake up on saves, falling back to polling
+the file's mtime where inotify is unavailable.
+
+Part of XCompose-STEM - Easy Unicode Symbols on Linux for STEM Professionals
+
+Copyright (c) 2025 Phil Bowens
+Repository: https://github.com/phil-bowens/xcompose-stem
+License: MIT
+
+Usage:
+    ./watch_xcompose.py XCompose
+    ./watch_xcompose.py XCompose --no-docs
+    ./watch_xcompose.py XCompose --poll 0.5
+    ./watch_xcompose.py XCompose --debounce 2
+"""
+
+import argparse
+import contextlib
+import ctypes
+import ctypes.util
+import io
+import os
+import select
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from xcompose_lib import XComposeParser as BaseParser
+from validate_xcompose import XComposeValidator
+from audit_xcompose_design import audit_summary
+import generate_xcompose_docs as docs
+
+# Doc file name -> generator class (same set as `generate_xcompose_docs.py --all`)
+DOC_GENERATORS = [
+    ('xcompose_checklist.md', docs.MarkdownChecklistGenerator),
+    ('xcompose_sequences.json', docs.JSONGenerator),
+    ('xcompose_reference.html', docs.HTMLGenerator),
+    ('xcompose_table.md', docs.MarkdownTableGenerator),
+]
+
+# Seconds without a save before the audit and docs are brought up to date
+DEFAULT_DEBOUNCE = 0.5
+
+# Process umask, for permissions of newly created docs
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+
+class InotifyWatcher:
+    """Wakes up when a file is written or replaced, using Linux inotify.
+
+    Watches the parent directory rather than the file itself, so editors
+    that save by writing a temp file and renaming it over the original are
+    still seen.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+    def __init__(self, path: Path):
+        libc_name = ctypes.util.find_library('c')
+        if not libc_name:
+            raise OSError('libc not found')
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError('inotify is not available')
+
+        self.name = os.fsencode(path.name)
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        directory = os.fsencode(str(path.parent.resolve()))
+        if libc.inotify_add_watch(self.fd, directory, mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, os.strerror(errno))
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the file is written or replaced (True), or until
+        timeout seconds have passed without that (False)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                ready = select.select([self.fd], [], [], remaining)[0]
+            except InterruptedError:
+                continue
+            if ready and self._drain():
+                return True
+            if not ready and deadline is not None:
+                return False
+
+    def _drain(self) -> bool:
+        """Read all pending events; True if any concerns the watched file."""
+        hit = False
+        while select.select([self.fd], [], [], 0)[0]:
+            data = os.read(self.fd, 64 * 1024)
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+                if name == self.name:
+                    hit = True
+        return hit
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher: checks the file's mtime and size periodically."""
+
+    def __init__(self, path: Path, interval: float):
+        self.path = path
+        self.interval = interval
+        self.last = self._stamp()
+
+    def _stamp(self):
+        try:
+            st = self.path.stat()
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if deadline is None:
+                time.sleep(self.interval)
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                time.sleep(min(self.interval, remaining))
+            stamp = self._stamp()
+            if stamp != self.last:
+                self.last = stamp
+                return True
+
+    def close(self):
+        pass
+
+
+class WatchSession:
+    """Resident model of one XCompose file, updated in place on each save."""
+
+    def __init__(self, filepath: str, output_dir: Optional[Path], audit: bool = True):
+        self.filepath = Path(filepath)
+        self.display_path = filepath  # As given, so JSON docs match `make docs`
+        self.output_dir = output_dir
+        self.audit = audit
+
+        self.parser = BaseParser(filepath)
+        self.lex_cache: Dict[str, tuple] = {}
+        self.lines: Optional[List[str]] = None
+        self.order: List[tuple] = []
+        self.audit_counts: Dict[str, int] = {}
+        self.written: Dict[str, bytes] = {}
+        self.pending = False  # Sequences changed since the last audit/docs run
+
+    def read_lines(self) -> List[str]:
+        with open(self.filepath, 'r', encoding='utf-8') as f:
+            return f.readlines()
+
+    def refresh(self, initial: bool = False) -> Optional[str]:
+        """Re-read the file, re-parse the edited lines and revalidate.
+
+        The audit and docs are left to flush(), which the caller runs once
+        the file has been quiet for a while.
+
+        Returns:
+            Status report for the log, or None if the content is unchanged
+        """
+        timings = []
+        start = clock = time.perf_counter()
+
+        try:
+            lines = self.read_lines()
+        except (OSError, UnicodeDecodeError) as e:
+            return f"✗ Cannot read {self.filepath}: {e}"
+        if lines == self.lines:
+            return None  # e.g. touched or saved without edits
+
+        # Parse: only the edited region goes through the lexer
+        if initial:
+            self.parser.parse_lines(lines)
+            changes = f"{len(self.parser.sequences)} sequences"
+        else:
+            delta = self.parser.update(lines)
+            parts = [f"{len(items)} {label}" for label, items in
+                     (('added', delta.added), ('removed', delta.removed), ('changed', delta.changed))
+                     if items]
+            changes = ', '.join(parts) or 'no sequence changes'
+        self.lines = lines
+        timings.append(('parse', time.perf_counter() - clock))
+
+        # Validate: unchanged lines reuse their lexed form
+        clock = time.perf_counter()
+        validator = XComposeValidator(str(self.filepath), lex_cache=self.lex_cache)
+        validator.validate_lines(lines)
+        if len(self.lex_cache) > 2 * len(lines):
+            current = {line.strip() for line in lines}
+            for text in [t for t in self.lex_cache if t not in current]:
+                del self.lex_cache[text]
+        timings.append(('validate', time.perf_counter() - clock))
+
+        # Everything downstream only depends on the sequences and their order
+        order = [(seq.key_ids, seq.symbol, seq.codepoint, seq.comment, seq.tag,
+                  seq.category, seq.subcategory) for seq in self.parser.sequences]
+        if order != self.order:
+            self.order = order
+            self.pending = self.audit or self.output_dir is not None
+
+        total = time.perf_counter() - start
+        return self.format_status(changes, validator, timings, total)
+
+    def flush(self, initial: bool = False) -> Optional[str]:
+        """Re-audit and regenerate the docs if sequences changed since the
+        last flush.
+
+        Returns:
+            Status report for the log, or None if there was nothing to do
+        """
+        if not self.pending:
+            return None
+        self.pending = False
+        timings = []
+        start = clock = time.perf_counter()
+
+        audit_changes = []
+        if self.audit:
+            counts = audit_summary(self.parser.sequences) if self.parser.sequences else {}
+            if not initial:
+                audit_changes = [f"{name} {self.audit_counts.get(name, 0)} → {value}"
+                                 for name, value in counts.items()
+                                 if self.audit_counts.get(name, 0) != value]
+            self.audit_counts = counts
+            timings.append(('audit', time.perf_counter() - clock))
+
+        written = []
+        if self.output_dir is not None:
+            clock = time.perf_counter()
+            written = self.write_docs()
+            timings.append(('docs', time.perf_counter() - clock))
+
+        lines = [f"  📐 {change}" for change in audit_changes]
+        if written:
+            lines.append(f"  📝 wrote {', '.join(written)}")
+        lines.append(format_timings('audit/docs', timings, time.perf_counter() - start))
+        return '\n'.join(lines)
+
+    def write_docs(self) -> List[str]:
+        """Regenerate every doc in memory; write only the ones that differ."""
+        model = docs.XComposeParser(self.display_path)
+        model.sequences = self.parser.sequences
+        model.categories = self.parser.categories
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        for name, generator_class in DOC_GENERATORS:
+            target = self.output_dir / name
+            fd, scratch = tempfile.mkstemp(dir=self.output_dir, prefix=f'.{name}.', suffix='.tmp')
+            os.close(fd)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generator_class(model).generate(scratch)
+                with open(scratch, 'rb') as f:
+                    content = f.read()
+
+                previous = self.written.get(name)
+                if previous is None and target.exists():
+                    previous = target.read_bytes()
+                if content != previous:
+                    # mkstemp creates 0600 files; keep the usual permissions
+                    mode = target.stat().st_mode & 0o777 if target.exists() else 0o666 & ~UMASK
+                    os.chmod(scratch, mode)
+                    os.replace(scratch, target)
+                    scratch = None
+                    written.append(name)
+                self.written[name] = content
+            finally:
+                if scratch is not None:
+                    os.unlink(scratch)
+        return written
+
+    def format_status(self, changes, validator, timings, total) -> str:
+        stamp = time.strftime('%H:%M:%S')
+        lines = [f"[{stamp}] {changes}"]
+
+        if validator.errors:
+            lines.append(f"  ❌ {len(validator.errors)} error(s)")
+            for error in validator.errors[:5]:
+                where = f"Line {error.line_num}: " if error.line_num else ''
+                lines.append(f"     {where}{error.message}")
+            if len(validator.errors) > 5:
+                lines.append(f"     ... and {len(validator.errors) - 5} more")
+        else:
+            lines.append(f"  ✅ valid ({len(validator.sequences)} sequences, "
+                         f"{len(validator.warnings)} warning(s))")
+
+        lines.append(format_timings('feedback', timings, total))
+        return '\n'.join(lines)
+
+
+def format_timings(label: str, timings, total: float) -> str:
+    """Log line with the total and per-step latency in milliseconds."""
+    steps = ' | '.join(f"{name} {seconds * 1000:.1f}" for name, seconds in timings)
+    return f"  ⏱  {label} {total * 1000:.1f} ms ({steps} ms)"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Watch an XCompose file and revalidate/regenerate docs on save',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s XCompose                  # Validate, audit and regenerate docs/ on save
+  %(prog)s XCompose --no-docs        # Validate and audit only
+  %(prog)s XCompose --poll 0.5       # Force polling (e.g. network filesystems)
+  %(prog)s XCompose --debounce 2     # Audit and regenerate docs after 2 s without saves
+        """
+    )
+
+    parser.add_argument(
+        'file',
+        nargs='?',
+        default='XCompose',
+        help='Path to XCompose file (default: XCompose)'
+    )
+    parser.add_argument(
+        '--output-dir',
+        default='docs',
+        help='Output directory for generated files (default: docs/)'
+    )
+    parser.add_argument(
+        '--no-docs',
+        action='store_true',
+        help='Do not regenerate documentation'
+    )
+    parser.add_argument(
+        '--no-audit',
+        action='store_true',
+        help='Do not re-run the design audit'
+    )
+    parser.add_argument(
+        '--poll',
+        type=float,
+        metavar='SECONDS',
+        help='Poll for changes every SECONDS instead of using inotify'
+    )
+
+    parser.add_argument(
+        '--debounce',
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar='SECONDS',
+        help=f'Audit and regenerate docs once no save arrived for SECONDS (default: {DEFAULT_DEBOUNCE:g})'
+    )
+
+    args = parser.parse_args()
+
+    path = Path(args.file)
+    if not path.exists():
+        print(f"Error: File not found: {args.file}", file=sys.stderr)
+        return 1
+
+    session = WatchSession(args.file, None if args.no_docs else Path(args.output_dir),
+                           audit=not args.no_audit)
+
+    watcher = None
+    if args.poll is None:
+        try:
+            watcher = InotifyWatcher(path)
+            mode = 'inotify'
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling instead", file=sys.stderr)
+    if watcher is None:
+        interval = args.poll if args.poll else 0.25
+        watcher = PollingWatcher(path, interval)
+        mode = f'polling every {interval:g}s'
+
+    print(f"Watching {args.file} ({mode}). Press Ctrl+C to stop.")
+    print(session.refresh(initial=True))
+    status = session.flush(initial=True)
+    if status:
+        print(status)
+
+    try:
+        while True:
+            # Saves get instant feedback; audit and docs wait for a quiet spell
+            if watcher.wait(args.debounce if session.pending else None):
+                status = session.refresh()
+            else:
+                status = session.flush()
+            if status:
+                print(status, flush=True)
+    except KeyboardInterrupt:
+        print()
+    finally:
+        watcher.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,43 +11,304 @@ Repository: https://github.com/phil-bowens/xcompose-stem
 License: MIT
 """
 
+import bisect
+import contextlib
+import difflib
+import hashlib
+import io
+import json
+import marshal
+import mmap
+import os
 import re
 import sys
-from collections import defaultdict
-from dataclasses import dataclass
+import tempfile
+import time
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+
+# Process-wide keysym interning table (name <-> integer ID)
+_KEYSYM_IDS: Dict[str, int] = {}
+_KEYSYM_NAMES: List[str] = []
+
+
+def intern_keysym(name: str) -> int:
+    """Return the integer ID for a keysym name, assigning one if needed.
+
+    IDs are only stable within one process; never persist them.
+    """
+    keysym_id = _KEYSYM_IDS.get(name)
+    if keysym_id is None:
+        name = sys.intern(name)
+        keysym_id = len(_KEYSYM_NAMES)
+        _KEYSYM_NAMES.append(name)
+        _KEYSYM_IDS[name] = keysym_id
+    return keysym_id
+
+
+def keysym_name(keysym_id: int) -> str:
+    """Return the keysym name for an interned keysym ID."""
+    return _KEYSYM_NAMES[keysym_id]
+
+
+# Vendored data tables (tools/data/*.tsv), part of the result cache key
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+
+# Keysym registry, built once at import from the vendored keysymdef table
+# (regenerate with tools/update_keysyms.py). Registry keysyms are interned
+# first, so their IDs are the same in every process.
+KEYSYM_TABLE_PATH = DATA_DIR / 'keysyms.tsv'
+
+# Characters that need Shift on a US layout
+_US_SHIFTED = frozenset('~!@#$%^&*()_+{}|:"<>?ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+
+class KeysymInfo(NamedTuple):
+    """Registry entry for one keysym."""
+    id: int  # Interned keysym ID (see intern_keysym)
+    name: str  # Keysym name, e.g. "parenleft"
+    value: int  # X11 keysym value
+    codepoint: Optional[int]  # Unicode codepoint typed, if any
+    glyph: Optional[str]  # Display character for spelled-out ASCII names ("parenleft" -> "(")
+    needs_shift: bool  # Typed with Shift on a US layout
+
+
+KEYSYMS: Dict[str, KeysymInfo] = {}
+
+
+def _make_keysym_info(name: str, value: int, codepoint: Optional[int]) -> KeysymInfo:
+    char = chr(codepoint) if codepoint is not None else None
+    glyph = char if len(name) > 1 and char is not None and '!' <= char <= '~' else None
+    return KeysymInfo(intern_keysym(name), name, value, codepoint, glyph,
+                      char is not None and char in _US_SHIFTED)
+
+
+def _load_keysym_registry(path: Path = KEYSYM_TABLE_PATH) -> bool:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                name, value, codepoint = line.rstrip('\n').split('\t')
+                KEYSYMS[name] = _make_keysym_info(
+                    name, int(value, 16), int(codepoint, 16) if codepoint != '-' else None)
+    except OSError:
+        return False  # Lookups fall back to "unknown, but allowed"
+    return True
+
+
+KEYSYM_REGISTRY_AVAILABLE = _load_keysym_registry()
+
+
+def keysym_info(name: str) -> Optional[KeysymInfo]:
+    """Look up a keysym by name, including Unicode names like "U2192".
+
+    Returns:
+        KeysymInfo, or None if the name is not a valid keysym
+    """
+    info = KEYSYMS.get(name)
+    if info is not None:
+        return info
+
+    # XStringToKeysym also accepts "U<hex>" and "0x<hex>" for any keysym
+    if len(name) > 1 and name[0] == 'U' and all(c in _HEX_DIGITS for c in name[1:]):
+        codepoint = int(name[1:], 16)
+        if codepoint <= 0x10FFFF:
+            info = _make_keysym_info(name, 0x01000000 + codepoint, codepoint)
+    elif len(name) > 2 and name[:2] == '0x' and all(c in _HEX_DIGITS for c in name[2:]):
+        info = _make_keysym_info(name, int(name, 16), None)
+    if info is not None:
+        KEYSYMS[name] = info
+    return info
+
+
+def is_known_keysym(name: str) -> bool:
+    """Whether a name is a valid keysym (always True if the table is missing)."""
+    return not KEYSYM_REGISTRY_AVAILABLE or keysym_info(name) is not None
+
+
+def keysym_glyph(name: str) -> str:
+    """Display form of a keysym: "(" for parenleft, the name itself otherwise."""
+    info = KEYSYMS.get(name)
+    if info is not None and info.glyph is not None:
+        return info.glyph
+    return name
+
+
+# Confusable characters (tools/data/confusables.tsv): character -> the
+# prototype it looks like. Loaded on first use.
+CONFUSABLES_PATH = DATA_DIR / 'confusables.tsv'
+_CONFUSABLES: Optional[Dict[int, str]] = None
+
+# Characters that render as nothing: these categories (controls, format
+# characters such as ZERO WIDTH SPACE, line/paragraph separators) plus the
+# default-ignorable fillers and selectors outside them
+_INVISIBLE_CATEGORIES = frozenset(('Cc', 'Cf', 'Zl', 'Zp'))
+_INVISIBLE_EXTRA = frozenset('\u034f\u115f\u1160\u180b\u180c\u180d\u180f\u3164\uffa0')
+
+
+def _load_confusables(path: Path = CONFUSABLES_PATH) -> Dict[int, str]:
+    table = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                source, prototype = line.split('\t')[:2]
+                table[int(source, 16)] = ''.join(chr(int(cp, 16)) for cp in prototype.split())
+    except OSError:
+        pass  # Only canonical equivalents (folded by NFD) are then detected
+    return table
+
+
+def confusable_skeleton(text: str) -> str:
+    """Skeleton of a string, as in UTS #39: strings that look alike share one.
+
+    NFD, then every character replaced by its confusables prototype, then
+    NFD again. So U+2126 OHM SIGN and U+03A9 GREEK CAPITAL OMEGA (canonical
+    equivalents), or U+2211 N-ARY SUMMATION and U+03A3 GREEK CAPITAL SIGMA
+    (table entry), get the same skeleton.
+    """
+    global _CONFUSABLES
+    if _CONFUSABLES is None:
+        _CONFUSABLES = _load_confusables()
+    return unicodedata.normalize('NFD', unicodedata.normalize('NFD', text).translate(_CONFUSABLES))
+
+
+def invisible_characters(text: str) -> List[str]:
+    """Characters of text that render as nothing (zero-width, format, control)."""
+    return [char for char in text
+            if char in _INVISIBLE_EXTRA or unicodedata.category(char) in _INVISIBLE_CATEGORIES]
+
+
+def format_codepoints(text: str) -> str:
+    """Codepoints of a string, as "U+03A3 U+0301"."""
+    return ' '.join(f'U+{ord(char):04X}' for char in text)
 
 
-@dataclass
 class XComposeSequence:
     """Represents a single XCompose sequence.
 
-    This unified model is used by all XCompose-STEM tools.
+    This unified model is used by all XCompose-STEM tools. Instances are
+    immutable and slotted: keys are stored as a tuple of interned keysym IDs,
+    and the derived key tuple and display strings are computed once, on
+    first access.
     """
-    keys: List[str]  # List of key names (excluding Multi_key)
-    symbol: str  # Output character(s)
-    codepoint: Optional[str]  # Unicode codepoint if specified
-    comment: Optional[str]  # Inline comment (without tag)
-    tag: Optional[str]  # Type tag: ICONIC or MNEMONIC
-    category: str  # Section header (e.g., "GREEK LETTERS")
-    subcategory: Optional[str]  # Subsection if applicable
-    line_num: int  # Line number in source file
+
+    __slots__ = (
+        'key_ids',  # Tuple of interned keysym IDs (excluding Multi_key)
+        'symbol',  # Output character(s)
+        'codepoint',  # Unicode codepoint if specified
+        'comment',  # Inline comment (without tag)
+        'tag',  # Type tag: ICONIC or MNEMONIC
+        'category',  # Section header (e.g., "GREEK LETTERS")
+        'subcategory',  # Subsection if applicable
+        'line_num',  # Line number in source file
+        '_keys', '_sequence_string', '_key_string',  # Lazily derived caches
+    )
+
+    def __init__(self, keys: Iterable[str], symbol: str, codepoint: Optional[str],
+                 comment: Optional[str], tag: Optional[str], category: str,
+                 subcategory: Optional[str], line_num: int):
+        init = object.__setattr__
+        init(self, 'key_ids', tuple(intern_keysym(k) for k in keys))
+        # Outputs, codepoints and tags repeat across large tables; share them
+        init(self, 'symbol', sys.intern(symbol))
+        init(self, 'codepoint', sys.intern(codepoint) if codepoint else codepoint)
+        init(self, 'comment', comment)
+        init(self, 'tag', sys.intern(tag) if tag else tag)
+        init(self, 'category', category)
+        init(self, 'subcategory', subcategory)
+        init(self, 'line_num', line_num)
+        init(self, '_keys', None)
+        init(self, '_sequence_string', None)
+        init(self, '_key_string', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"XComposeSequence is immutable (cannot set {name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"XComposeSequence is immutable (cannot delete {name!r})")
+
+    def _fields(self) -> tuple:
+        return (self.key_ids, self.symbol, self.codepoint, self.comment, self.tag,
+                self.category, self.subcategory, self.line_num)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return (f"XComposeSequence(keys={list(self.keys)!r}, symbol={self.symbol!r}, "
+                f"codepoint={self.codepoint!r}, comment={self.comment!r}, tag={self.tag!r}, "
+                f"category={self.category!r}, subcategory={self.subcategory!r}, "
+                f"line_num={self.line_num!r})")
+
+    def __reduce__(self):
+        # Keysym IDs are process-local, so pickle by key name
+        return (XComposeSequence, (self.keys, self.symbol, self.codepoint, self.comment,
+                                   self.tag, self.category, self.subcategory, self.line_num))
+
+    def replace(self, **changes) -> 'XComposeSequence':
+        """Return a copy with the given fields replaced (e.g. line_num)."""
+        if 'keys' in changes:
+            fields = {
+                'keys': self.keys, 'symbol': self.symbol, 'codepoint': self.codepoint,
+                'comment': self.comment, 'tag': self.tag, 'category': self.category,
+                'subcategory': self.subcategory, 'line_num': self.line_num,
+            }
+            fields.update(changes)
+            return XComposeSequence(**fields)
+
+        # Same keys: copy slots directly, keeping the derived-string caches
+        unknown = set(changes) - set(self.__slots__[1:8])
+        if unknown:
+            raise TypeError(f"Unknown XComposeSequence fields: {', '.join(sorted(unknown))}")
+        clone = object.__new__(XComposeSequence)
+        for name in self.__slots__:
+            object.__setattr__(clone, name, changes.get(name, getattr(self, name)))
+        return clone
+
+    @property
+    def keys(self) -> Tuple[str, ...]:
+        """Tuple of key names (excluding Multi_key)"""
+        keys = self._keys
+        if keys is None:
+            keys = tuple(_KEYSYM_NAMES[k] for k in self.key_ids)
+            object.__setattr__(self, '_keys', keys)
+        return keys
 
     @property
     def sequence_string(self) -> str:
         """Human-readable sequence like '<g> <a>'"""
-        return ' '.join(f'<{k}>' for k in self.keys)
+        value = self._sequence_string
+        if value is None:
+            value = ' '.join(f'<{k}>' for k in self.keys)
+            object.__setattr__(self, '_sequence_string', value)
+        return value
 
     @property
     def human_sequence(self) -> str:
         """Simplified sequence for display like 'g a'"""
-        return ' '.join(self.keys)
+        return self.key_string
 
     @property
     def key_string(self) -> str:
         """Space-separated key string"""
-        return ' '.join(self.keys)
+        value = self._key_string
+        if value is None:
+            value = ' '.join(self.keys)
+            object.__setattr__(self, '_key_string', value)
+        return value
 
     @property
     def is_ascii_shortcut(self) -> bool:
@@ -74,6 +335,1041 @@ class XComposeSequence:
         return self.keys[0] in ['h', 'g', 'k', 'b', 'p', 'u', 'c', 'i']
 
 
+# Column encoding of type tags
+TAG_FLAGS = {None: 0, 'ICONIC': 1, 'MNEMONIC': 2}
+
+
+def key_needs_shift(key: str) -> bool:
+    """Whether typing a key needs Shift on a US layout (keysym registry)."""
+    info = KEYSYMS.get(key)
+    if info is not None:
+        return info.needs_shift
+    return len(key) == 1 and key.isupper()
+
+
+class SequenceTable:
+    """Columnar, array-backed view of a sequence table for bulk analytics.
+
+    Each attribute is one column with one entry per sequence, stored in a
+    compact array.array:
+
+    - lengths: number of keys (excluding Multi_key)
+    - first_key_ids: interned keysym ID of the first key (-1 if none)
+    - category_ids: index into self.categories (-1 if unknown)
+    - tag_flags: TAG_FLAGS value of the type tag
+    - codepoints: output codepoint for single-character outputs (-1 otherwise)
+    - shift_counts: number of keys that need Shift
+
+    Histograms and counts are then single passes over a column instead
+    of repeated scans over sequence objects.
+    """
+
+    def __init__(self):
+        self.lengths = array('H')
+        self.first_key_ids = array('l')
+        self.category_ids = array('l')
+        self.tag_flags = array('B')
+        self.codepoints = array('l')
+        self.shift_counts = array('H')
+        self.categories: List[str] = []
+        self._category_ids: Dict[str, int] = {}
+
+    @classmethod
+    def from_sequences(cls, sequences: Iterable[XComposeSequence]) -> 'SequenceTable':
+        """Build a table from XComposeSequence objects (one pass)."""
+        table = cls()
+        for seq in sequences:
+            table.append(seq.keys, seq.symbol, seq.category, seq.tag)
+        return table
+
+    def append(self, keys: Tuple[str, ...], symbol: Optional[str] = None,
+               category: Optional[str] = None, tag: Optional[str] = None):
+        """Append one sequence given its key names (excluding Multi_key)."""
+        self.lengths.append(len(keys))
+        self.first_key_ids.append(intern_keysym(keys[0]) if keys else -1)
+        self.category_ids.append(self._category_id(category))
+        self.tag_flags.append(TAG_FLAGS.get(tag, 0))
+        self.codepoints.append(ord(symbol) if symbol and len(symbol) == 1 else -1)
+        self.shift_counts.append(sum(1 for k in keys if key_needs_shift(k)))
+
+    def _category_id(self, category: Optional[str]) -> int:
+        if category is None:
+            return -1
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = len(self.categories)
+            self.categories.append(category)
+            self._category_ids[category] = category_id
+        return category_id
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def length_histogram(self) -> Counter:
+        """Count sequences per length."""
+        return Counter(self.lengths)
+
+    def length_summary(self) -> Dict[str, float]:
+        """Return min/max/avg sequence length (zeros for an empty table)."""
+        if not self.lengths:
+            return {'min': 0, 'max': 0, 'avg': 0}
+        return {
+            'min': min(self.lengths),
+            'max': max(self.lengths),
+            'avg': sum(self.lengths) / len(self.lengths)
+        }
+
+    def prefix_counts(self) -> Dict[str, int]:
+        """Count sequences per first key, in order of first appearance."""
+        counts = Counter(self.first_key_ids)
+        counts.pop(-1, None)
+        return {keysym_name(k): v for k, v in counts.items()}
+
+    def category_counts(self) -> Dict[str, int]:
+        """Count sequences per category, in order of first appearance."""
+        counts = Counter(self.category_ids)
+        counts.pop(-1, None)
+        return {self.categories[c]: v for c, v in counts.items()}
+
+    def indices_where_length(self, min_length: int = 0, max_length: int = 0xFFFF) -> List[int]:
+        """Return indices of sequences with min_length <= length <= max_length."""
+        return [i for i, n in enumerate(self.lengths) if min_length <= n <= max_length]
+
+    def shift_burden(self, min_shifts: int, max_length: int) -> List[int]:
+        """Return indices of sequences with at least min_shifts shifted keys
+        among at most max_length keys."""
+        return [i for i, (n, shifts) in enumerate(zip(self.lengths, self.shift_counts))
+                if shifts >= min_shifts and n <= max_length]
+
+
+class _TrieNode:
+    """One node of a ComposeTrie (one key in a sequence)."""
+
+    __slots__ = ('children', 'values', 'count', 'order')
+
+    def __init__(self, order: int):
+        self.children: Dict[str, '_TrieNode'] = {}
+        self.values: List[Any] = []  # Entries whose sequence ends here
+        self.count = 0  # Entries in this subtree, including this node
+        self.order = order  # Creation order, for stable reporting
+
+
+class ComposeTrie:
+    """Prefix tree over key sequences.
+
+    Each defined sequence is stored at the node reached by its keys, so a
+    sequence shadows another exactly when its node is an ancestor of the
+    other's. That turns shadowing detection into a single traversal and
+    makes prefix queries proportional to the prefix length.
+    """
+
+    def __init__(self):
+        self._created = 0
+        self.root = self._new_node()
+
+    def _new_node(self) -> _TrieNode:
+        node = _TrieNode(self._created)
+        self._created += 1
+        return node
+
+    def insert(self, keys: Iterable[str], value: Any = None):
+        """Add an entry for a key sequence (duplicates are kept)."""
+        node = self.root
+        node.count += 1
+        for key in keys:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = self._new_node()
+            node = child
+            node.count += 1
+        node.values.append(value)
+
+    def remove(self, keys: Iterable[str], value: Any = None):
+        """Remove one entry for a key sequence, pruning emptied nodes.
+
+        Raises:
+            KeyError: If no entry with this value is stored at these keys
+        """
+        keys = tuple(keys)
+        path = [self.root]
+        for key in keys:
+            node = path[-1].children.get(key)
+            if node is None:
+                raise KeyError(keys)
+            path.append(node)
+        try:
+            path[-1].values.remove(value)
+        except ValueError:
+            raise KeyError(keys) from None
+
+        for node in path:
+            node.count -= 1
+        for depth in range(len(keys), 0, -1):
+            if path[depth].count:
+                break
+            del path[depth - 1].children[keys[depth - 1]]
+
+    def __len__(self) -> int:
+        return self.root.count
+
+    def _find(self, keys: Iterable[str]) -> Optional[_TrieNode]:
+        node = self.root
+        for key in keys:
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def __contains__(self, keys) -> bool:
+        node = self._find(keys)
+        return node is not None and bool(node.values)
+
+    def get(self, keys: Iterable[str]) -> List[Any]:
+        """Return the entries defined for exactly this key sequence."""
+        node = self._find(keys)
+        return list(node.values) if node is not None else []
+
+    def has_prefix(self, keys: Iterable[str]) -> bool:
+        """Whether any entry starts with (or equals) this key sequence."""
+        node = self._find(keys)
+        return node is not None and node.count > 0
+
+    def count_with_prefix(self, keys: Iterable[str]) -> int:
+        """Number of entries starting with (or equal to) this key sequence."""
+        node = self._find(keys)
+        return node.count if node is not None else 0
+
+    def with_prefix(self, keys: Iterable[str]) -> Iterator[Tuple[Tuple[str, ...], Any]]:
+        """Yield (keys, value) for every entry starting with this key sequence."""
+        prefix = tuple(keys)
+        node = self._find(prefix)
+        if node is None:
+            return
+        stack = [(prefix, node)]
+        while stack:
+            path, node = stack.pop()
+            for value in node.values:
+                yield path, value
+            for key, child in reversed(list(node.children.items())):
+                stack.append((path + (key,), child))
+
+    def conflicts(self, keys: Iterable[str]) -> List[Tuple[Tuple[str, ...], Any]]:
+        """Return (keys, value) for every entry that would shadow, duplicate
+        or be shadowed by this key sequence. Empty means the slot is free."""
+        keys = tuple(keys)
+        found = []
+        node = self.root
+        for depth, key in enumerate(keys[:-1], 1):
+            node = node.children.get(key)
+            if node is None:
+                return found
+            found.extend((keys[:depth], value) for value in node.values)
+        found.extend(self.with_prefix(keys))
+        return found
+
+    def children(self, keys: Iterable[str] = ()) -> List[str]:
+        """Return the keys that can follow this key sequence."""
+        node = self._find(keys)
+        return list(node.children) if node is not None else []
+
+    def nodes(self, depth: Optional[int] = None) -> Iterator[Tuple[Tuple[str, ...], _TrieNode]]:
+        """Yield (keys, node) for every node (or only those at a given depth),
+        in creation order."""
+        found = []
+        stack = [((), self.root)]
+        while stack:
+            path, node = stack.pop()
+            if depth is None or len(path) == depth:
+                found.append((node.order, path, node))
+            if depth is None or len(path) < depth:
+                for key, child in node.children.items():
+                    stack.append((path + (key,), child))
+        found.sort(key=lambda item: item[0])
+        for _, path, node in found:
+            yield path, node
+
+    def branching_factors(self) -> Dict[Tuple[str, ...], int]:
+        """Return the number of distinct next keys for every inner node."""
+        return {path: len(node.children) for path, node in self.nodes() if node.children}
+
+    def find_shadowing(self) -> Iterator[Tuple[Tuple[str, ...], Any, Tuple[str, ...], Any]]:
+        """Yield (short_keys, short_value, long_keys, long_value) for every
+        entry that is a strict prefix of another entry.
+
+        Runs in one traversal: each node is visited once, carrying the list
+        of complete entries found on the path above it.
+        """
+        stack = [((), self.root, ())]
+        while stack:
+            path, node, ancestors = stack.pop()
+            if node.values:
+                for short_path, short_values in ancestors:
+                    for short_value in short_values:
+                        for value in node.values:
+                            yield short_path, short_value, path, value
+                ancestors = ancestors + ((path, node.values),)
+            for key, child in node.children.items():
+                stack.append((path + (key,), child, ancestors))
+
+
+# Kinds of single typing slip, as reported by TypoIndex
+TYPO_KINDS = ('substitution', 'transposition', 'insertion', 'deletion')
+
+
+class TypoIndex:
+    """Finds the sequences one typing slip away from each other.
+
+    A slip is one substituted, transposed (adjacent), extra or missing key,
+    i.e. Damerau-Levenshtein distance 1. Comparing every pair is quadratic,
+    so every sequence is instead indexed under each of its one-key
+    deletions, tagged with the deleted position:
+
+    - substitution: both sequences have the same deletion at the same position
+    - insertion/deletion: one sequence equals a deletion of the other
+    - transposition: swapping two adjacent keys gives the other sequence
+
+    Each lookup is a hash probe, so finding all neighbors costs
+    O(sequences × length) instead of O(sequences²).
+    """
+
+    def __init__(self):
+        self._exact: Dict[Tuple[str, ...], List[Any]] = defaultdict(list)
+        self._deletions: Dict[Tuple[Tuple[str, ...], int], List[Tuple[Tuple[str, ...], Any]]] = \
+            defaultdict(list)
+        self._entries: List[Tuple[Tuple[str, ...], Any]] = []
+
+    def add(self, keys: Iterable[str], value: Any = None):
+        keys = tuple(keys)
+        self._exact[keys].append(value)
+        self._entries.append((keys, value))
+        for i in range(len(keys)):
+            self._deletions[(keys[:i] + keys[i + 1:], i)].append((keys, value))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def neighbors(self, keys: Iterable[str]) -> List[Tuple[str, Tuple[str, ...], Any]]:
+        """Return (kind, keys, value) for every entry one slip away from keys.
+
+        The kind names the slip that turns keys into the entry's keys, so
+        'insertion' means the entry has one key more.
+        """
+        keys = tuple(keys)
+        found = []
+        seen = {keys}
+
+        def collect(kind, other):
+            if other not in seen and other in self._exact:
+                seen.add(other)
+                found.extend((kind, other, value) for value in self._exact[other])
+
+        for i in range(len(keys)):
+            deleted = keys[:i] + keys[i + 1:]
+            collect('deletion', deleted)
+            for other, _ in self._deletions.get((deleted, i), ()):
+                collect('substitution', other)
+        for i in range(len(keys) - 1):
+            if keys[i] != keys[i + 1]:
+                collect('transposition', keys[:i] + (keys[i + 1], keys[i]) + keys[i + 2:])
+        for i in range(len(keys) + 1):
+            for other, _ in self._deletions.get((keys, i), ()):
+                collect('insertion', other)
+        return found
+
+    def pairs(self) -> Iterator[Tuple[str, Tuple[str, ...], Any, Tuple[str, ...], Any]]:
+        """Yield (kind, keys, value, other_keys, other_value) once per
+        unordered pair of neighboring entries, in insertion order.
+
+        For insertions and deletions the shorter sequence comes first, so
+        kind is 'insertion' or one of the symmetric kinds.
+        """
+        order = {}
+        for keys, _ in self._entries:
+            order.setdefault(keys, len(order))
+        for keys, value in self._entries:
+            for kind, other, other_value in self.neighbors(keys):
+                if kind == 'deletion' or (kind != 'insertion' and order[other] < order[keys]):
+                    continue
+                yield kind, keys, value, other, other_value
+
+
+# Regex patterns
+CATEGORY_PATTERN = re.compile(r'^#{5,}\s*$')  # Line of #####
+SECTION_HEADER = re.compile(r'^#\s+([A-Z][A-Z\s/&\-]+(?:\([^)]+\))?)\s*(?:—|–|-)\s*(.*)$')
+SUBSECTION_HEADER = re.compile(r'^##\s+([A-Z][A-Z\s/&\-]+)$')
+TAG_PATTERN = re.compile(r'\[(ICONIC|MNEMONIC)\]\s*(.*)')
+
+
+# Compose grammar (libX11 Compose(5)):
+#
+#   file       ::= { [ production | include ] [ "#" comment ] "\n" }
+#   include    ::= "include" string
+#   production ::= lhs ":" rhs
+#   lhs        ::= { modifiers "<" keysym ">" }+
+#   modifiers  ::= "None" | [ "!" ] { [ "~" ] modifier }
+#   modifier   ::= "Ctrl" | "Lock" | "Caps" | "Shift" | "Alt" | "Meta"
+#   rhs        ::= string [ keysym ] | keysym
+#   string     ::= '"' { char | "\\" | '\"' | "\" octal | "\x" hex } '"'
+COMPOSE_MODIFIERS = frozenset({'Ctrl', 'Lock', 'Caps', 'Shift', 'Alt', 'Meta'})
+_HEX_DIGITS = frozenset('0123456789abcdefABCDEF')
+
+# Grammar fragments: a keysym name, a quoted string body (anything but
+# quotes and backslashes, or an escape), and the right-hand side
+_KEYSYM = r'[A-Za-z0-9_]+'
+_STRING_BODY = r'[^"\\]*(?:\\.[^"\\]*)*'
+_RHS = r'''
+    \s* : \s*
+    (?: "(?P<string>''' + _STRING_BODY + r''')" \s* )?
+    (?P<keysym>''' + _KEYSYM + r''')?
+    \s* (?: \# \s* (?P<comment>.*) )?
+'''
+_KEY = '<' + _KEYSYM + '>'
+
+PRODUCTION_PATTERN = re.compile(r'(?P<lhs>' + _KEY + r'(?:\s*' + _KEY + r')*)' + _RHS, re.VERBOSE)
+MODIFIED_PRODUCTION_PATTERN = re.compile(r'(?P<lhs>(?:[^<>:"\#]*' + _KEY + r')+)' + _RHS, re.VERBOSE)
+INCLUDE_PATTERN = re.compile(r'include\s*"(?P<path>' + _STRING_BODY + r')"\s*(?:#.*)?')
+COMPOSE_KEY_PATTERN = re.compile(r'<(' + _KEYSYM + ')>')
+MODIFIED_KEY_PATTERN = re.compile(r'([^<>]*)<(' + _KEYSYM + ')>')
+MODIFIERS_PATTERN = re.compile(r'None|!?(?:\s*~?\s*(?:' + '|'.join(sorted(COMPOSE_MODIFIERS)) + r')\b)*')
+_STRING_PATTERN = re.compile(r'"(' + _STRING_BODY + r')"')
+_LHS_TOKEN = re.compile(r'<[^<>]*>?|[^\s<>]+|>')  # For error messages only
+_KEYSYM_PATTERN = re.compile(_KEYSYM)
+_ESCAPE_PATTERN = re.compile(rb'\\(?:([0-7]{1,3})|[xX]([0-9a-fA-F]{1,2})|(.))', re.DOTALL)
+_STRING_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t'}
+
+
+class ComposeSyntaxError(ValueError):
+    """A line that does not match the Compose grammar."""
+
+    def __init__(self, message: str, column: int = 0):
+        super().__init__(message)
+        self.message = message
+        self.column = column
+
+
+class ComposeProduction(NamedTuple):
+    """One `lhs : rhs` definition, as written in a Compose file."""
+    keys: Tuple[str, ...]  # All LHS keysyms, including a leading Multi_key
+    string: Optional[str]  # Decoded output string, if given
+    keysym: Optional[str]  # Output keysym, if given (e.g. "U2192", "eacute")
+    comment: Optional[str]  # Trailing comment (without "#")
+    modifiers: Optional[Tuple[str, ...]] = None  # Modifier prefix per key, if any
+
+    @property
+    def sequence_string(self) -> str:
+        """Normalized LHS like '<Multi_key> <g> <a>'"""
+        if self.modifiers is None:
+            return ' '.join(f'<{k}>' for k in self.keys)
+        return ' '.join(f'{m} <{k}>' if m else f'<{k}>'
+                        for m, k in zip(self.modifiers, self.keys))
+
+    @property
+    def codepoint(self) -> Optional[str]:
+        """Hex codepoint typed by the output keysym (U2192 -> '2192',
+        aacute -> '00E1'), or None if it types no character (dead_acute)"""
+        keysym = self.keysym
+        if not keysym:
+            return None
+        if keysym[0] == 'U' and 5 <= len(keysym) <= 7 and \
+                all(c in _HEX_DIGITS for c in keysym[1:]):
+            return keysym[1:]
+        info = keysym_info(keysym)
+        if info is not None and info.codepoint is not None:
+            return f'{info.codepoint:04X}'
+        return None
+
+    @property
+    def output(self) -> str:
+        """Output text: the string, else the character the keysym types,
+        else the keysym name"""
+        if self.string is not None:
+            return self.string
+        codepoint = self.codepoint
+        if codepoint:
+            return chr(int(codepoint, 16))
+        return self.keysym or ''
+
+
+class ComposeInclude(NamedTuple):
+    """An `include "path"` directive (path not yet expanded)."""
+    path: str
+
+
+def _replace_escape(match) -> bytes:
+    """The bytes one string escape stands for."""
+    octal, hex_digits, char = match.groups()
+    if octal:
+        return bytes((int(octal, 8) & 0xFF,))
+    if hex_digits:
+        return bytes((int(hex_digits, 16),))
+    return _STRING_ESCAPES.get(char, char)
+
+
+def decode_compose_string(body: str) -> str:
+    """Decode the escapes in a quoted string body (without the quotes).
+
+    Numeric escapes are bytes in the file's (UTF-8) encoding, so the
+    escapes are replaced in the encoded bytes and the result decoded.
+    """
+    decoded = _ESCAPE_PATTERN.sub(_replace_escape, body.encode('utf-8'))
+    return decoded.decode('utf-8', errors='replace')
+
+
+def _lex_modifiers(lhs: str) -> Tuple[Tuple[str, ...], Optional[Tuple[str, ...]]]:
+    """Split a left-hand side with modifier prefixes into keysyms and the
+    normalized prefix of each key ('' where a key has none)."""
+    keys = []
+    modifiers = []
+    for prefix, key in MODIFIED_KEY_PATTERN.findall(lhs):
+        prefix = ' '.join(prefix.split())
+        if prefix and not MODIFIERS_PATTERN.fullmatch(prefix):
+            raise ComposeSyntaxError(f'Unknown modifier in "{prefix}"')
+        keys.append(key)
+        modifiers.append(prefix)
+    return tuple(keys), tuple(modifiers) if any(modifiers) else None
+
+
+def _production_error(text: str) -> ComposeSyntaxError:
+    """Explain why a line that looks like a production failed to match."""
+    lhs, colon, rhs = text.partition(':')
+    if not colon or '"' in lhs or '#' in lhs:
+        return ComposeSyntaxError('Missing colon separator')
+
+    keyed = False
+    for token in _LHS_TOKEN.finditer(lhs):
+        word = token.group()
+        if word == '>':
+            return ComposeSyntaxError('Unexpected character ">" in key sequence', token.start())
+        if word[0] != '<':
+            keyed = False  # A modifier, which needs a keysym after it
+            continue
+        if len(word) == 1 or word[-1] != '>':
+            return ComposeSyntaxError('Unterminated keysym (missing ">")', token.start())
+        if word == '<>':
+            return ComposeSyntaxError('Empty keysym name "<>"', token.start())
+        if not _KEYSYM_PATTERN.fullmatch(word[1:-1]):
+            return ComposeSyntaxError(f'Invalid keysym name "{word}"', token.start())
+        keyed = True
+    if not keyed:
+        return ComposeSyntaxError('Modifier without keysym' if lhs.strip() else 'Missing key sequence')
+
+    rhs = rhs.strip()
+    string = _STRING_PATTERN.match(rhs)
+    if rhs[:1] == '"':
+        if string is None:
+            return ComposeSyntaxError('Unterminated output string', len(lhs) + 1)
+        rhs = rhs[string.end():]
+    tokens = rhs.partition('#')[0].split()
+    if len(tokens) > 1:
+        return ComposeSyntaxError(f'Unexpected text after output: "{tokens[1]}"')
+    if string is None:
+        return ComposeSyntaxError('Missing output string in quotes')
+    if tokens:
+        return ComposeSyntaxError(f'Invalid output keysym "{tokens[0]}"')
+    return ComposeSyntaxError('Malformed production')
+
+
+def lex_compose_line(line: str) -> Union[None, ComposeProduction, ComposeInclude]:
+    """Lex one line of a Compose file.
+
+    Covers the full libX11 Compose grammar: any leading keysym (Multi_key,
+    dead keys, plain keys), modifier prefixes (!, ~, None, Ctrl, ...),
+    escaped strings (\\", \\\\, octal, hex), keysym-only outputs and
+    include directives.
+
+    Returns:
+        ComposeProduction or ComposeInclude, or None for blank/comment lines
+
+    Raises:
+        ComposeSyntaxError: If the line is malformed
+    """
+    text = line.strip()
+    if not text or text[0] == '#':
+        return None
+
+    match = PRODUCTION_PATTERN.fullmatch(text)
+    if match is not None:
+        lhs, string, keysym, comment = match.groups()
+        keys = tuple(COMPOSE_KEY_PATTERN.findall(lhs))
+        modifiers = None
+    else:
+        match = MODIFIED_PRODUCTION_PATTERN.fullmatch(text)
+        if match is None:
+            if text.startswith('include') and text[7:8] in ('', ' ', '\t', '"'):
+                return _lex_include(text)
+            raise _production_error(text)
+        lhs, string, keysym, comment = match.groups()
+        keys, modifiers = _lex_modifiers(lhs)
+
+    if string is None:
+        if keysym is None:
+            raise _production_error(text)
+    elif '\\' in string:
+        string = decode_compose_string(string)
+    return ComposeProduction(keys, string, keysym, comment, modifiers)
+
+
+def _lex_include(text: str) -> ComposeInclude:
+    """Lex an `include "path"` line."""
+    match = INCLUDE_PATTERN.fullmatch(text)
+    if match is not None:
+        return ComposeInclude(decode_compose_string(match['path']))
+    rest = text[7:].lstrip()
+    if rest[:1] != '"':
+        raise ComposeSyntaxError('Include path must be a quoted string', 7)
+    if _STRING_PATTERN.match(rest) is None:
+        raise ComposeSyntaxError('Unterminated include path', 7)
+    raise ComposeSyntaxError('Unexpected text after include path')
+
+
+def iter_lines(filepath) -> Iterator[str]:
+    """Yield the decoded lines of a file from a read-only memory map.
+
+    Only the current line is decoded at any time, so memory use stays bounded
+    no matter how large the file is.
+
+    Raises:
+        OSError: If the file cannot be opened or mapped
+        UnicodeDecodeError: If a line is not valid UTF-8
+    """
+    with open(filepath, 'rb') as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped
+            return
+        with mapped:
+            for raw in iter(mapped.readline, b''):
+                yield raw.decode('utf-8')
+
+
+# Parse cache settings
+CACHE_FORMAT = 8  # Bump when cached row layouts or parse rules change
+CACHE_DIR_ENV = 'XCOMPOSE_STEM_CACHE_DIR'
+CACHE_MAX_ENTRIES = 256
+
+
+def get_cache_dir() -> Optional[Path]:
+    """Return the cache directory, or None if caching is disabled.
+
+    Defaults to $XDG_CACHE_HOME/xcompose-stem (~/.cache/xcompose-stem).
+    Set XCOMPOSE_STEM_CACHE_DIR to override it, or to an empty string to
+    disable caching entirely.
+    """
+    override = os.environ.get(CACHE_DIR_ENV)
+    if override is not None:
+        return Path(override).expanduser() if override else None
+
+    base = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(base) / 'xcompose-stem'
+
+
+def _file_digest(filepath) -> str:
+    """Content hash of a file (raises OSError if it cannot be read)."""
+    with open(filepath, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def _evict_lru(directory: Path, max_entries: int):
+    """Remove least-recently-used *.bin entries beyond max_entries."""
+    entries = []
+    for entry in directory.glob('*.bin'):
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except OSError:
+            continue
+
+    if len(entries) <= max_entries:
+        return
+
+    entries.sort()
+    for _, entry in entries[:len(entries) - max_entries]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+class ParseCache:
+    """Persistent on-disk cache of parsed sequence tables.
+
+    Each entry stores the rows produced by one parser ("kind") for one file,
+    serialized with marshal. An entry is only used if the file's resolved
+    path, size, mtime and content hash all match what was recorded, so warm
+    runs skip regex parsing entirely while edits are always picked up.
+
+    Entries are evicted least-recently-used once there are more than
+    max_entries of them. Every cache failure degrades to a normal parse.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        self.cache_dir = cache_dir if cache_dir is not None else get_cache_dir()
+        self.max_entries = max_entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    def _fingerprint(self, filepath: Path) -> tuple:
+        """Return (resolved path, size, mtime_ns, content hash) for a file."""
+        st = filepath.stat()
+        return (str(filepath.resolve()), st.st_size, st.st_mtime_ns, _file_digest(filepath))
+
+    def _entry_path(self, fingerprint: tuple, kind: str) -> Path:
+        name = hashlib.blake2b(f'{kind}\0{fingerprint[0]}'.encode('utf-8'),
+                               digest_size=16).hexdigest()
+        return self.cache_dir / f'{kind}-{name}.bin'
+
+    def get(self, filepath, kind: str) -> Optional[Any]:
+        """Return the cached rows for a file, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        try:
+            fingerprint = self._fingerprint(Path(filepath))
+        except OSError:
+            return None
+        return self._load(fingerprint, kind)
+
+    def get_content(self, kind: str, digest: str) -> Optional[Any]:
+        """Return rows cached under a content digest (e.g. a git blob id),
+        or None on a miss."""
+        if not self.enabled:
+            return None
+        return self._load((digest,), kind)
+
+    def _load(self, fingerprint: tuple, kind: str) -> Optional[Any]:
+        entry = self._entry_path(fingerprint, kind)
+        try:
+            with open(entry, 'rb') as f:
+                version, cached_fingerprint, rows = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+
+        if version != CACHE_FORMAT or tuple(cached_fingerprint) != fingerprint:
+            return None
+
+        # Touch the entry so eviction is least-recently-used
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+
+        return rows
+
+    def put(self, filepath, kind: str, rows: Any):
+        """Store parsed rows for a file (best effort)."""
+        if not self.enabled:
+            return
+        try:
+            fingerprint = self._fingerprint(Path(filepath))
+        except OSError:
+            return
+        self._store(fingerprint, kind, rows)
+
+    def put_content(self, kind: str, digest: str, rows: Any):
+        """Store rows under a content digest (best effort)."""
+        if self.enabled:
+            self._store((digest,), kind, rows)
+
+    def _store(self, fingerprint: tuple, kind: str, rows: Any):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            entry = self._entry_path(fingerprint, kind)
+
+            # Write atomically so concurrent tools never see partial entries
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    marshal.dump((CACHE_FORMAT, fingerprint, rows), f)
+                os.replace(tmp_path, entry)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            _evict_lru(self.cache_dir, self.max_entries)
+        except (OSError, ValueError):
+            pass
+
+    def clear(self) -> int:
+        """Remove all cache entries. Returns the number removed."""
+        if not self.enabled or not self.cache_dir.is_dir():
+            return 0
+
+        removed = 0
+        for entry in self.cache_dir.glob('*.bin'):
+            try:
+                entry.unlink()
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+
+# Result cache settings
+RESULT_CACHE_SUBDIR = 'results'
+RESULT_CACHE_MAX_OUTPUT = 8 * 2**20  # Larger reports are not cached
+RESULT_STATS_FILE = 'stats.log'
+RESULT_STATS_MAX_BYTES = 2**20  # Trim the stats log beyond this
+
+
+class _Recording:
+    """What a run wrote to stdout and stderr, in order, as (channel, text)
+    chunks with channel 1 or 2 (up to a size limit)."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.chunks: Optional[List[Tuple[int, str]]] = []
+        self.size = 0
+
+    def add(self, channel: int, text: str):
+        if self.chunks is None:
+            return
+        self.size += len(text)
+        if self.size > self.limit:
+            self.chunks = None  # Too large to cache; keep streaming
+        elif self.chunks and self.chunks[-1][0] == channel:
+            self.chunks[-1] = (channel, self.chunks[-1][1] + text)
+        else:
+            self.chunks.append((channel, text))
+
+
+class _Tee(io.TextIOBase):
+    """Text stream that writes through to another stream and records a copy."""
+
+    def __init__(self, stream, channel: int, recording: _Recording):
+        self.stream = stream
+        self.channel = channel
+        self.recording = recording
+
+    def write(self, text: str) -> int:
+        self.stream.write(text)
+        self.recording.add(self.channel, text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self) -> bool:
+        return self.stream.isatty()
+
+
+def _replay(chunks: List[Tuple[int, str]]):
+    """Write recorded (channel, text) chunks back to stdout and stderr."""
+    for channel, text in chunks:
+        stream = sys.stdout if channel == 1 else sys.stderr
+        stream.write(text)
+        stream.flush()  # Keep stdout and stderr interleaved as recorded
+
+
+class ResultCache:
+    """Persistent cache of complete tool runs (stdout, stderr and exit code).
+
+    An entry is keyed on the tool's code (its script, this library and the
+    data tables in tools/data), its options and the content of every input file it was
+    given. It also records the content hash of every file the run read,
+    such as resolved includes and the system Compose file, and is only
+    replayed if all of them are unchanged.
+
+    Lives in a subdirectory of the parse cache and is disabled with it.
+    Every lookup is logged, for --cache-stats.
+    """
+
+    def __init__(self, tool: str, tool_file: str, cache_dir: Optional[Path] = None,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        base = cache_dir if cache_dir is not None else get_cache_dir()
+        self.cache_dir = base / RESULT_CACHE_SUBDIR if base is not None else None
+        self.tool = tool
+        self.tool_file = tool_file
+        self.max_entries = max_entries
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache_dir is not None
+
+    def key(self, options: Dict[str, Any], inputs: Iterable[str]) -> Optional[str]:
+        """Cache key for a run, or None if an input cannot be read."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((CACHE_FORMAT, __version__, self.tool, sorted(options.items()))).encode('utf-8'))
+        try:
+            for code_file in (self.tool_file, __file__, *sorted(DATA_DIR.glob('*.tsv'))):
+                h.update(_file_digest(code_file).encode('ascii'))
+            for path in inputs:
+                h.update(f'\0{path}\0{_file_digest(path)}'.encode('utf-8'))
+        except OSError:
+            return None
+        return h.hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f'{self.tool}-{key}.bin'
+
+    def lookup(self, key: str) -> Optional[Tuple[int, List[Tuple[int, str]], float]]:
+        """Return (exit code, output chunks, seconds the run took), or None.
+
+        Output chunks are (1 for stdout or 2 for stderr, text), in order.
+        """
+        entry = self._entry_path(key)
+        try:
+            with open(entry, 'rb') as f:
+                version, exit_code, output, seconds, dependencies = marshal.loads(f.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if version != CACHE_FORMAT:
+            return None
+
+        for path, digest in dependencies:
+            try:
+                if _file_digest(path) != digest:
+                    return None
+            except OSError:
+                return None
+
+        try:
+            os.utime(entry)  # Least-recently-used eviction
+        except OSError:
+            pass
+        return exit_code, output, seconds
+
+    def store(self, key: str, exit_code: int, output: List[Tuple[int, str]], seconds: float,
+              dependencies: Iterable[str]):
+        """Record a run (best effort)."""
+        try:
+            recorded = []
+            for path in dict.fromkeys(os.path.realpath(p) for p in dependencies):
+                recorded.append((path, _file_digest(path)))
+
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    marshal.dump((CACHE_FORMAT, exit_code, output, seconds, recorded), f)
+                os.replace(tmp_path, self._entry_path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            _evict_lru(self.cache_dir, self.max_entries)
+        except (OSError, ValueError):
+            pass
+
+    def log(self, hit: bool, seconds: float):
+        """Append one lookup to the stats log: seconds saved on a hit,
+        seconds spent on a miss."""
+        stats = self.cache_dir / RESULT_STATS_FILE
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(stats, 'a', encoding='utf-8') as f:
+                f.write(f"{self.tool}\t{'hit' if hit else 'miss'}\t{seconds:.6f}\n")
+            if stats.stat().st_size > RESULT_STATS_MAX_BYTES:
+                lines = stats.read_text(encoding='utf-8').splitlines(keepends=True)
+                stats.write_text(''.join(lines[len(lines) // 2:]), encoding='utf-8')
+        except OSError:
+            pass
+
+    def run(self, options: Dict[str, Any], inputs: List[str],
+            compute: Callable[[], Tuple[int, Iterable[str]]]) -> int:
+        """Replay a cached run, or call compute() and cache what it prints.
+
+        Args:
+            options: Every option that affects the output
+            inputs: Files named on the command line
+            compute: Runs the tool, printing to stdout and stderr; returns
+                (exit code, any other files it read)
+
+        Returns:
+            The exit code
+        """
+        if not self.enabled:
+            return compute()[0]
+
+        start = time.perf_counter()
+        key = self.key(options, inputs)
+        if key is None:
+            return compute()[0]
+
+        cached = self.lookup(key)
+        if cached is not None:
+            exit_code, output, seconds = cached
+            _replay(output)
+            self.log(True, seconds - (time.perf_counter() - start))
+            return exit_code
+
+        recording = _Recording(RESULT_CACHE_MAX_OUTPUT)
+        with contextlib.redirect_stdout(_Tee(sys.stdout, 1, recording)), \
+                contextlib.redirect_stderr(_Tee(sys.stderr, 2, recording)):
+            exit_code, dependencies = compute()
+        seconds = time.perf_counter() - start
+        if recording.chunks is not None:
+            self.store(key, exit_code, recording.chunks, seconds, list(inputs) + list(dependencies))
+        self.log(False, seconds)
+        return exit_code
+
+
+def format_result_cache_stats(cache_dir: Optional[Path] = None) -> str:
+    """Hit rate and time saved per tool, from the result cache's stats log."""
+    base = cache_dir if cache_dir is not None else get_cache_dir()
+    if base is None:
+        return f"Result cache disabled ({CACHE_DIR_ENV} is empty)"
+    directory = base / RESULT_CACHE_SUBDIR
+
+    runs: Dict[str, List[float]] = defaultdict(lambda: [0, 0, 0.0, 0.0])  # hits, misses, saved, spent
+    try:
+        with open(directory / RESULT_STATS_FILE, 'r', encoding='utf-8') as f:
+            for line in f:
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) != 3:
+                    continue
+                tool, event, seconds = parts
+                row = runs[tool]
+                if event == 'hit':
+                    row[0] += 1
+                    row[2] += max(float(seconds), 0.0)
+                else:
+                    row[1] += 1
+                    row[3] += float(seconds)
+    except (OSError, ValueError):
+        pass
+
+    entries = list(directory.glob('*.bin')) if directory.is_dir() else []
+    size = sum(entry.stat().st_size for entry in entries)
+    lines = [f"Result cache: {directory} ({len(entries)} entries, {size / 1024:.0f} KiB)", ""]
+    if not runs:
+        lines.append("No cached runs recorded yet")
+        return '\n'.join(lines)
+
+    lines.append(f"{'Tool':<26} {'Runs':>6} {'Hits':>6} {'Hit rate':>9} {'Avg miss':>9} {'Saved':>9}")
+    lines.append("-" * 70)
+    totals = [0, 0, 0.0, 0.0]
+    for tool in sorted(runs):
+        hits, misses, saved, spent = runs[tool]
+        totals = [t + v for t, v in zip(totals, runs[tool])]
+        average = f"{spent / misses * 1000:.0f} ms" if misses else '-'
+        lines.append(f"{tool:<26} {hits + misses:>6} {hits:>6} {hits / (hits + misses):>9.1%} "
+                     f"{average:>9} {saved:>8.2f}s")
+    hits, misses, saved, _ = totals
+    lines.append("-" * 70)
+    lines.append(f"{'total':<26} {hits + misses:>6} {hits:>6} {hits / (hits + misses):>9.1%} "
+                 f"{'':>9} {saved:>8.2f}s")
+    return '\n'.join(lines)
+
+
+@dataclass
+class ParseDelta:
+    """Sequences that differ between two parses of the same file."""
+    added: List[XComposeSequence] = field(default_factory=list)
+    removed: List[XComposeSequence] = field(default_factory=list)
+    changed: List[Tuple[XComposeSequence, XComposeSequence]] = field(default_factory=list)  # (old, new)
+    reparsed_lines: int = 0  # Lines that went through the regex parser
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+# Header state before the first line of a file: (category, subcategory)
+_INITIAL_STATE = ("Uncategorized", None)
+
+
 class XComposeParser:
     """Unified parser for XCompose configuration files.
 
@@ -81,12 +1377,39 @@ class XComposeParser:
     Used by all XCompose-STEM tools for consistent parsing.
     """
 
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, cache: Optional[ParseCache] = None):
         self.filepath = Path(filepath)
+        self.cache = cache if cache is not None else ParseCache()
         self.sequences: List[XComposeSequence] = []
         self.categories: Dict[str, List[XComposeSequence]] = defaultdict(list)
         self.current_category = "Uncategorized"
         self.current_subcategory = None
+        self.includes: List[Tuple[int, str]] = []  # (line_num, raw include path)
+
+        # Buffer state kept by parse_lines()/update() for incremental parsing
+        self._lines: Optional[List[str]] = None
+        self._states: List[tuple] = []  # Header state after each line
+        self._line_seqs: Dict[int, XComposeSequence] = {}
+
+    def iter_sequences(self) -> Iterator[XComposeSequence]:
+        """Yield sequences one at a time without building the full table.
+
+        The file is memory-mapped and read line by line, so callers that only
+        need a single pass (counting, filtering, comparing) never hold more
+        than one sequence in memory.
+
+        Raises:
+            OSError: If the file cannot be read
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        self.current_category = "Uncategorized"
+        self.current_subcategory = None
+        self.includes = []
+
+        for line_num, line in enumerate(iter_lines(self.filepath), 1):
+            seq = self._parse_line(line.strip(), line_num)
+            if seq is not None:
+                yield seq
 
     def parse(self) -> bool:
         """Parse the XCompose file and extract all sequences.
@@ -98,83 +1421,251 @@ class XComposeParser:
             print(f"Error: File not found: {self.filepath}", file=sys.stderr)
             return False
 
+        cached = self.cache.get(self.filepath, 'xcompose')
+        if cached is not None:
+            for row in cached['sequences']:
+                self._add(XComposeSequence(*row))
+            self.includes = [tuple(include) for include in cached['includes']]
+            return True
+
         try:
-            with open(self.filepath, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            for seq in self.iter_sequences():
+                self._add(seq)
         except Exception as e:
             print(f"Error reading file: {e}", file=sys.stderr)
             return False
 
-        # Regex patterns
-        category_pattern = re.compile(r'^#{5,}\s*$')  # Line of #####
-        section_header = re.compile(r'^#\s+([A-Z][A-Z\s/&\-]+(?:\([^)]+\))?)\s*(?:—|–|-)\s*(.*)$')
-        subsection_header = re.compile(r'^##\s+([A-Z][A-Z\s/&\-]+)$')
-        sequence_pattern = re.compile(
-            r'^<Multi_key>(\s+<[^>]+>)+\s*:\s*"([^"]+)"(?:\s+U([0-9A-Fa-f]{4,6}))?(?:\s*#\s*(.*))?$'
-        )
+        self.cache.put(self.filepath, 'xcompose', {
+            'sequences': [
+                (tuple(seq.keys), seq.symbol, seq.codepoint, seq.comment, seq.tag,
+                 seq.category, seq.subcategory, seq.line_num)
+                for seq in self.sequences
+            ],
+            'includes': self.includes,
+        })
+        return True
+
+    def parse_lines(self, lines: List[str]) -> List[XComposeSequence]:
+        """Parse an in-memory buffer, keeping state for update().
 
-        for line_num, line in enumerate(lines, 1):
-            line_stripped = line.strip()
+        Returns:
+            List of parsed sequences
+        """
+        self._lines = None
+        self.update(lines)
+        return self.sequences
+
+    def update(self, lines: List[str]) -> ParseDelta:
+        """Incrementally re-parse after an edit.
+
+        Diffs the new buffer against the previous one at line granularity
+        and only runs the parser over changed lines. Untouched lines reuse
+        their previous result (shifted to their new line number) as long as
+        the category/subcategory state flowing into them is unchanged; when
+        an edited header changes that state, parsing continues until the
+        state matches the previous parse again.
+
+        Args:
+            lines: The complete new buffer, one entry per line
+
+        Returns:
+            ParseDelta with the sequences added, removed or changed
+        """
+        old_lines = self._lines if self._lines is not None else []
+        old_states = self._states
+        old_seqs = self._line_seqs
+        old_includes = dict(self.includes)
 
-            # Skip empty lines and includes
-            if not line_stripped or line_stripped.startswith('include'):
+        new_states: List[tuple] = []
+        new_seqs: Dict[int, XComposeSequence] = {}
+        self.includes = []
+        carried_old = set()
+        carried_new = set()
+        reparsed = 0
+        state = _INITIAL_STATE
+
+        old_seq_lines = sorted(old_seqs)
+
+        def reuse(i1: int, i2: int, j1: int):
+            """Carry old lines [i1, i2) (0-based) over, starting at new line j1."""
+            shift = j1 - i1
+            start = bisect.bisect_left(old_seq_lines, i1 + 1)
+            end = bisect.bisect_right(old_seq_lines, i2)
+            for line_num in old_seq_lines[start:end]:
+                seq = old_seqs[line_num]
+                new_seqs[line_num + shift] = seq if not shift else seq.replace(line_num=line_num + shift)
+                carried_old.add(line_num)
+                carried_new.add(line_num + shift)
+            for line_num, raw in old_includes.items():
+                if i1 < line_num <= i2:
+                    self.includes.append((line_num + shift, raw))
+            new_states.extend(old_states[i1:i2])
+
+        def parse(j: int):
+            nonlocal reparsed, state
+            self.current_category, self.current_subcategory = state
+            seq = self._parse_line(lines[j].strip(), j + 1)
+            if seq is not None:
+                new_seqs[j + 1] = seq
+            state = (self.current_category, self.current_subcategory)
+            new_states.append(state)
+            reparsed += 1
+
+        for tag, i1, i2, j1, j2 in self._diff_opcodes(old_lines, lines):
+            if tag != 'equal':
+                for j in range(j1, j2):
+                    parse(j)
                 continue
 
-            # Check for category headers (lines of ####)
-            if category_pattern.match(line_stripped):
+            i, j = i1, j1
+            while i < i2:
+                state_before = old_states[i - 1] if i else _INITIAL_STATE
+                if state == state_before:
+                    # State agrees with the old parse: carry the rest of the block over
+                    reuse(i, i2, j)
+                    state = old_states[i2 - 1]
+                    break
+                parse(j)
+                i += 1
+                j += 1
+
+        # Sequences that were not carried over unchanged
+        fresh = [new_seqs[n] for n in sorted(new_seqs) if n not in carried_new]
+        stale = [old_seqs[n] for n in sorted(old_seqs) if n not in carried_old]
+        delta = self._compare(stale, fresh, reparsed)
+
+        self._lines = list(lines)
+        self._states = new_states
+        self._line_seqs = new_seqs
+        self.sequences = [new_seqs[line_num] for line_num in sorted(new_seqs)]
+        self.categories = defaultdict(list)
+        for seq in self.sequences:
+            self.categories[seq.category].append(seq)
+        self.current_category, self.current_subcategory = state
+        return delta
+
+    @staticmethod
+    def _diff_opcodes(old: List[str], new: List[str]) -> List[tuple]:
+        """Line diff opcodes, trimming the common prefix/suffix first so
+        typical single-region edits never reach SequenceMatcher."""
+        prefix = 0
+        limit = min(len(old), len(new))
+        while prefix < limit and old[prefix] == new[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix and
+               old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]):
+            suffix += 1
+
+        opcodes = []
+        if prefix:
+            opcodes.append(('equal', 0, prefix, 0, prefix))
+
+        old_mid = old[prefix:len(old) - suffix]
+        new_mid = new[prefix:len(new) - suffix]
+        if old_mid or new_mid:
+            matcher = difflib.SequenceMatcher(None, old_mid, new_mid, autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                opcodes.append((tag, i1 + prefix, i2 + prefix, j1 + prefix, j2 + prefix))
+
+        if suffix:
+            opcodes.append(('equal', len(old) - suffix, len(old), len(new) - suffix, len(new)))
+        return opcodes
+
+    @staticmethod
+    def _compare(stale: List[XComposeSequence], fresh: List[XComposeSequence],
+                 reparsed: int) -> ParseDelta:
+        """Pair old and new sequences by keys to classify the edit."""
+        delta = ParseDelta(reparsed_lines=reparsed)
+
+        def content(seq):
+            return (seq.symbol, seq.codepoint, seq.comment, seq.tag, seq.category, seq.subcategory)
+
+        pending: Dict[tuple, List[XComposeSequence]] = defaultdict(list)
+        for seq in stale:
+            pending[seq.key_ids].append(seq)
+
+        for seq in fresh:
+            candidates = pending.get(seq.key_ids)
+            if not candidates:
+                delta.added.append(seq)
                 continue
+            old = candidates.pop(0)
+            if content(old) != content(seq):
+                delta.changed.append((old, seq))
+
+        for candidates in pending.values():
+            delta.removed.extend(candidates)
+        delta.removed.sort(key=lambda seq: seq.line_num)
+        return delta
+
+    def _add(self, seq: XComposeSequence):
+        self.sequences.append(seq)
+        self.categories[seq.category].append(seq)
+
+    def _parse_line(self, line_stripped: str, line_num: int) -> Optional[XComposeSequence]:
+        """Parse one stripped line, updating category state.
+
+        Returns:
+            XComposeSequence for sequence definitions, None for anything else
+        """
+        # Skip empty lines
+        if not line_stripped:
+            return None
+
+        if line_stripped[0] == '#':
+            # Check for category headers (lines of ####)
+            if CATEGORY_PATTERN.match(line_stripped):
+                return None
 
             # Check for section headers
-            section_match = section_header.match(line_stripped)
+            section_match = SECTION_HEADER.match(line_stripped)
             if section_match:
                 self.current_category = section_match.group(1).strip()
                 self.current_subcategory = None
-                continue
+                return None
 
             # Check for subsection headers
-            subsection_match = subsection_header.match(line_stripped)
+            subsection_match = SUBSECTION_HEADER.match(line_stripped)
             if subsection_match:
                 self.current_subcategory = subsection_match.group(1).strip()
-                continue
+            return None
 
-            # Check for sequence definitions
-            seq_match = sequence_pattern.match(line_stripped)
-            if seq_match:
-                # Extract keys (everything between < >)
-                keys_raw = seq_match.group(0)
-                keys = re.findall(r'<([^>]+)>', keys_raw)
-                # Remove Multi_key from the list
-                keys = [k for k in keys if k != 'Multi_key']
-
-                symbol = seq_match.group(2)
-                codepoint = seq_match.group(3) if seq_match.group(3) else None
-                comment_raw = seq_match.group(4).strip() if seq_match.group(4) else None
-
-                # Extract tag and clean comment
-                tag = None
-                comment = comment_raw
-                if comment_raw:
-                    tag_match = re.match(r'\[(ICONIC|MNEMONIC)\]\s*(.*)', comment_raw)
-                    if tag_match:
-                        tag = tag_match.group(1)
-                        comment = tag_match.group(2).strip()
-
-                # Create sequence object
-                seq = XComposeSequence(
-                    keys=keys,
-                    symbol=symbol,
-                    codepoint=codepoint,
-                    comment=comment,
-                    tag=tag,
-                    category=self.current_category,
-                    subcategory=self.current_subcategory,
-                    line_num=line_num
-                )
-
-                self.sequences.append(seq)
-                self.categories[self.current_category].append(seq)
+        # Sequence definitions and includes; malformed lines are the
+        # validator's business, the parser just skips them
+        try:
+            item = lex_compose_line(line_stripped)
+        except ComposeSyntaxError:
+            return None
+        if item.__class__ is ComposeInclude:
+            self.includes.append((line_num, item.path))
+            return None
 
-        return True
+        # Only a leading Multi_key is implicit; dead-key and plain-key
+        # sequences keep all their keys
+        keys = item.keys
+        if keys[0] == 'Multi_key':
+            keys = keys[1:]
+
+        # Extract tag and clean comment
+        tag = None
+        comment = item.comment or None
+        if comment:
+            tag_match = TAG_PATTERN.match(comment)
+            if tag_match:
+                tag = tag_match.group(1)
+                comment = tag_match.group(2).strip()
+
+        return XComposeSequence(
+            keys=keys,
+            symbol=item.output,
+            codepoint=item.codepoint,
+            comment=comment,
+            tag=tag,
+            category=self.current_category,
+            subcategory=self.current_subcategory,
+            line_num=line_num
+        )
 
     def get_sequences(self) -> List[XComposeSequence]:
         """Get all parsed sequences."""
@@ -200,5 +1691,514 @@ def parse_xcompose(filepath: str) -> Optional[List[XComposeSequence]]:
     return None
 
 
-__all__ = ['XComposeSequence', 'XComposeParser', 'parse_xcompose']
+# Below this many items, process start-up costs more than it saves
+PARALLEL_MIN_ITEMS = 8
+
+
+def default_jobs() -> int:
+    """Number of worker processes to use when --jobs is not given."""
+    return os.cpu_count() or 1
+
+
+def parallel_map(func, items: Iterable, jobs: Optional[int] = None,
+                 min_items: int = PARALLEL_MIN_ITEMS) -> List:
+    """Apply func to every item on a process pool, preserving input order.
+
+    Falls back to a plain serial loop when jobs is 1, when there are fewer
+    than min_items items, or when a process pool cannot be started (e.g. no
+    /dev/shm in a sandbox). func must be a module-level function so that it
+    can be pickled.
+
+    Args:
+        func: Function of one argument
+        items: Arguments to map over
+        jobs: Worker processes (None or 0 for one per CPU)
+        min_items: Smallest input worth spreading over processes
+
+    Returns:
+        List of results, in the same order as items
+    """
+    return list(parallel_imap(func, items, jobs=jobs, min_items=min_items))
+
+
+def parallel_imap(func, items: Iterable, jobs: Optional[int] = None,
+                  min_items: int = PARALLEL_MIN_ITEMS) -> Iterator:
+    """Like parallel_map, but yield each result as soon as it (and every
+    result before it) is ready, so callers can stream output."""
+    items = list(items)
+    jobs = min(jobs or default_jobs(), len(items))
+    if jobs <= 1 or len(items) < min_items:
+        for item in items:
+            yield func(item)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    # A few chunks per worker balances uneven file sizes without paying
+    # one round trip per item
+    chunksize = max(1, len(items) // (jobs * 4))
+    done = 0
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for result in executor.map(func, items, chunksize=chunksize):
+                done += 1
+                yield result
+    except (OSError, NotImplementedError, BrokenProcessPool):
+        # Finish serially from wherever the pool gave up
+        for item in items[done:]:
+            yield func(item)
+
+
+def _parse_for_batch(filepath: str) -> Optional[List[XComposeSequence]]:
+    parser = XComposeParser(filepath)
+    if parser.parse():
+        return parser.get_sequences()
+    return None
+
+
+def parse_many(filepaths: Iterable[str], jobs: Optional[int] = None,
+               min_items: int = PARALLEL_MIN_ITEMS) -> List[Optional[List[XComposeSequence]]]:
+    """Parse several XCompose/Compose files, using every core by default.
+
+    Workers share the on-disk parse cache, so unchanged files are not
+    reparsed on later runs.
+
+    Args:
+        filepaths: Paths to parse
+        jobs: Worker processes (None or 0 for one per CPU, 1 for serial)
+        min_items: Parse serially when given fewer files than this
+
+    Returns:
+        One entry per path, in input order: the parsed sequences, or None
+        if that file could not be parsed
+    """
+    return parallel_map(_parse_for_batch, filepaths, jobs=jobs, min_items=min_items)
+
+
+# System Compose file locations (as used by libX11)
+X11_LOCALE_DIR = '/usr/share/X11/locale'
+
+
+def detect_locale() -> Optional[str]:
+    """Return the current locale name in X11 form (e.g. 'en_US.UTF-8')."""
+    for var in ('LC_ALL', 'LC_CTYPE', 'LANG'):
+        value = os.environ.get(var)
+        if value:
+            return value.split('@')[0]
+
+    import locale
+    try:
+        current = locale.getlocale()[0]
+    except ValueError:
+        return None
+    if current and '.' not in current:
+        current = f"{current}.UTF-8"
+    return current
+
+
+def find_locale_compose(locale_name: Optional[str] = None,
+                        locale_dir: str = X11_LOCALE_DIR) -> Optional[str]:
+    """Return the system Compose file libX11 loads for a locale ("%L").
+
+    Looks the locale up in compose.dir, falling back to
+    <locale_dir>/<locale>/Compose.
+    """
+    locale_name = locale_name or detect_locale()
+    if not locale_name:
+        return None
+
+    compose_dir = Path(locale_dir) / 'compose.dir'
+    try:
+        for line in iter_lines(compose_dir):
+            parts = line.split()
+            if len(parts) == 2 and not parts[0].startswith('#') and parts[1] == locale_name:
+                candidate = Path(locale_dir) / parts[0].rstrip(':')
+                if candidate.exists():
+                    return str(candidate)
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    candidate = Path(locale_dir) / locale_name / 'Compose'
+    return str(candidate) if candidate.exists() else None
+
+
+def expand_include_path(raw: str, including_file: Optional[Path] = None,
+                        locale_compose: Optional[str] = None,
+                        home: Optional[str] = None,
+                        locale_dir: str = X11_LOCALE_DIR) -> Optional[str]:
+    """Expand %L, %H, %S and %% in an include path.
+
+    Returns:
+        The expanded path, or None if %L is used and no locale Compose file
+        is known. Relative paths are taken relative to the including file.
+    """
+    expanded = []
+    i = 0
+    while i < len(raw):
+        if raw[i] == '%' and i + 1 < len(raw):
+            code = raw[i + 1]
+            if code == 'L':
+                if not locale_compose:
+                    return None
+                expanded.append(locale_compose)
+            elif code == 'H':
+                expanded.append(home if home is not None else os.path.expanduser('~'))
+            elif code == 'S':
+                expanded.append(locale_dir)
+            elif code == '%':
+                expanded.append('%')
+            else:
+                expanded.append(raw[i:i + 2])
+            i += 2
+        else:
+            expanded.append(raw[i])
+            i += 1
+
+    path = ''.join(expanded)
+    if including_file is not None and not os.path.isabs(path):
+        path = str(including_file.parent / path)
+    return path
+
+
+@dataclass
+class EffectiveEntry:
+    """One sequence of the effective table, with the file it came from."""
+    sequence: XComposeSequence
+    source: str  # File that defines the winning entry
+    overridden: List[Tuple[str, XComposeSequence]] = field(default_factory=list)
+
+
+@dataclass
+class EffectiveTable:
+    """The table XIM actually loads from a root file, after includes.
+
+    Entries are keyed by key tuple; a later definition replaces an earlier
+    one, as in libX11. `layers` lists every file in load order.
+    """
+    root: str
+    layers: List[str] = field(default_factory=list)
+    entries: Dict[Tuple[str, ...], EffectiveEntry] = field(default_factory=dict)
+    problems: List[str] = field(default_factory=list)  # Missing files, cycles
+
+    def sequences(self) -> List[XComposeSequence]:
+        return [entry.sequence for entry in self.entries.values()]
+
+    def by_source(self) -> Dict[str, List[EffectiveEntry]]:
+        """Group the winning entries by the file that defines them."""
+        grouped: Dict[str, List[EffectiveEntry]] = {layer: [] for layer in self.layers}
+        for entry in self.entries.values():
+            grouped.setdefault(entry.source, []).append(entry)
+        return grouped
+
+    def overrides(self) -> List[EffectiveEntry]:
+        """Entries whose sequence was also defined by an earlier layer."""
+        return [entry for entry in self.entries.values() if entry.overridden]
+
+
+class IncludeResolver:
+    """Resolves include directives into an EffectiveTable.
+
+    Each file is parsed at most once per resolver (and through ParseCache,
+    at most once across runs), even when several roots include it.
+    """
+
+    def __init__(self, locale_compose: Optional[str] = None, home: Optional[str] = None,
+                 locale_dir: str = X11_LOCALE_DIR, cache: Optional[ParseCache] = None):
+        self.locale_compose = locale_compose or find_locale_compose(locale_dir=locale_dir)
+        self.home = home
+        self.locale_dir = locale_dir
+        self.cache = cache if cache is not None else ParseCache()
+        self._parsed: Dict[str, Optional[XComposeParser]] = {}
+
+    def load(self, path: str) -> Optional[XComposeParser]:
+        """Parse a file once and memoize the result (None if unreadable)."""
+        key = os.path.realpath(path)
+        if key not in self._parsed:
+            parser = XComposeParser(key, cache=self.cache)
+            self._parsed[key] = parser if parser.parse() else None
+        return self._parsed[key]
+
+    def resolve(self, root: str) -> EffectiveTable:
+        """Build the effective table for a root file such as ~/.XCompose."""
+        table = EffectiveTable(root=str(root))
+        self._resolve_into(str(root), table, stack=())
+        return table
+
+    def _resolve_into(self, path: str, table: EffectiveTable, stack: tuple):
+        real = os.path.realpath(path)
+        if real in stack:
+            table.problems.append(f"Include cycle: {' -> '.join(stack + (real,))}")
+            return
+
+        parser = self.load(real)
+        if parser is None:
+            table.problems.append(f"Cannot read included file: {path}")
+            return
+        table.layers.append(real)
+
+        # Replay definitions and includes in file order
+        events = [(seq.line_num, 1, seq) for seq in parser.sequences]
+        events.extend((line_num, 0, raw) for line_num, raw in parser.includes)
+        events.sort(key=lambda event: (event[0], event[1]))
+
+        for line_num, kind, item in events:
+            if kind == 0:
+                target = expand_include_path(item, Path(real), self.locale_compose,
+                                             self.home, self.locale_dir)
+                if target is None:
+                    table.problems.append(f"{real}:{line_num}: cannot expand {item!r} (unknown locale)")
+                    continue
+                self._resolve_into(target, table, stack + (real,))
+                continue
+
+            keys = item.keys
+            previous = table.entries.get(keys)
+            entry = EffectiveEntry(item, real)
+            if previous is not None:
+                entry.overridden = previous.overridden + [(previous.source, previous.sequence)]
+                # Keep file order: a replaced entry moves to its new position
+                del table.entries[keys]
+            table.entries[keys] = entry
+
+
+def resolve_includes(root: str, locale_compose: Optional[str] = None) -> EffectiveTable:
+    """Convenience function to build the effective table for a root file."""
+    return IncludeResolver(locale_compose=locale_compose).resolve(root)
+
+
+class SourcedProduction(NamedTuple):
+    """A production together with the file and line that define it."""
+    path: str
+    line_num: int
+    production: ComposeProduction
+
+
+def iter_compose_items(filepath) -> Iterator[Tuple[int, Union[ComposeProduction, ComposeInclude]]]:
+    """Yield (line_num, item) for every production and include of a file.
+
+    Blank, comment and malformed lines are skipped. Unlike XComposeParser,
+    keys are kept exactly as written, including a leading Multi_key.
+    """
+    for line_num, line in enumerate(iter_lines(filepath), 1):
+        line = line.strip()
+        if not line or line[0] == '#':
+            continue
+        try:
+            item = lex_compose_line(line)
+        except ComposeSyntaxError:
+            continue
+        if item is not None:
+            yield line_num, item
+
+
+class CrossFileIndex:
+    """One prefix index over several Compose files, following includes.
+
+    Used to find sequences in one file that shadow (or are shadowed by)
+    sequences in another, e.g. a system default that is a strict prefix of
+    one of ours once `include "%L"` is active. Keys keep a leading
+    Multi_key, so dead-key sequences are not conflated with Multi_key ones.
+
+    Each file is read at most once, however often it is included. A later
+    definition of the same keys replaces an earlier one, as in libX11, and
+    only the surviving entries are indexed.
+    """
+
+    def __init__(self, locale_compose: Optional[str] = None, home: Optional[str] = None,
+                 locale_dir: str = X11_LOCALE_DIR):
+        self.locale_compose = locale_compose or find_locale_compose(locale_dir=locale_dir)
+        self.home = home
+        self.locale_dir = locale_dir
+        self.files: List[str] = []  # Files in load order
+        self.entries: Dict[Tuple[str, ...], SourcedProduction] = {}
+        self.problems: List[str] = []  # Unreadable includes, unknown %L
+
+    def add_file(self, path: str):
+        """Index a file from disk, and everything it includes."""
+        real = os.path.realpath(path)
+        if real in self.files:
+            return
+        try:
+            items = list(iter_compose_items(real))
+        except (OSError, UnicodeDecodeError) as e:
+            self.problems.append(f"Cannot read {path}: {e}")
+            return
+        self.add_items(real, items)
+
+    def add_items(self, path: str, items: Iterable[Tuple[int, Any]]):
+        """Index already-lexed (line_num, item) pairs of a file, e.g. the
+        in-memory buffer of the file being validated."""
+        real = os.path.realpath(path)
+        if real in self.files:
+            return
+        self.files.append(real)
+
+        for line_num, item in items:
+            if item.__class__ is ComposeInclude:
+                target = expand_include_path(item.path, Path(real), self.locale_compose,
+                                             self.home, self.locale_dir)
+                if target is None:
+                    self.problems.append(f"{real}:{line_num}: cannot expand {item.path!r} (unknown locale)")
+                else:
+                    self.add_file(target)
+                continue
+
+            keys = item.keys
+            if item.modifiers is not None:
+                keys = tuple(f'{m} {k}' if m else k for m, k in zip(item.modifiers, keys))
+            self.entries[keys] = SourcedProduction(real, line_num, item)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find_shadowing(self, cross_file_only: bool = True
+                       ) -> List[Tuple[SourcedProduction, SourcedProduction]]:
+        """Return (shadowing, shadowed) pairs, sorted by file and line.
+
+        One trie traversal over all entries, so the cost grows with the
+        number of entries plus the number of pairs found, never with the
+        product of the file sizes.
+        """
+        trie = ComposeTrie()
+        for keys, entry in self.entries.items():
+            trie.insert(keys, entry)
+
+        rank = {path: i for i, path in enumerate(self.files)}
+        pairs = [(short, long) for _, short, _, long in trie.find_shadowing()
+                 if not cross_file_only or short.path != long.path]
+        pairs.sort(key=lambda pair: (rank[pair[0].path], pair[0].line_num,
+                                     rank[pair[1].path], pair[1].line_num))
+        return pairs
+
+
+def iter_xcompose(filepath: str) -> Iterator[XComposeSequence]:
+    """Lazily iterate over the sequences of an XCompose file.
+
+    Args:
+        filepath: Path to XCompose file
+
+    Yields:
+        XComposeSequence objects in file order
+    """
+    return XComposeParser(filepath).iter_sequences()
+
+
+# Streaming report output (--format jsonl / sarif), shared by the validator,
+# auditor and comparator
+REPORT_FORMATS = ('jsonl', 'sarif')
+PROJECT_URL = 'https://github.com/phil-bowens/xcompose-stem'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+
+
+class Finding(NamedTuple):
+    """One reportable result of a tool, independent of output format."""
+    rule: str  # Finding type, e.g. "prefix_shadowing"
+    message: str
+    level: str = 'warning'  # SARIF level: error, warning or note
+    path: Optional[str] = None  # File the finding is about
+    line: int = 0  # 1-based line, or 0 if not tied to a line
+    details: Optional[Dict[str, Any]] = None
+
+
+class JsonLinesEmitter:
+    """Writes each finding as one JSON object per line, as it is emitted.
+
+    Records have "type": "finding"; close() adds a final "summary" record.
+    Every line is flushed, so consumers see findings while the tool runs.
+    """
+
+    def __init__(self, tool: str, stream=None):
+        self.tool = tool
+        self.stream = stream if stream is not None else sys.stdout
+        self.count = 0
+
+    def _write(self, record: Dict[str, Any]):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.stream.flush()
+
+    def emit(self, finding: Finding):
+        self.count += 1
+        self._write({
+            'type': 'finding', 'tool': self.tool, 'rule': finding.rule,
+            'level': finding.level, 'file': finding.path, 'line': finding.line,
+            'message': finding.message, 'details': finding.details or {},
+        })
+
+    def close(self, summary: Optional[Dict[str, Any]] = None):
+        record = {'type': 'summary', 'tool': self.tool, 'findings': self.count}
+        record.update(summary or {})
+        self._write(record)
+
+
+class SarifEmitter:
+    """Writes a SARIF 2.1.0 log, streaming results as they are emitted.
+
+    The results array is written first and the tool description (which
+    lists the rules seen) last, so no finding is held in memory.
+    """
+
+    def __init__(self, tool: str, stream=None):
+        self.tool = tool
+        self.stream = stream if stream is not None else sys.stdout
+        self.rules: Dict[str, None] = {}  # Rule IDs in first-seen order
+        self.count = 0
+        self.stream.write(f'{{"version": "2.1.0", "$schema": "{SARIF_SCHEMA}", '
+                          f'"runs": [{{"results": [\n')
+
+    def emit(self, finding: Finding):
+        self.rules.setdefault(finding.rule)
+        result = {
+            'ruleId': finding.rule,
+            'level': finding.level,
+            'message': {'text': finding.message},
+        }
+        if finding.path:
+            location = {'artifactLocation': {'uri': Path(finding.path).as_posix()}}
+            if finding.line:
+                location['region'] = {'startLine': finding.line}
+            result['locations'] = [{'physicalLocation': location}]
+        if finding.details:
+            result['properties'] = finding.details
+
+        separator = ',\n' if self.count else ''
+        self.count += 1
+        self.stream.write(separator + json.dumps(result, ensure_ascii=False))
+        self.stream.flush()
+
+    def close(self, summary: Optional[Dict[str, Any]] = None):
+        driver = {
+            'name': self.tool,
+            'version': __version__,
+            'informationUri': PROJECT_URL,
+            'rules': [{'id': rule} for rule in self.rules],
+        }
+        self.stream.write('\n], "tool": ' + json.dumps({'driver': driver}))
+        if summary:
+            self.stream.write(', "properties": ' + json.dumps(summary, ensure_ascii=False))
+        self.stream.write('}]}\n')
+        self.stream.flush()
+
+
+def open_emitter(output_format: str, tool: str, stream=None):
+    """Return the streaming emitter for a --format value in REPORT_FORMATS."""
+    if output_format == 'jsonl':
+        return JsonLinesEmitter(tool, stream)
+    if output_format == 'sarif':
+        return SarifEmitter(tool, stream)
+    raise ValueError(f"Unknown report format: {output_format}")
+
+
+__all__ = ['XComposeSequence', 'XComposeParser', 'ParseCache', 'parse_xcompose',
+           'iter_xcompose', 'iter_lines', 'get_cache_dir', 'intern_keysym', 'keysym_name',
+           'SequenceTable', 'key_needs_shift', 'ComposeTrie', 'IncludeResolver',
+           'EffectiveTable', 'EffectiveEntry', 'resolve_includes', 'expand_include_path',
+           'find_locale_compose', 'detect_locale', 'ParseDelta', 'lex_compose_line',
+           'ComposeProduction', 'ComposeInclude', 'ComposeSyntaxError', 'parallel_map',
+           'parse_many', 'default_jobs', 'KeysymInfo', 'KEYSYMS', 'keysym_info',
+           'is_known_keysym', 'keysym_glyph', 'CrossFileIndex', 'SourcedProduction',
+           'iter_compose_items', 'parallel_imap', 'Finding', 'JsonLinesEmitter',
+           'SarifEmitter', 'open_emitter', 'REPORT_FORMATS', 'ResultCache',
+           'format_result_cache_stats', 'CONFUSABLES_PATH', 'confusable_skeleton',
+           'invisible_characters', 'format_codepoints', 'TypoIndex', 'TYPO_KINDS']
 __version__ = '1.0.0'